@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import re
 from logging.config import fileConfig
 from pathlib import Path
 from typing import Any
@@ -25,6 +26,13 @@ config.set_main_option("sqlalchemy.url", str(settings.sync_database_url))
 
 target_metadata = Base.metadata
 
+# Partitions are managed at runtime (app.services.partitions, app.services.model_versions), not by models.
+PARTITION_TABLE = re.compile(r"^((interactions|event_logs)_(p\d{6}|default)|fs_scores_\w+)$")
+
+
+def include_object(obj: Any, name: str | None, type_: str, reflected: bool, compare_to: Any) -> bool:
+    return not (type_ == "table" and reflected and name is not None and PARTITION_TABLE.match(name))
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
@@ -33,6 +41,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -45,6 +54,7 @@ def do_run_migrations(connection: Any) -> None:
     context.configure(
         connection=connection,
         target_metadata=target_metadata,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
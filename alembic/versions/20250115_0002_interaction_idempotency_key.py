@@ -0,0 +1,23 @@
+"""Interaction idempotency keys"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20250115_0002"
+down_revision = "20250101_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("interactions", sa.Column("idempotency_key", sa.String(length=128), nullable=True))
+    op.create_unique_constraint(op.f("uq_interactions_idempotency_key"), "interactions", ["idempotency_key"])
+
+
+def downgrade() -> None:
+    op.drop_constraint(op.f("uq_interactions_idempotency_key"), "interactions", type_="unique")
+    op.drop_column("interactions", "idempotency_key")
@@ -0,0 +1,60 @@
+"""User-item affinity rollup"""
+
+from __future__ import annotations
+
+import math
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20250122_0003"
+down_revision = "20250115_0002"
+branch_labels = None
+depends_on = None
+
+# Matches the default ``affinity_half_life_days``; run scripts/rebuild_affinity.py if configured otherwise.
+DECAY_RATE = math.log(2.0) / (30.0 * 86_400.0)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_item_affinity",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("item_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("total_weight", sa.Float(), nullable=False, server_default=sa.text("0")),
+        sa.Column("decayed_weight", sa.Float(), nullable=False, server_default=sa.text("0")),
+        sa.Column("event_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("last_event_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["item_id"], ["items.id"], name=op.f("fk_user_item_affinity_item_id_items"), ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], name=op.f("fk_user_item_affinity_user_id_users"), ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "item_id", name=op.f("pk_user_item_affinity")),
+    )
+    op.create_index("ix_user_item_affinity_item_id", "user_item_affinity", ["item_id"], unique=False)
+
+    op.execute(
+        f"""
+        INSERT INTO user_item_affinity (user_id, item_id, total_weight, decayed_weight, event_count, last_event_at)
+        SELECT user_id,
+               item_id,
+               sum(weight),
+               sum(weight * exp(greatest(-{DECAY_RATE!r} * extract(epoch FROM last_at - event_at), -700.0))),
+               count(*),
+               max(event_at)
+        FROM (
+            SELECT user_id, item_id, weight, event_at,
+                   max(event_at) OVER (PARTITION BY user_id, item_id) AS last_at
+            FROM interactions
+        ) AS events
+        GROUP BY user_id, item_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_item_affinity_item_id", table_name="user_item_affinity")
+    op.drop_table("user_item_affinity")
@@ -0,0 +1,158 @@
+"""Partition interactions and event_logs by month"""
+
+from __future__ import annotations
+
+from datetime import UTC, date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20250129_0004"
+down_revision = "20250122_0003"
+branch_labels = None
+depends_on = None
+
+PREMAKE_MONTHS = 3
+
+interactiontype_enum = postgresql.ENUM(name="interactiontype", create_type=False)
+
+INTERACTION_COLUMNS = (
+    "id, created_at, updated_at, user_id, item_id, event_type, event_at, weight, rating, source, "
+    "metadata_json, idempotency_key"
+)
+EVENT_LOG_COLUMNS = "id, created_at, updated_at, event_type, user_id, ab_test_id, payload, metadata_json, occurred_at"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitions(table: str, column: str, source: str) -> None:
+    """Create monthly partitions covering ``source`` rows plus a few months ahead, and a default."""
+
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text(f"SELECT min({column}) FROM {source}")).scalar()
+    now = datetime.now(tz=UTC)
+    month = date((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(date(now.year, now.month, 1), PREMAKE_MONTHS)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        )
+        month = upper
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def _retire(table: str, constraints: tuple[str, ...], indexes: tuple[str, ...]) -> None:
+    """Rename ``table`` and its schema-wide index names out of the way of the new table."""
+
+    op.rename_table(table, f"{table}_legacy")
+    for name in constraints:
+        op.execute(f"ALTER TABLE {table}_legacy RENAME CONSTRAINT {name} TO {name}_legacy")
+    for name in indexes:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_legacy")
+
+
+def upgrade() -> None:
+    _retire("interactions", ("pk_interactions", "uq_interactions_idempotency_key"), ("ix_interactions_user_item_event",))
+    op.create_table(
+        "interactions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("item_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("event_type", interactiontype_enum, nullable=False),
+        sa.Column("event_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("weight", sa.Float(), nullable=False, server_default=sa.text("1")),
+        sa.Column("rating", sa.Float(), nullable=True),
+        sa.Column("source", sa.String(length=64), nullable=False, server_default="web"),
+        sa.Column("metadata_json", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("idempotency_key", sa.String(length=128), nullable=True),
+        sa.CheckConstraint("weight >= 0", name="ck_interactions_weight_non_negative"),
+        sa.ForeignKeyConstraint(["item_id"], ["items.id"], name=op.f("fk_interactions_item_id_items"), ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], name=op.f("fk_interactions_user_id_users"), ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id", "event_at", name=op.f("pk_interactions")),
+        sa.UniqueConstraint("idempotency_key", "event_at", name=op.f("uq_interactions_idempotency_key")),
+        postgresql_partition_by="RANGE (event_at)",
+    )
+    op.create_index("ix_interactions_user_item_event", "interactions", ["user_id", "item_id", "event_type"], unique=False)
+    _create_partitions("interactions", "event_at", "interactions_legacy")
+    op.execute(f"INSERT INTO interactions ({INTERACTION_COLUMNS}) SELECT {INTERACTION_COLUMNS} FROM interactions_legacy")
+    op.drop_table("interactions_legacy")
+
+    _retire("event_logs", ("pk_event_logs",), ("ix_event_logs_type_created", "ix_event_logs_user_created"))
+    op.create_table(
+        "event_logs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("event_type", sa.String(length=128), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("ab_test_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("metadata_json", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["ab_test_id"], ["ab_tests.id"], name=op.f("fk_event_logs_ab_test_id_ab_tests"), ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], name=op.f("fk_event_logs_user_id_users"), ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id", "occurred_at", name=op.f("pk_event_logs")),
+        postgresql_partition_by="RANGE (occurred_at)",
+    )
+    op.create_index("ix_event_logs_type_occurred", "event_logs", ["event_type", "occurred_at"], unique=False)
+    op.create_index("ix_event_logs_user_occurred", "event_logs", ["user_id", "occurred_at"], unique=False)
+    _create_partitions("event_logs", "occurred_at", "event_logs_legacy")
+    op.execute(f"INSERT INTO event_logs ({EVENT_LOG_COLUMNS}) SELECT {EVENT_LOG_COLUMNS} FROM event_logs_legacy")
+    op.drop_table("event_logs_legacy")
+
+
+def downgrade() -> None:
+    op.rename_table("event_logs", "event_logs_partitioned")
+    op.execute("ALTER TABLE event_logs_partitioned RENAME CONSTRAINT pk_event_logs TO pk_event_logs_partitioned")
+    op.drop_index("ix_event_logs_type_occurred", table_name="event_logs_partitioned")
+    op.drop_index("ix_event_logs_user_occurred", table_name="event_logs_partitioned")
+    op.execute("CREATE TABLE event_logs (LIKE event_logs_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    op.create_primary_key(op.f("pk_event_logs"), "event_logs", ["id"])
+    op.create_foreign_key(
+        op.f("fk_event_logs_ab_test_id_ab_tests"), "event_logs", "ab_tests", ["ab_test_id"], ["id"], ondelete="SET NULL"
+    )
+    op.create_foreign_key(
+        op.f("fk_event_logs_user_id_users"), "event_logs", "users", ["user_id"], ["id"], ondelete="SET NULL"
+    )
+    op.create_index("ix_event_logs_type_created", "event_logs", ["event_type", "created_at"], unique=False)
+    op.create_index("ix_event_logs_user_created", "event_logs", ["user_id", "created_at"], unique=False)
+    op.execute(f"INSERT INTO event_logs ({EVENT_LOG_COLUMNS}) SELECT {EVENT_LOG_COLUMNS} FROM event_logs_partitioned")
+    op.execute("DROP TABLE event_logs_partitioned CASCADE")
+
+    op.rename_table("interactions", "interactions_partitioned")
+    op.execute("ALTER TABLE interactions_partitioned RENAME CONSTRAINT pk_interactions TO pk_interactions_partitioned")
+    op.execute(
+        "ALTER TABLE interactions_partitioned RENAME CONSTRAINT uq_interactions_idempotency_key "
+        "TO uq_interactions_idempotency_key_partitioned"
+    )
+    op.drop_index("ix_interactions_user_item_event", table_name="interactions_partitioned")
+    op.execute("CREATE TABLE interactions (LIKE interactions_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    op.create_primary_key(op.f("pk_interactions"), "interactions", ["id"])
+    op.create_unique_constraint(op.f("uq_interactions_idempotency_key"), "interactions", ["idempotency_key"])
+    op.create_foreign_key(
+        op.f("fk_interactions_item_id_items"), "interactions", "items", ["item_id"], ["id"], ondelete="CASCADE"
+    )
+    op.create_foreign_key(
+        op.f("fk_interactions_user_id_users"), "interactions", "users", ["user_id"], ["id"], ondelete="CASCADE"
+    )
+    op.create_index("ix_interactions_user_item_event", "interactions", ["user_id", "item_id", "event_type"], unique=False)
+    # Keys were only unique per event time while partitioned; keep the earliest copy of each.
+    op.execute(
+        f"""
+        INSERT INTO interactions ({INTERACTION_COLUMNS})
+        SELECT DISTINCT ON (coalesce(idempotency_key, id::text)) {INTERACTION_COLUMNS}
+        FROM interactions_partitioned
+        ORDER BY coalesce(idempotency_key, id::text), event_at
+        """
+    )
+    op.execute("DROP TABLE interactions_partitioned CASCADE")
@@ -0,0 +1,50 @@
+"""UUIDv7 server defaults for append-heavy tables"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20250205_0005"
+down_revision = "20250129_0004"
+branch_labels = None
+depends_on = None
+
+APPEND_HEAVY_TABLES = ("interactions", "event_logs", "feature_store_recommendation_scores")
+
+
+def upgrade() -> None:
+    # Postgres < 18 has no native uuidv7(); stamp the 48-bit millisecond clock over a v4 UUID
+    # and flip its version nibble from 4 to 7.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid
+        LANGUAGE sql VOLATILE PARALLEL SAFE AS $$
+            SELECT encode(
+                set_bit(
+                    set_bit(
+                        overlay(
+                            uuid_send(gen_random_uuid())
+                            PLACING substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                            FROM 1 FOR 6
+                        ),
+                        52, 1
+                    ),
+                    53, 1
+                ),
+                'hex'
+            )::uuid
+        $$
+        """
+    )
+    # Existing v4 keys stay as they are; only new rows are time-ordered.
+    for table in APPEND_HEAVY_TABLES:
+        op.alter_column(table, "id", server_default=sa.text("uuid_generate_v7()"))
+
+
+def downgrade() -> None:
+    for table in APPEND_HEAVY_TABLES:
+        op.alter_column(table, "id", server_default=None)
+    op.execute("DROP FUNCTION IF EXISTS uuid_generate_v7()")
@@ -0,0 +1,22 @@
+"""Item content hash for incremental catalog sync"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20250212_0006"
+down_revision = "20250205_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL and are rewritten (and hashed) once by the next catalog load.
+    op.add_column("items", sa.Column("content_hash", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("items", "content_hash")
@@ -0,0 +1,137 @@
+"""Partition recommendation scores by model version and add the model version registry"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20250219_0007"
+down_revision = "20250212_0006"
+branch_labels = None
+depends_on = None
+
+SCORES = "feature_store_recommendation_scores"
+SCORE_COLUMNS = "id, created_at, updated_at, user_id, item_id, model_version, score, rank, explanation, computed_at"
+
+modelversionstatus_enum = sa.Enum("building", "published", "live", "retired", name="modelversionstatus")
+
+
+def _partition_name(model_version: str) -> str:
+    # Mirrors app.services.model_versions.partition_name; migrations do not import app code.
+    slug = re.sub(r"[^a-z0-9]+", "_", model_version.lower()).strip("_")[:24]
+    digest = hashlib.sha1(model_version.encode("utf-8")).hexdigest()[:8]
+    return f"fs_scores_{slug}_{digest}"
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    modelversionstatus_enum.create(bind, checkfirst=True)
+    op.create_table(
+        "feature_store_model_versions",
+        sa.Column("model_version", sa.String(length=64), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(name="modelversionstatus", create_type=False),
+            nullable=False,
+            server_default="building",
+        ),
+        sa.Column("partition_name", sa.String(length=63), nullable=False),
+        sa.Column("score_count", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column("published_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("retired_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("model_version", name=op.f("pk_feature_store_model_versions")),
+    )
+    op.create_index(
+        "ix_feature_store_model_versions_live",
+        "feature_store_model_versions",
+        ["status"],
+        unique=True,
+        postgresql_where=sa.text("status = 'live'"),
+    )
+
+    op.rename_table(SCORES, f"{SCORES}_legacy")
+    op.execute(f"ALTER TABLE {SCORES}_legacy RENAME CONSTRAINT pk_{SCORES} TO pk_{SCORES}_legacy")
+    op.execute(
+        "ALTER INDEX ix_feature_store_recommendation_scores_user_item_version "
+        "RENAME TO ix_feature_store_recommendation_scores_user_item_version_legacy"
+    )
+    op.create_table(
+        SCORES,
+        sa.Column("id", postgresql.UUID(as_uuid=True), server_default=sa.text("uuid_generate_v7()"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("item_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("model_version", sa.String(length=64), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("explanation", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["item_id"], ["items.id"], name=op.f(f"fk_{SCORES}_item_id_items"), ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], name=op.f(f"fk_{SCORES}_user_id_users"), ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id", "model_version", name=op.f(f"pk_{SCORES}")),
+        postgresql_partition_by="LIST (model_version)",
+    )
+    op.create_index(
+        "ix_feature_store_recommendation_scores_user_item_version",
+        SCORES,
+        ["user_id", "item_id", "model_version"],
+        unique=True,
+    )
+
+    # Every version already scored becomes its own attached partition, registered as published.
+    versions = bind.execute(
+        sa.text(f"SELECT model_version, count(*) FROM {SCORES}_legacy GROUP BY model_version ORDER BY model_version")
+    ).all()
+    for model_version, count in versions:
+        name = _partition_name(model_version)
+        op.execute(f"CREATE TABLE {name} PARTITION OF {SCORES} FOR VALUES IN ({_literal(model_version)})")
+        bind.execute(
+            sa.text(
+                "INSERT INTO feature_store_model_versions (model_version, status, partition_name, score_count, published_at) "
+                "VALUES (:model_version, 'published', :name, :count, now())"
+            ),
+            {"model_version": model_version, "name": name, "count": count},
+        )
+    op.execute(f"INSERT INTO {SCORES} ({SCORE_COLUMNS}) SELECT {SCORE_COLUMNS} FROM {SCORES}_legacy")
+    op.drop_table(f"{SCORES}_legacy")
+
+
+def downgrade() -> None:
+    op.rename_table(SCORES, f"{SCORES}_partitioned")
+    op.execute(f"ALTER TABLE {SCORES}_partitioned RENAME CONSTRAINT pk_{SCORES} TO pk_{SCORES}_partitioned")
+    op.drop_index("ix_feature_store_recommendation_scores_user_item_version", table_name=f"{SCORES}_partitioned")
+    op.execute(f"CREATE TABLE {SCORES} (LIKE {SCORES}_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    op.create_primary_key(op.f(f"pk_{SCORES}"), SCORES, ["id"])
+    op.create_foreign_key(op.f(f"fk_{SCORES}_item_id_items"), SCORES, "items", ["item_id"], ["id"], ondelete="CASCADE")
+    op.create_foreign_key(op.f(f"fk_{SCORES}_user_id_users"), SCORES, "users", ["user_id"], ["id"], ondelete="CASCADE")
+    op.create_index(
+        "ix_feature_store_recommendation_scores_user_item_version",
+        SCORES,
+        ["user_id", "item_id", "model_version"],
+        unique=True,
+    )
+    op.execute(f"INSERT INTO {SCORES} ({SCORE_COLUMNS}) SELECT {SCORE_COLUMNS} FROM {SCORES}_partitioned")
+    op.execute(f"DROP TABLE {SCORES}_partitioned CASCADE")
+    # Staging tables of unpublished builds are not partitions, so dropping the parent leaves them behind.
+    staging = op.get_bind().execute(
+        sa.text("SELECT partition_name FROM feature_store_model_versions WHERE status = 'building'")
+    ).scalars().all()
+    for name in staging:
+        op.execute(f"DROP TABLE IF EXISTS {name}")
+
+    op.drop_index("ix_feature_store_model_versions_live", table_name="feature_store_model_versions")
+    op.drop_table("feature_store_model_versions")
+    modelversionstatus_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,46 @@
+"""Precomputed item-to-item neighbour lists"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20250226_0008"
+down_revision = "20250219_0007"
+branch_labels = None
+depends_on = None
+
+neighborkind_enum = sa.Enum("content", name="neighborkind")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    neighborkind_enum.create(bind, checkfirst=True)
+    op.create_table(
+        "item_neighbors",
+        sa.Column("item_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("kind", postgresql.ENUM(name="neighborkind", create_type=False), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("neighbor_ids", postgresql.ARRAY(postgresql.UUID(as_uuid=True)), nullable=False),
+        sa.Column("scores", postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["item_id"], ["items.id"], name=op.f("fk_item_neighbors_item_id_items"), ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("item_id", "kind", name=op.f("pk_item_neighbors")),
+    )
+    op.create_index(
+        "ix_item_neighbors_neighbor_ids",
+        "item_neighbors",
+        ["neighbor_ids"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_item_neighbors_neighbor_ids", table_name="item_neighbors")
+    op.drop_table("item_neighbors")
+    neighborkind_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,45 @@
+"""Item co-visitation pairs and session lookup on interactions"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20250305_0009"
+down_revision = "20250226_0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ADD VALUE cannot run inside a transaction block that later uses the new value.
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE neighborkind ADD VALUE IF NOT EXISTS 'covisit'")
+
+    op.create_table(
+        "item_covisit_pairs",
+        sa.Column("item_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("neighbor_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False, server_default=sa.text("0")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["item_id"], ["items.id"], name=op.f("fk_item_covisit_pairs_item_id_items"), ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["neighbor_id"], ["items.id"], name=op.f("fk_item_covisit_pairs_neighbor_id_items"), ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("item_id", "neighbor_id", name=op.f("pk_item_covisit_pairs")),
+    )
+    # Created on the partitioned parent, so every monthly partition gets (and inherits) it.
+    op.create_index(
+        "ix_interactions_session_id",
+        "interactions",
+        [sa.text("(metadata_json ->> 'session_id')")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_interactions_session_id", table_name="interactions")
+    op.drop_table("item_covisit_pairs")
+    # Postgres cannot drop an enum value; remove the rows that use it and leave the label unused.
+    op.execute("DELETE FROM item_neighbors WHERE kind = 'covisit'")
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
-from app.api.routes import auth, health, users
+from app.api.routes import auth, health, interactions, recommendations, users
 
 api_router = APIRouter()
 api_router.include_router(health.router, prefix="/health", tags=["health"])
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router.include_router(interactions.router, prefix="/interactions", tags=["interactions"])
+api_router.include_router(recommendations.router, prefix="/recommendations", tags=["recommendations"])
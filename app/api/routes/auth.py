@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import AuthService, current_active_user
 from app.core.database import get_db_session
-from app.core.security import verify_password
+from app.core.security import verify_password_async
 from app.models import User, UserRole
 from app.schemas.auth import (
     LoginRequest,
@@ -82,7 +82,7 @@ async def change_password(
     current_user: User = Depends(current_active_user),
     session: AsyncSession = Depends(get_db_session),
 ) -> TokenResponse:
-    if not verify_password(payload.current_password, current_user.hashed_password):
+    if not await verify_password_async(payload.current_password, current_user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect current password")
     service = AuthService(session)
     db_user = await session.get(User, current_user.id)
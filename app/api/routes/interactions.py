@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import Principal, current_active_principal
+from app.core.database import get_db_session
+from app.models import UserRole
+from app.schemas.interaction import InteractionBatchCreate, InteractionBatchResult
+from app.services import InteractionIngestionService
+from app.services.interaction_buffer import InteractionBuffer
+
+router = APIRouter()
+
+
+def ensure_may_submit(payload: InteractionBatchCreate, principal: Principal) -> None:
+    if principal.role != UserRole.ADMIN and any(event.user_id != principal.id for event in payload.events):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot record events for other users")
+
+
+@router.post(
+    "/batch",
+    response_model=InteractionBatchResult,
+    status_code=status.HTTP_201_CREATED,
+    summary="Ingest a batch of interaction events",
+)
+async def ingest_interactions(
+    payload: InteractionBatchCreate,
+    principal: Principal = Depends(current_active_principal),
+    session: AsyncSession = Depends(get_db_session),
+) -> InteractionBatchResult:
+    ensure_may_submit(payload, principal)
+    inserted = await InteractionIngestionService(session).ingest(payload.events)
+    await session.commit()
+    return InteractionBatchResult(accepted=len(payload.events), inserted=inserted)
+
+
+@router.post(
+    "/stream",
+    response_model=InteractionBatchResult,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Buffer interaction events for asynchronous ingestion",
+)
+async def buffer_interactions(
+    payload: InteractionBatchCreate,
+    principal: Principal = Depends(current_active_principal),
+) -> InteractionBatchResult:
+    ensure_may_submit(payload, principal)
+    try:
+        await InteractionBuffer().publish(payload.events)
+    except RedisError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Interaction buffer unavailable, retry or use /interactions/batch",
+            headers={"Retry-After": "1"},
+        ) from exc
+    return InteractionBatchResult(accepted=len(payload.events))
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import uuid
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import Principal, current_active_principal, current_admin_principal
+from app.core.config import settings
+from app.core.database import async_session_factory, get_db_session
+from app.models import NeighborKind
+from app.schemas.recommendation import BatchRecommendationRequest, RecommendedItem, UserRecommendations
+from app.services import FeatureStoreService, FoldInService, ModelVersionService, NeighborRetriever
+from app.services.affinity import AffinityService
+from app.services.recommendation_cache import to_recommended_items
+
+router = APIRouter()
+
+# Strongest user-item affinities used as seeds when falling back to co-visitation.
+COVISIT_SEEDS = 10
+
+
+async def stream_batch_recommendations(payload: BatchRecommendationRequest) -> AsyncIterator[bytes]:
+    """Yield one NDJSON line per user, issuing one query per ``chunk_size`` users."""
+
+    user_ids = list(dict.fromkeys(payload.user_ids))
+    # The request-scoped session is closed before a streaming body is sent, so own one here.
+    async with async_session_factory() as session:
+        service = FeatureStoreService(session)
+        # Resolve once so every line of the stream reports and reads the same version.
+        model_version = await ModelVersionService(session).resolve(payload.model_version)
+        for start in range(0, len(user_ids), payload.chunk_size):
+            chunk = user_ids[start : start + payload.chunk_size]
+            grouped = await service.fetch_recommendation_scores_batch(
+                chunk,
+                model_version=model_version,
+                limit=payload.limit,
+            )
+            lines = [
+                UserRecommendations(
+                    user_id=user_id,
+                    model_version=model_version,
+                    items=to_recommended_items(grouped.get(user_id, [])),
+                ).model_dump_json()
+                for user_id in chunk
+            ]
+            session.expunge_all()
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@router.post(
+    "/batch",
+    response_class=StreamingResponse,
+    summary="Stream recommendations for many users",
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def batch_recommendations(
+    payload: BatchRecommendationRequest,
+    _: Principal = Depends(current_admin_principal),
+) -> StreamingResponse:
+    return StreamingResponse(stream_batch_recommendations(payload), media_type="application/x-ndjson")
+
+
+@router.get("/me", response_model=UserRecommendations, summary="Recommendations for the current user")
+async def my_recommendations(
+    limit: int = Query(20, ge=1, le=200),
+    model_version: str | None = Query(None, max_length=64),
+    principal: Principal = Depends(current_active_principal),
+    session: AsyncSession = Depends(get_db_session),
+) -> UserRecommendations:
+    version = await ModelVersionService(session).resolve(model_version)
+    items = await FeatureStoreService(session).fetch_recommendations(
+        principal.id,
+        model_version=version,
+        limit=limit,
+    )
+    if not items and settings.fold_in_on_demand:
+        # No batch scores yet, typically a user who signed up after the last run: fold in and score online.
+        candidates = await FoldInService(session).recommend(principal.id, model_version=version, limit=limit)
+        await session.commit()
+        items = to_recommended_items(candidates)
+    if not items:
+        # Nothing the model can score (no live model, or items it has never seen): items seen
+        # alongside the user's strongest interactions.
+        seen = await AffinityService(session).fetch(principal.id)
+        seeds = sorted(seen, key=seen.__getitem__, reverse=True)[:COVISIT_SEEDS]
+        candidates = await NeighborRetriever(session).retrieve(seeds, limit=limit, exclude_item_ids=seen)
+        items = to_recommended_items(candidates)
+    return UserRecommendations(user_id=principal.id, model_version=version, items=items)
+
+
+@router.get(
+    "/items/{item_id}",
+    response_model=list[RecommendedItem],
+    summary="Items related to an item, from precomputed neighbour lists",
+)
+async def related_items(
+    item_id: uuid.UUID,
+    kind: NeighborKind = Query(NeighborKind.COVISIT),
+    limit: int = Query(20, ge=1, le=200),
+    _: Principal = Depends(current_active_principal),
+    session: AsyncSession = Depends(get_db_session),
+) -> list[RecommendedItem]:
+    return to_recommended_items(await NeighborRetriever(session, kind).retrieve([item_id], limit=limit))
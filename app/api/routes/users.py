@@ -5,7 +5,7 @@ import uuid
 from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth import current_active_user, current_admin_user
+from app.auth import Principal, current_active_user, current_admin_principal
 from app.core.database import get_db_session
 from app.models import User
 from app.schemas.user import UserCreate, UserRead, UserUpdate, UsersPage
@@ -18,7 +18,7 @@ router = APIRouter()
 async def list_users(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    _: User = Depends(current_admin_user),
+    _: Principal = Depends(current_admin_principal),
     session: AsyncSession = Depends(get_db_session),
 ) -> UsersPage:
     service = UserService(session)
@@ -36,7 +36,7 @@ async def list_users(
 @router.post("/", response_model=UserRead, status_code=status.HTTP_201_CREATED, summary="Create user")
 async def create_user(
     payload: UserCreate,
-    _: User = Depends(current_admin_user),
+    _: Principal = Depends(current_admin_principal),
     session: AsyncSession = Depends(get_db_session),
 ) -> UserRead:
     service = UserService(session)
@@ -56,7 +56,7 @@ async def create_user(
 @router.get("/{user_id}", response_model=UserRead, summary="Retrieve user by id")
 async def get_user(
     user_id: uuid.UUID,
-    _: User = Depends(current_admin_user),
+    _: Principal = Depends(current_admin_principal),
     session: AsyncSession = Depends(get_db_session),
 ) -> UserRead:
     service = UserService(session)
@@ -68,7 +68,7 @@ async def get_user(
 async def update_user(
     user_id: uuid.UUID,
     payload: UserUpdate,
-    _: User = Depends(current_admin_user),
+    _: Principal = Depends(current_admin_principal),
     session: AsyncSession = Depends(get_db_session),
 ) -> UserRead:
     service = UserService(session)
@@ -78,6 +78,19 @@ async def update_user(
     return UserRead.model_validate(updated)
 
 
+@router.post("/{user_id}/deactivate", response_model=UserRead, summary="Deactivate a user")
+async def deactivate_user(
+    user_id: uuid.UUID,
+    _: Principal = Depends(current_admin_principal),
+    session: AsyncSession = Depends(get_db_session),
+) -> UserRead:
+    service = UserService(session)
+    user = await service.get_user(user_id)
+    deactivated = await service.deactivate_user(user)
+    await session.commit()
+    return UserRead.model_validate(deactivated)
+
+
 @router.patch("/me", response_model=UserRead, summary="Update current user profile")
 async def update_me(
     payload: UserUpdate,
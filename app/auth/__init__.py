@@ -2,15 +2,28 @@ from __future__ import annotations
 
 """Authentication and authorization utilities."""
 
-from .dependencies import current_active_user, current_admin_user, get_current_user
+from .dependencies import (
+    current_active_principal,
+    current_active_user,
+    current_admin_principal,
+    current_admin_user,
+    get_current_principal,
+    get_current_user,
+)
+from .principal import Principal, invalidate_principal
 from .service import AuthService
 from .tokens import TokenPair, decode_token_type
 
 __all__ = [
     "AuthService",
+    "Principal",
     "TokenPair",
+    "current_active_principal",
     "current_active_user",
+    "current_admin_principal",
     "current_admin_user",
     "decode_token_type",
+    "get_current_principal",
     "get_current_user",
+    "invalidate_principal",
 ]
@@ -1,28 +1,59 @@
 from __future__ import annotations
 
+import uuid
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.principal import Principal, load_principal
+from app.core.config import settings
 from app.core.database import get_db_session
-from app.core.security import decode_token
+from app.core.security import InvalidTokenError, decode_token
 from app.models import User, UserRole
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
 
-async def get_current_user(
+async def get_current_principal(
     token: Annotated[str, Depends(oauth2_scheme)],
     session: Annotated[AsyncSession, Depends(get_db_session)],
-) -> User:
-    payload = decode_token(token)
-    user_id = payload.get("sub")
-    if user_id is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication subject")
+) -> Principal:
+    try:
+        payload = decode_token(token)
+        user_id = uuid.UUID(str(payload["sub"]))
+    except (InvalidTokenError, KeyError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication subject") from exc
+
+    if settings.auth_claims_only:
+        principal = Principal.from_claims(payload)
+        if principal is not None:
+            return principal
+
+    principal = await load_principal(session, user_id)
+    if principal is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    return principal
+
+
+async def current_active_principal(principal: Annotated[Principal, Depends(get_current_principal)]) -> Principal:
+    if not principal.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive account")
+    return principal
 
-    user = await session.get(User, user_id)
+
+async def current_admin_principal(principal: Annotated[Principal, Depends(current_active_principal)]) -> Principal:
+    if principal.role not in {UserRole.ADMIN, UserRole.ANALYST}:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+    return principal
+
+
+async def get_current_user(
+    principal: Annotated[Principal, Depends(get_current_principal)],
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+) -> User:
+    user = await session.get(User, principal.id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
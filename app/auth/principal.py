@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import structlog
+from redis.exceptions import RedisError
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache, get_redis_client, publish_invalidation, register_invalidation_handler
+from app.core.config import settings
+from app.models import User, UserRole
+
+logger = structlog.get_logger(__name__)
+
+NAMESPACE = "principal"
+_PENDING_INVALIDATIONS = "principal_invalidations"
+
+# Strong references to after-commit invalidations; the event loop only keeps weak ones.
+_invalidation_tasks: set[asyncio.Task[None]] = set()
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """The authorization-relevant slice of a user, cheap to cache and to embed in tokens."""
+
+    id: uuid.UUID
+    role: UserRole
+    is_active: bool
+    feature_flags: tuple[str, ...] = ()
+
+    @classmethod
+    def from_user(cls, user: User) -> Principal:
+        return cls(id=user.id, role=user.role, is_active=user.is_active, feature_flags=tuple(user.feature_flags or ()))
+
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any]) -> Principal | None:
+        """Build a principal from signed access-token claims, if the token carries them."""
+
+        if "role" not in payload or "active" not in payload:
+            return None
+        return cls(
+            id=uuid.UUID(payload["sub"]),
+            role=UserRole(payload["role"]),
+            is_active=bool(payload["active"]),
+            feature_flags=tuple(payload.get("flags", ())),
+        )
+
+    def to_claims(self) -> Dict[str, Any]:
+        return {"role": self.role.value, "active": self.is_active, "flags": list(self.feature_flags)}
+
+    def dumps(self) -> str:
+        return json.dumps({"id": str(self.id), **self.to_claims()})
+
+    @classmethod
+    def loads(cls, raw: str) -> Principal:
+        data = json.loads(raw)
+        return cls(
+            id=uuid.UUID(data["id"]),
+            role=UserRole(data["role"]),
+            is_active=bool(data["active"]),
+            feature_flags=tuple(data.get("flags", ())),
+        )
+
+
+class PrincipalCache:
+    """In-process TTL cache in front of Redis for :class:`Principal` lookups."""
+
+    def __init__(self) -> None:
+        self.local: TTLCache[uuid.UUID, Principal] = TTLCache(
+            max_entries=settings.principal_cache_max_entries,
+            ttl_seconds=settings.principal_cache_local_ttl_seconds,
+        )
+
+    @staticmethod
+    def redis_key(user_id: uuid.UUID) -> str:
+        return f"{NAMESPACE}:{user_id}"
+
+    async def get(self, user_id: uuid.UUID) -> Principal | None:
+        principal = self.local.get(user_id)
+        if principal is not None:
+            return principal
+        try:
+            redis = await get_redis_client()
+            raw = await redis.get(self.redis_key(user_id))
+        except RedisError as exc:
+            logger.warning("principal_cache.get_failed", error=str(exc))
+            return None
+        if raw is None:
+            return None
+        principal = Principal.loads(raw)
+        self.local.set(user_id, principal)
+        return principal
+
+    async def set(self, principal: Principal) -> None:
+        self.local.set(principal.id, principal)
+        try:
+            redis = await get_redis_client()
+            await redis.set(self.redis_key(principal.id), principal.dumps(), ex=settings.principal_cache_ttl_seconds)
+        except RedisError as exc:
+            logger.warning("principal_cache.set_failed", error=str(exc))
+
+    async def invalidate(self, user_id: uuid.UUID) -> None:
+        self.local.pop(user_id)
+        try:
+            redis = await get_redis_client()
+            await redis.delete(self.redis_key(user_id))
+        except RedisError as exc:
+            logger.warning("principal_cache.invalidate_failed", error=str(exc))
+        await publish_invalidation(NAMESPACE, str(user_id))
+
+    def evict_local(self, key: str) -> None:
+        self.local.pop(uuid.UUID(key))
+
+
+_cache: PrincipalCache | None = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    global _cache
+    if _cache is None:
+        _cache = PrincipalCache()
+        register_invalidation_handler(NAMESPACE, _cache.evict_local)
+    return _cache
+
+
+async def load_principal(session: AsyncSession, user_id: uuid.UUID) -> Principal | None:
+    """Return the cached principal, reading only the four principal columns on a miss.
+
+    The columns are selected as a plain row rather than a partially loaded ``User``, which
+    would sit in the request session's identity map and be handed back to any later
+    ``session.get(User, ...)`` with its other attributes unloadable.
+    """
+
+    cache = get_principal_cache()
+    principal = await cache.get(user_id)
+    if principal is not None:
+        return principal
+    row = (
+        await session.execute(
+            select(User.id, User.role, User.is_active, User.feature_flags).where(User.id == user_id)
+        )
+    ).one_or_none()
+    if row is None:
+        return None
+    principal = Principal(
+        id=row.id, role=row.role, is_active=row.is_active, feature_flags=tuple(row.feature_flags or ())
+    )
+    await cache.set(principal)
+    return principal
+
+
+def _invalidate_after_commit(sync_session: Session) -> None:
+    pending: set[uuid.UUID] = sync_session.info.pop(_PENDING_INVALIDATIONS, set())
+    cache = get_principal_cache()
+    loop = asyncio.get_running_loop()
+    for user_id in pending:
+        task = loop.create_task(cache.invalidate(user_id))
+        _invalidation_tasks.add(task)
+        task.add_done_callback(_invalidation_tasks.discard)
+
+
+async def invalidate_principal(session: AsyncSession, user_id: uuid.UUID) -> None:
+    """Evict a user's principal now and again once ``session`` commits.
+
+    The second eviction closes the window in which a concurrent request could re-cache
+    the row as it was before the transaction committed.
+    """
+
+    await get_principal_cache().invalidate(user_id)
+    sync_session = session.sync_session
+    pending = sync_session.info.setdefault(_PENDING_INVALIDATIONS, set())
+    if not pending:
+        event.listen(sync_session, "after_commit", _invalidate_after_commit, once=True)
+    pending.add(user_id)
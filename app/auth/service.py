@@ -7,7 +7,13 @@ from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import create_access_token, create_refresh_token, hash_password, verify_password
+from app.auth.principal import Principal, invalidate_principal
+from app.core.security import (
+    create_access_token,
+    create_refresh_token,
+    hash_password_async,
+    verify_password_async,
+)
 from app.models import User, UserRole
 
 
@@ -18,7 +24,7 @@ class AuthService:
     async def authenticate(self, email: str, password: str) -> User:
         normalized_email = email.strip().lower()
         user = await self._get_user_by_email(normalized_email)
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await verify_password_async(password, user.hashed_password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         if not user.is_active:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
@@ -31,7 +37,12 @@ class AuthService:
         existing = await self._get_user_by_email(normalized_email)
         if existing:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-        user = User(email=normalized_email, hashed_password=hash_password(password), full_name=full_name, role=role)
+        user = User(
+            email=normalized_email,
+            hashed_password=await hash_password_async(password),
+            full_name=full_name,
+            role=role,
+        )
         self.session.add(user)
         await self.session.flush()
         return user
@@ -40,7 +51,7 @@ class AuthService:
         return await self.session.scalar(select(User).where(User.email == email))
 
     async def issue_tokens(self, user: User) -> tuple[str, str]:
-        access = create_access_token(str(user.id), extra_claims={"role": user.role.value})
+        access = create_access_token(str(user.id), extra_claims=Principal.from_user(user).to_claims())
         refresh = create_refresh_token(str(user.id))
         return access, refresh
 
@@ -55,5 +66,6 @@ class AuthService:
         return await self.issue_tokens(user)
 
     async def change_password(self, user: User, new_password: str) -> None:
-        user.hashed_password = hash_password(new_password)
+        user.hashed_password = await hash_password_async(new_password)
         await self.session.flush()
+        await invalidate_principal(self.session, user.id)
@@ -1,13 +1,32 @@
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
 
+import structlog
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from app.core.config import settings
 
+logger = structlog.get_logger(__name__)
+
 _redis_client: Optional[Redis] = None
 
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+INSTANCE_ID = uuid.uuid4().hex
+
+InvalidationHandler = Callable[[str], Awaitable[None] | None]
+_invalidation_handlers: dict[str, InvalidationHandler] = {}
+_listener_task: Optional[asyncio.Task[None]] = None
+
 
 async def get_redis_client() -> Redis:
     """Return a cached Redis client instance."""
@@ -32,3 +51,105 @@ async def close_redis_client() -> None:
     await _redis_client.close()
     await _redis_client.connection_pool.disconnect()
     _redis_client = None
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded in-process LRU cache whose entries also expire after ``ttl_seconds``."""
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, *, ttl_seconds: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        entry = self._entries.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def register_invalidation_handler(namespace: str, handler: InvalidationHandler) -> None:
+    """Evict local entries of ``namespace`` when another process publishes an invalidation."""
+
+    _invalidation_handlers[namespace] = handler
+
+
+async def publish_invalidation(namespace: str, key: str) -> None:
+    """Broadcast an eviction to every process; failures are logged, never raised."""
+
+    message = json.dumps({"namespace": namespace, "key": key, "origin": INSTANCE_ID})
+    try:
+        redis = await get_redis_client()
+        await redis.publish(INVALIDATION_CHANNEL, message)
+    except RedisError as exc:
+        logger.warning("cache.invalidation.publish_failed", namespace=namespace, error=str(exc))
+
+
+async def _dispatch_invalidation(raw: str) -> None:
+    message = json.loads(raw)
+    if message.get("origin") == INSTANCE_ID:
+        return
+    handler = _invalidation_handlers.get(message.get("namespace", ""))
+    if handler is None:
+        return
+    outcome = handler(message["key"])
+    if outcome is not None:
+        await outcome
+
+
+async def _listen_for_invalidations() -> None:
+    while True:
+        try:
+            redis = await get_redis_client()
+            async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        await _dispatch_invalidation(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except (RedisError, ValueError, KeyError) as exc:
+            logger.warning("cache.invalidation.listener_error", error=str(exc))
+            await asyncio.sleep(1.0)
+
+
+def start_invalidation_listener() -> None:
+    """Start the background pub/sub subscriber for cross-process cache evictions."""
+
+    global _listener_task
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen_for_invalidations(), name="cache-invalidation-listener")
+
+
+async def stop_invalidation_listener() -> None:
+    global _listener_task
+    if _listener_task is None:
+        return
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+    _listener_task = None
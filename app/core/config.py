@@ -59,6 +59,207 @@ class Settings(BaseSettings):
         description="Optional OTLP endpoint for OpenTelemetry exporters.",
     )
 
+    default_model_version: str = Field(
+        "v1",
+        description="Model version served when a request does not pin one and no version has been published live.",
+    )
+    live_model_version_ttl_seconds: float = Field(
+        5.0,
+        gt=0,
+        description="How long each process reuses the resolved live model version before re-reading the pointer.",
+    )
+    model_versions_retained: int = Field(
+        2,
+        ge=0,
+        description="Retired model versions kept attached for rollback before their score partitions are dropped.",
+    )
+    model_version_build_timeout_hours: int = Field(
+        24,
+        ge=1,
+        description="Unpublished score builds older than this are treated as abandoned and dropped.",
+    )
+    recommender_matrix_ttl_seconds: int = Field(
+        300,
+        ge=1,
+        description="How long the in-process item matrix and eligibility mask are reused before reloading.",
+    )
+    recommender_max_score_cells: int = Field(
+        32_000_000,
+        ge=1_000,
+        description="Upper bound on users x items scores materialized per matmul block.",
+    )
+
+    fold_in_on_demand: bool = Field(
+        True,
+        description="Fold in and score users online when they have no materialized recommendations yet.",
+    )
+    fold_in_stream_enabled: bool = Field(
+        True,
+        description="Refresh the embeddings of users with freshly flushed interactions from the stream worker.",
+    )
+    fold_in_batch_size: int = Field(500, ge=1, description="Users folded in and written per micro-batch.")
+    fold_in_alpha: float = Field(
+        40.0,
+        gt=0,
+        description="Confidence per unit of affinity weight for fold-in; keep equal to the trainer's --alpha.",
+    )
+    fold_in_regularization: float = Field(
+        0.05,
+        gt=0,
+        description="L2 penalty for fold-in solves; keep equal to the trainer's --regularization.",
+    )
+
+    covisit_stream_enabled: bool = Field(
+        True,
+        description="Fold freshly flushed interactions into the co-visitation pairs from the stream worker.",
+    )
+    covisit_lookback_days: int = Field(
+        30,
+        ge=1,
+        description="Interactions older than this stop counting towards co-visitation at the nightly rebuild.",
+    )
+    covisit_window_minutes: int = Field(
+        60,
+        ge=1,
+        description="Tumbling window within which one user's interactions count as co-visits.",
+    )
+    covisit_session_weight: float = Field(1.0, ge=0, description="Score of an item pair seen in one session.")
+    covisit_user_weight: float = Field(
+        0.5,
+        ge=0,
+        description="Score of an item pair seen by one user within one window.",
+    )
+    covisit_max_group_items: int = Field(
+        100,
+        ge=2,
+        description="Sessions and user windows with more distinct items (crawlers, bulk imports) are ignored.",
+    )
+    covisit_neighbors: int = Field(50, ge=1, description="Neighbours kept per item in the served co-visitation lists.")
+    covisit_pairs_per_item: int = Field(
+        200,
+        ge=1,
+        description="Pairs per item the nightly rebuild keeps in the working table that incremental updates add to.",
+    )
+
+    recommendation_cache_ttl_seconds: int = Field(900, ge=1, description="Redis TTL for cached recommendation lists.")
+    recommendation_cache_local_ttl_seconds: int = Field(
+        30,
+        ge=1,
+        description="TTL of the in-process recommendation cache tier; bounds staleness if an eviction is missed.",
+    )
+    recommendation_cache_max_entries: int = Field(10_000, ge=1, description="Users kept in the in-process cache tier.")
+
+    singleflight_lock_ttl_ms: int = Field(
+        5_000,
+        ge=100,
+        description="Lifetime of the cross-worker single-flight lock; bounds how long a crashed leader blocks others.",
+    )
+    singleflight_wait_timeout_seconds: float = Field(
+        2.0,
+        gt=0,
+        description="How long followers wait for the single-flight leader before computing themselves.",
+    )
+
+    password_hash_workers: int = Field(
+        4,
+        ge=1,
+        description="Threads dedicated to bcrypt; also the number of concurrent hash/verify operations.",
+    )
+    password_hash_max_queue: int = Field(
+        256,
+        ge=1,
+        description="Password operations allowed to wait for a hashing thread before new ones get 503.",
+    )
+    principal_cache_ttl_seconds: int = Field(300, ge=1, description="Redis TTL for cached auth principals.")
+    principal_cache_local_ttl_seconds: int = Field(
+        30,
+        ge=1,
+        description="TTL of the in-process principal cache tier.",
+    )
+    principal_cache_max_entries: int = Field(50_000, ge=1, description="Principals kept in the in-process tier.")
+    auth_claims_only: bool = Field(
+        False,
+        description="Trust signed role/active claims in access tokens until expiry instead of looking users up.",
+    )
+
+    interaction_stream_key: str = Field("interactions:stream", description="Redis stream buffering interactions.")
+    interaction_stream_group: str = Field(
+        "interaction-writers",
+        description="Consumer group that flushes the interaction stream into Postgres.",
+    )
+    interaction_stream_maxlen: int = Field(
+        5_000_000,
+        ge=1_000,
+        description="Approximate cap on buffered stream entries; oldest entries are trimmed beyond it.",
+    )
+    interaction_stream_dead_letter_key: str = Field(
+        "interactions:dead",
+        description="Stream receiving entries whose payload can never be written.",
+    )
+    interaction_flush_batch_size: int = Field(5_000, ge=1, description="Buffered events written per flush.")
+    interaction_flush_interval_ms: int = Field(
+        500,
+        ge=10,
+        description="Maximum time an event waits in the worker buffer before a partial batch is flushed.",
+    )
+    interaction_claim_idle_ms: int = Field(
+        60_000,
+        ge=1_000,
+        description="Pending entries idle this long are re-claimed from crashed or failing consumers.",
+    )
+    interaction_stream_worker_enabled: bool = Field(
+        True,
+        description="Run a stream flush worker inside each API process in addition to standalone workers.",
+    )
+    interaction_stream_drain_timeout_seconds: float = Field(
+        10.0,
+        ge=0,
+        description="How long shutdown keeps flushing already-buffered events before leaving them to other workers.",
+    )
+
+    affinity_half_life_days: float | None = Field(
+        30.0,
+        gt=0,
+        description="Half-life of time-decayed user-item affinity; None disables decay. Rebuild affinity after changing.",
+    )
+
+    partition_premake_months: int = Field(
+        3,
+        ge=1,
+        description="Monthly partitions created ahead of the current month for time-partitioned tables.",
+    )
+    interactions_retention_months: int = Field(
+        24,
+        ge=1,
+        description=(
+            "Months of interactions kept before whole partitions are detached and dropped; "
+            "dropped events are subtracted from the affinity rollup."
+        ),
+    )
+    event_logs_retention_months: int = Field(
+        6,
+        ge=1,
+        description="Months of event logs kept before whole partitions are detached and dropped.",
+    )
+
+    ann_index_dir: Path = Field(
+        Path("artifacts/ann"),
+        description="Directory holding persisted approximate nearest-neighbour indexes per model version.",
+    )
+    ann_nprobe: int = Field(16, ge=1, description="Inverted lists probed per ANN query.")
+    embedding_snapshot_dir: Path = Field(
+        Path("artifacts/embeddings"),
+        description="Directory of memory-mapped embedding snapshots, one sub-directory per model version.",
+    )
+    training_snapshot_dir: Path = Field(
+        Path("artifacts/snapshots/training"),
+        description="Directory of the columnar training snapshot exported by ml.snapshot.",
+    )
+    content_model_path: Path = Field(
+        Path("artifacts/content/tfidf.npz"),
+        description="TF-IDF vocabulary and item vectors that ml.content updates incrementally.",
+    )
+
     @field_validator("backend_cors_origins", mode="before")
     @classmethod
     def assemble_cors_origins(cls, value: Any, info: ValidationInfo) -> list[str]:
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+"""Prometheus metric definitions shared across the application."""
+
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, make_asgi_app, multiprocess
+from starlette.types import ASGIApp
+
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Single-flight invocations by scope (local/redis) and role (leader/coalesced/fallback).",
+    ["name", "scope", "role"],
+)
+
+PASSWORD_HASH_QUEUE_TIME = Histogram(
+    "password_hash_queue_seconds",
+    "Time password operations wait for a slot on the hashing pool.",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying a password on the hashing pool.",
+    ["operation"],
+    buckets=(0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Password operations rejected because the hashing queue was full.",
+    ["operation"],
+)
+
+INTERACTION_STREAM_LAG = Gauge(
+    "interaction_stream_lag_entries",
+    "Buffered interaction events not yet delivered to the flush consumer group.",
+    multiprocess_mode="livemax",
+)
+INTERACTION_STREAM_PENDING = Gauge(
+    "interaction_stream_pending_entries",
+    "Interaction events delivered to a flush worker but not yet acknowledged.",
+    multiprocess_mode="livemax",
+)
+INTERACTION_STREAM_EVENTS = Counter(
+    "interaction_stream_events_total",
+    "Stream entries handled by flush workers by outcome; skipped covers duplicates and dangling references, "
+    "trimmed covers pending entries the stream dropped before they were flushed.",
+    ["outcome"],
+)
+INTERACTION_STREAM_FLUSH_DURATION = Histogram(
+    "interaction_stream_flush_seconds",
+    "Time to write and commit one buffered batch of interactions.",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+INTERACTION_STREAM_DELAY = Histogram(
+    "interaction_stream_delay_seconds",
+    "Age of the oldest event in a batch when it is committed (XADD to durable write).",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+FOLD_IN_DURATION = Histogram(
+    "fold_in_seconds",
+    "Time to fold in one batch of users against fixed item factors, by trigger (request/stream).",
+    ["trigger"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+FOLD_IN_USERS = Counter(
+    "fold_in_users_total",
+    "User embeddings produced or refreshed by fold-in, by trigger (request/stream).",
+    ["trigger"],
+)
+COVISIT_UPDATE_DURATION = Histogram(
+    "covisit_update_seconds",
+    "Time to fold interactions into co-visitation pairs and lists, by trigger (stream/rebuild).",
+    ["trigger"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0, 60.0, 600.0),
+)
+
+
+def metrics_app() -> ASGIApp:
+    """ASGI app exposing metrics, aggregating worker processes when multiprocess mode is on."""
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return make_asgi_app(registry=registry)
+    return make_asgi_app()
@@ -1,15 +1,57 @@
 from __future__ import annotations
 
+import asyncio
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
-from typing import Any, Dict
+from typing import Any, Callable, Dict, TypeVar
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_TIME, PASSWORD_HASH_REJECTED
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+
+@dataclass
+class _PasswordSlots:
+    """Admission state of one event loop: a semaphore sized to the pool and the callers queued on it."""
+
+    semaphore: asyncio.Semaphore
+    waiting: int = 0
+
+
+# bcrypt releases the GIL, so a small dedicated pool keeps hashing off the event loop
+# without letting login bursts starve the default executor used elsewhere. Both the pool and
+# the per-loop slots are created on first use, so a new lifespan (tests, reloads) after
+# ``shutdown_password_executor`` or on another event loop starts from fresh ones.
+_password_executor: ThreadPoolExecutor | None = None
+_password_slots: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _PasswordSlots] = weakref.WeakKeyDictionary()
+
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=settings.password_hash_workers,
+            thread_name_prefix="password-hash",
+        )
+    return _password_executor
+
+
+def _get_password_slots() -> _PasswordSlots:
+    loop = asyncio.get_running_loop()
+    slots = _password_slots.get(loop)
+    if slots is None:
+        slots = _password_slots[loop] = _PasswordSlots(asyncio.Semaphore(settings.password_hash_workers))
+    return slots
+
 
 def create_access_token(subject: str, expires_minutes: int | None = None, extra_claims: Dict[str, Any] | None = None) -> str:
     expire_delta = timedelta(minutes=expires_minutes or settings.access_token_expires_minutes)
@@ -38,6 +80,48 @@ def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_password_op(operation: str, fn: Callable[..., T], *args: Any) -> T:
+    slots = _get_password_slots()
+    if slots.waiting >= settings.password_hash_max_queue:
+        PASSWORD_HASH_REJECTED.labels(operation).inc()
+        raise PasswordHasherBusyError("Too many pending password operations")
+    enqueued = time.perf_counter()
+    slots.waiting += 1
+    try:
+        await slots.semaphore.acquire()
+    finally:
+        slots.waiting -= 1
+    try:
+        started = time.perf_counter()
+        PASSWORD_HASH_QUEUE_TIME.labels(operation).observe(started - enqueued)
+        result = await asyncio.get_running_loop().run_in_executor(_get_password_executor(), fn, *args)
+        PASSWORD_HASH_DURATION.labels(operation).observe(time.perf_counter() - started)
+        return result
+    finally:
+        slots.semaphore.release()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bounded hashing pool instead of the event loop."""
+
+    return await _run_password_op("verify", verify_password, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the bounded hashing pool instead of the event loop."""
+
+    return await _run_password_op("hash", hash_password, password)
+
+
+def shutdown_password_executor() -> None:
+    """Stop the hashing pool; the next password operation starts a new one."""
+
+    global _password_executor
+    executor, _password_executor = _password_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def decode_token(token: str) -> Dict[str, Any]:
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
@@ -48,3 +132,7 @@ def decode_token(token: str) -> Dict[str, Any]:
 
 class InvalidTokenError(Exception):
     ...
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when the password hashing queue is full; surfaced to clients as 503."""
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+"""Request coalescing so concurrent misses for the same key share one computation."""
+
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+import structlog
+from redis.exceptions import RedisError
+
+from app.core.cache import get_redis_client
+from app.core.config import settings
+from app.core.metrics import SINGLEFLIGHT_CALLS
+
+logger = structlog.get_logger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+# Delete the lock only if we still own it, so a slow leader never frees a successor's lock.
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class _Flight(Generic[T]):
+    """One shared computation and the number of callers currently awaiting it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task[T]):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[K, T]):
+    """In-process single-flight: one in-flight computation per key, shared by all waiters.
+
+    The computation runs in its own task that every caller, the first one included, awaits
+    through a shield. Cancelling any caller (a client disconnecting, say) leaves the others
+    waiting on the same result; only when the last one goes away is the task cancelled.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[K, _Flight[T]] = {}
+
+    def _start(self, key: K, fn: Callable[[], Awaitable[T]]) -> _Flight[T]:
+        async def run() -> T:
+            return await fn()
+
+        flight: _Flight[T] = _Flight(asyncio.get_running_loop().create_task(run()))
+        self._inflight[key] = flight
+        flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        return flight
+
+    def _forget(self, key: K, flight: _Flight[T]) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._inflight.get(key)
+        if flight is None:
+            SINGLEFLIGHT_CALLS.labels(self.name, "local", "leader").inc()
+            flight = self._start(key, fn)
+        else:
+            SINGLEFLIGHT_CALLS.labels(self.name, "local", "coalesced").inc()
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Nobody is left to use the result; forget it first so a new caller starts afresh.
+                self._forget(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class RedisSingleFlight(Generic[T]):
+    """Cross-worker single-flight built on a Redis ``SET NX PX`` lock.
+
+    The leader computes and publishes the result through a shared store (typically the
+    Redis cache); followers poll ``read_shared`` until the result appears or the lock is
+    released. If Redis is unavailable, callers fall back to computing locally.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        lock_ttl_ms: int | None = None,
+        wait_timeout: float | None = None,
+        poll_interval: float = 0.025,
+    ):
+        self.name = name
+        self.lock_ttl_ms = lock_ttl_ms or settings.singleflight_lock_ttl_ms
+        self.wait_timeout = wait_timeout or settings.singleflight_wait_timeout_seconds
+        self.poll_interval = poll_interval
+
+    def lock_key(self, key: str) -> str:
+        return f"singleflight:{self.name}:{key}"
+
+    async def do(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[T]],
+        read_shared: Callable[[], Awaitable[T | None]],
+    ) -> T:
+        token = uuid.uuid4().hex
+        lock_key = self.lock_key(key)
+        try:
+            redis = await get_redis_client()
+            acquired = await redis.set(lock_key, token, nx=True, px=self.lock_ttl_ms)
+        except RedisError as exc:
+            logger.warning("singleflight.redis_unavailable", name=self.name, error=str(exc))
+            SINGLEFLIGHT_CALLS.labels(self.name, "redis", "fallback").inc()
+            return await compute()
+
+        if acquired:
+            SINGLEFLIGHT_CALLS.labels(self.name, "redis", "leader").inc()
+            try:
+                return await compute()
+            finally:
+                try:
+                    await redis.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+                except RedisError as exc:
+                    logger.warning("singleflight.release_failed", name=self.name, error=str(exc))
+
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            shared = await read_shared()
+            if shared is not None:
+                SINGLEFLIGHT_CALLS.labels(self.name, "redis", "coalesced").inc()
+                return shared
+            try:
+                if not await redis.exists(lock_key):
+                    break
+            except RedisError:
+                break
+        SINGLEFLIGHT_CALLS.labels(self.name, "redis", "fallback").inc()
+        return await compute()
@@ -6,19 +6,22 @@ from typing import AsyncIterator, Callable
 from uuid import uuid4
 
 import structlog
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.gzip import GZipMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
-from starlette.responses import Response
+from starlette.responses import JSONResponse, Response
 from starlette.staticfiles import StaticFiles
 
 from app.api import api_router
 from app.core import bind_request_id, configure_logging, settings
-from app.core.cache import close_redis_client
+from app.core.cache import close_redis_client, start_invalidation_listener, stop_invalidation_listener
 from app.core.database import dispose_engine
 from app.core.logging import clear_request_id
+from app.core.metrics import metrics_app
+from app.core.security import PasswordHasherBusyError, shutdown_password_executor
+from app.workers.interaction_stream import InteractionStreamWorker
 
 logger = structlog.get_logger(__name__)
 
@@ -48,9 +51,18 @@ async def lifespan(_: FastAPI) -> AsyncIterator[None]:
         "application.startup",
         environment=settings.environment,
     )
+    start_invalidation_listener()
+    stream_worker = InteractionStreamWorker() if settings.interaction_stream_worker_enabled else None
+    if stream_worker is not None:
+        stream_worker.start()
     try:
         yield
     finally:
+        if stream_worker is not None:
+            # Flush buffered interactions before the Redis client and engine go away.
+            await stream_worker.stop()
+        await stop_invalidation_listener()
+        shutdown_password_executor()
         await close_redis_client()
         await dispose_engine()
         logger.info("application.shutdown")
@@ -82,7 +94,16 @@ def get_application() -> FastAPI:
 
     app.include_router(api_router, prefix=settings.api_v1_prefix)
 
+    @app.exception_handler(PasswordHasherBusyError)
+    async def password_hasher_busy(_: Request, __: PasswordHasherBusyError) -> JSONResponse:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Authentication is temporarily overloaded, retry shortly"},
+            headers={"Retry-After": "1"},
+        )
+
     app.mount("/static", StaticFiles(directory="app/static"), name="static")
+    app.mount("/metrics", metrics_app(), name="metrics")
 
     @app.get("/", summary="Service root")
     async def root() -> dict[str, str]:
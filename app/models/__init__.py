@@ -6,12 +6,19 @@ from .abtest import ABTest, ABTestAssignment, ABTestStatus, ABTestVariant
 from .base import Base
 from .event import EventLog, FeatureFlag
 from .feature_store import (
+    ItemCovisitPair,
     ItemEmbedding,
+    ItemNeighbor,
+    ModelVersion,
+    ModelVersionStatus,
+    NeighborKind,
     RecommendationScore,
     UserEmbedding,
+    UserItemAffinity,
 )
 from .interaction import Interaction, InteractionType
 from .item import Item
+from .loading import LoaderProfile, loader_options
 from .user import User, UserRole
 
 __all__ = [
@@ -25,9 +32,17 @@ __all__ = [
     "Interaction",
     "InteractionType",
     "Item",
+    "ItemCovisitPair",
     "ItemEmbedding",
+    "ItemNeighbor",
+    "LoaderProfile",
+    "ModelVersion",
+    "ModelVersionStatus",
+    "NeighborKind",
     "RecommendationScore",
     "User",
     "UserEmbedding",
+    "UserItemAffinity",
     "UserRole",
+    "loader_options",
 ]
@@ -53,7 +53,8 @@ class ABTest(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
     assignments: Mapped[List["ABTestAssignment"]] = relationship(
         back_populates="ab_test",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,
     )
     creator: Mapped["User"] = relationship(lazy="joined")
 
@@ -76,7 +77,7 @@ class ABTestAssignment(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
     metadata_json: Mapped[Dict[str, str]] = mapped_column(JSONB, nullable=False, default=dict)
 
     ab_test: Mapped["ABTest"] = relationship(back_populates="assignments", lazy="joined")
-    user: Mapped["User"] = relationship(back_populates="assignments", lazy="joined")
+    user: Mapped["User"] = relationship(back_populates="assignments", lazy="raise")
 
     __repr_attrs__ = ("id", "ab_test_id", "user_id", "variant")
 
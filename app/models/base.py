@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import enum
 import uuid
 from datetime import datetime
 from typing import Any, Dict
 
-from sqlalchemy import DateTime, MetaData, func
+from sqlalchemy import DateTime, Enum, MetaData, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from app.core.ids import uuid7
+
 
 NAMING_CONVENTION: Dict[str, str] = {
     "ix": "ix_%(column_0_label)s",
@@ -22,6 +25,11 @@ class Base(DeclarativeBase):
     """Declarative base with a consistent naming convention."""
 
     metadata = MetaData(naming_convention=NAMING_CONVENTION)
+    # Persist enum *values* ("add_to_cart"), matching the labels created by the migrations and
+    # written by raw COPY/SQL paths, instead of SQLAlchemy's default of member names.
+    type_annotation_map = {
+        enum.Enum: Enum(enum.Enum, values_callable=lambda members: [member.value for member in members]),
+    }
 
 
 class UUIDPrimaryKeyMixin:
@@ -36,6 +44,23 @@ class UUIDPrimaryKeyMixin:
     )
 
 
+class UUIDv7PrimaryKeyMixin:
+    """Time-ordered UUID primary key for append-heavy tables.
+
+    New keys sort after existing ones, so inserts append to the right edge of the primary-key
+    index instead of splitting random pages. Rows written by raw SQL get the same ordering
+    from the ``uuid_generate_v7()`` server default.
+    """
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid7,
+        server_default=text("uuid_generate_v7()"),
+        nullable=False,
+    )
+
+
 class TimestampMixin:
     """Automatic created/updated timestamp columns."""
 
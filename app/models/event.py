@@ -4,20 +4,25 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, Dict, Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Index, String, UniqueConstraint
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, PrimaryKeyConstraint, String, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.models.base import Base, ReprMixin, TimestampMixin, UUIDPrimaryKeyMixin
+from app.models.base import Base, ReprMixin, TimestampMixin, UUIDPrimaryKeyMixin, UUIDv7PrimaryKeyMixin
 
 
-class EventLog(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
-    """Application-wide structured event log for analytics and auditing."""
+class EventLog(UUIDv7PrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
+    """Application-wide structured event log for analytics and auditing.
+
+    Range-partitioned by month on ``occurred_at``.
+    """
 
     __tablename__ = "event_logs"
     __table_args__ = (
-        Index("ix_event_logs_type_created", "event_type", "created_at"),
-        Index("ix_event_logs_user_created", "user_id", "created_at"),
+        PrimaryKeyConstraint("id", "occurred_at"),
+        Index("ix_event_logs_type_occurred", "event_type", "occurred_at"),
+        Index("ix_event_logs_user_occurred", "user_id", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
     )
 
     event_type: Mapped[str] = mapped_column(String(128), nullable=False)
@@ -25,9 +30,9 @@ class EventLog(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
     ab_test_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey("ab_tests.id", ondelete="SET NULL"), nullable=True)
     payload: Mapped[Dict[str, str]] = mapped_column(JSONB, nullable=False, default=dict)
     metadata_json: Mapped[Dict[str, str]] = mapped_column(JSONB, nullable=False, default=dict)
-    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, nullable=False)
 
-    user: Mapped[Optional["User"]] = relationship(back_populates="event_logs", lazy="joined")
+    user: Mapped[Optional["User"]] = relationship(back_populates="event_logs", lazy="raise")
     ab_test: Mapped[Optional["ABTest"]] = relationship(lazy="joined")
 
     __repr_attrs__ = ("id", "event_type", "occurred_at")
@@ -2,13 +2,25 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
+from enum import Enum
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import DateTime, Float, ForeignKey, Index, String
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.models.base import Base, ReprMixin, TimestampMixin, UUIDPrimaryKeyMixin
+from app.models.base import Base, ReprMixin, TimestampMixin, UUIDPrimaryKeyMixin, UUIDv7PrimaryKeyMixin
 
 
 class UserEmbedding(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
@@ -26,7 +38,7 @@ class UserEmbedding(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
     metadata_json: Mapped[dict[str, str]] = mapped_column(JSONB, nullable=False, default=dict)
     computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
-    user: Mapped["User"] = relationship(lazy="joined")
+    user: Mapped["User"] = relationship(lazy="raise")
 
     __repr_attrs__ = ("id", "user_id", "model_version")
 
@@ -46,16 +58,21 @@ class ItemEmbedding(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
     metadata_json: Mapped[dict[str, str]] = mapped_column(JSONB, nullable=False, default=dict)
     computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
-    item: Mapped["Item"] = relationship(lazy="joined")
+    item: Mapped["Item"] = relationship(back_populates="item_embeddings", lazy="raise")
 
     __repr_attrs__ = ("id", "item_id", "model_version")
 
 
-class RecommendationScore(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
-    """Materialized recommendation scores per user-item pair."""
+class RecommendationScore(UUIDv7PrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
+    """Materialized recommendation scores per user-item pair.
+
+    List-partitioned by ``model_version`` (see :mod:`app.services.model_versions`): a batch run
+    is loaded into its own table and attached whole, and old versions are dropped the same way.
+    """
 
     __tablename__ = "feature_store_recommendation_scores"
     __table_args__ = (
+        PrimaryKeyConstraint("id", "model_version"),
         Index(
             "ix_feature_store_recommendation_scores_user_item_version",
             "user_id",
@@ -63,22 +80,132 @@ class RecommendationScore(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
             "model_version",
             unique=True,
         ),
+        {"postgresql_partition_by": "LIST (model_version)"},
     )
 
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     item_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
-    model_version: Mapped[str] = mapped_column(String(64), nullable=False)
+    model_version: Mapped[str] = mapped_column(String(64), primary_key=True, nullable=False)
     score: Mapped[float] = mapped_column(Float, nullable=False)
     rank: Mapped[int] = mapped_column(nullable=False)
     explanation: Mapped[dict[str, float]] = mapped_column(JSONB, nullable=False, default=dict)
     computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
-    user: Mapped["User"] = relationship(lazy="joined")
-    item: Mapped["Item"] = relationship(lazy="joined")
+    user: Mapped["User"] = relationship(lazy="raise")
+    item: Mapped["Item"] = relationship(back_populates="recommendation_scores", lazy="raise")
 
     __repr_attrs__ = ("id", "user_id", "item_id", "model_version")
 
 
+class ModelVersionStatus(str, Enum):
+    """Lifecycle of a model version's score partition."""
+
+    BUILDING = "building"
+    PUBLISHED = "published"
+    LIVE = "live"
+    RETIRED = "retired"
+
+
+class ModelVersion(TimestampMixin, ReprMixin, Base):
+    """Registry of model versions; the single ``live`` row is what readers serve by default.
+
+    ``building`` versions are still being loaded into a detached staging table named
+    ``partition_name``; every other status has that table attached as a score partition.
+    """
+
+    __tablename__ = "feature_store_model_versions"
+    __table_args__ = (
+        Index(
+            "ix_feature_store_model_versions_live",
+            "status",
+            unique=True,
+            postgresql_where=text("status = 'live'"),
+        ),
+    )
+
+    model_version: Mapped[str] = mapped_column(String(64), primary_key=True)
+    status: Mapped[ModelVersionStatus] = mapped_column(default=ModelVersionStatus.BUILDING, nullable=False)
+    partition_name: Mapped[str] = mapped_column(String(63), nullable=False)
+    score_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    published_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    retired_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __repr_attrs__ = ("model_version", "status")
+
+
+class NeighborKind(str, Enum):
+    """Source of a precomputed item-to-item neighbour list."""
+
+    CONTENT = "content"
+    COVISIT = "covisit"
+
+
+class ItemNeighbor(TimestampMixin, ReprMixin, Base):
+    """Top-N neighbours of one item for one ``kind``, best first, stored as parallel arrays.
+
+    Lists are precomputed (see :mod:`ml.content` and :mod:`app.services.covisitation`) so
+    serving a seed item is a single primary-key lookup.
+    """
+
+    __tablename__ = "item_neighbors"
+    __table_args__ = (
+        PrimaryKeyConstraint("item_id", "kind"),
+        Index("ix_item_neighbors_neighbor_ids", "neighbor_ids", postgresql_using="gin"),
+    )
+
+    item_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
+    kind: Mapped[NeighborKind] = mapped_column(nullable=False)
+    neighbor_ids: Mapped[list[uuid.UUID]] = mapped_column(ARRAY(UUID(as_uuid=True)), nullable=False)
+    scores: Mapped[list[float]] = mapped_column(ARRAY(Float), nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __repr_attrs__ = ("item_id", "kind")
+
+
+class ItemCovisitPair(ReprMixin, Base):
+    """Co-visitation score of an ordered item pair, the working set behind ``covisit`` neighbour lists.
+
+    Incremented as interactions stream in and rebuilt from the lookback window every night.
+    """
+
+    __tablename__ = "item_covisit_pairs"
+
+    item_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("items.id", ondelete="CASCADE"), primary_key=True, nullable=False
+    )
+    neighbor_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("items.id", ondelete="CASCADE"), primary_key=True, nullable=False
+    )
+    score: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __repr_attrs__ = ("item_id", "neighbor_id", "score")
+
+
 if TYPE_CHECKING:  # pragma: no cover - typing imports only
     from app.models.item import Item
     from app.models.user import User
+
+
+class UserItemAffinity(TimestampMixin, ReprMixin, Base):
+    """Running interaction weight per user-item pair, maintained at ingest time.
+
+    ``decayed_weight`` is the exponentially decayed weight as of ``last_event_at``; readers
+    decay it further to the current time.
+    """
+
+    __tablename__ = "user_item_affinity"
+    __table_args__ = (Index("ix_user_item_affinity_item_id", "item_id"),)
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, nullable=False
+    )
+    item_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("items.id", ondelete="CASCADE"), primary_key=True, nullable=False
+    )
+    total_weight: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    decayed_weight: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    event_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_event_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __repr_attrs__ = ("user_id", "item_id", "total_weight")
@@ -5,11 +5,21 @@ from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING, Dict, Optional
 
-from sqlalchemy import CheckConstraint, DateTime, Float, ForeignKey, Index, String
+from sqlalchemy import (
+    CheckConstraint,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    PrimaryKeyConstraint,
+    String,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.models.base import Base, ReprMixin, TimestampMixin, UUIDPrimaryKeyMixin
+from app.models.base import Base, ReprMixin, TimestampMixin, UUIDv7PrimaryKeyMixin
 
 
 class InteractionType(str, Enum):
@@ -22,26 +32,35 @@ class InteractionType(str, Enum):
     RATING = "rating"
 
 
-class Interaction(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
-    """Event log capturing user-item interactions."""
+class Interaction(UUIDv7PrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
+    """Event log capturing user-item interactions.
+
+    Range-partitioned by month on ``event_at`` (see :mod:`app.services.partitions`), so the
+    partition key is part of the primary key and of every unique constraint.
+    """
 
     __tablename__ = "interactions"
     __table_args__ = (
+        PrimaryKeyConstraint("id", "event_at"),
         CheckConstraint("weight >= 0", name="ck_interactions_weight_non_negative"),
         Index("ix_interactions_user_item_event", "user_id", "item_id", "event_type"),
+        Index("ix_interactions_session_id", text("(metadata_json ->> 'session_id')")),
+        UniqueConstraint("idempotency_key", "event_at"),
+        {"postgresql_partition_by": "RANGE (event_at)"},
     )
 
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     item_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
     event_type: Mapped[InteractionType] = mapped_column(nullable=False)
-    event_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    event_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, nullable=False)
     weight: Mapped[float] = mapped_column(Float, nullable=False, default=1.0)
     rating: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     source: Mapped[str] = mapped_column(String(64), nullable=False, default="web")
     metadata_json: Mapped[Dict[str, Optional[str]]] = mapped_column(JSONB, nullable=False, default=dict)
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
 
-    user: Mapped["User"] = relationship(back_populates="interactions", lazy="joined")
-    item: Mapped["Item"] = relationship(back_populates="interactions", lazy="joined")
+    user: Mapped["User"] = relationship(back_populates="interactions", lazy="raise")
+    item: Mapped["Item"] = relationship(back_populates="interactions", lazy="raise")
 
     __repr_attrs__ = ("id", "user_id", "item_id", "event_type")
 
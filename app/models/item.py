@@ -33,21 +33,26 @@ class Item(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
     metadata_json: Mapped[Dict[str, Optional[str]]] = mapped_column(JSONB, nullable=False, default=dict)
     release_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     rating_average: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # SHA-256 of the catalog feed row last applied; lets nightly syncs skip unchanged SKUs.
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     interactions: Mapped[List["Interaction"]] = relationship(
         back_populates="item",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,
     )
     item_embeddings: Mapped[List["ItemEmbedding"]] = relationship(
         back_populates="item",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,
     )
     recommendation_scores: Mapped[List["RecommendationScore"]] = relationship(
         back_populates="item",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,
     )
 
     __repr_attrs__ = ("id", "sku", "title")
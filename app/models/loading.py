@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+"""Named eager-loading profiles.
+
+Every relationship is ``lazy="raise"`` by default, so a query loads exactly the columns
+of its own entity unless the caller opts into one of these profiles. Accidental lazy
+loads fail loudly instead of issuing hidden per-row queries. A profile is registered here
+when a service first needs a relationship, rather than ahead of any use.
+"""
+
+from enum import Enum
+
+from sqlalchemy.sql.base import ExecutableOption
+
+
+class LoaderProfile(str, Enum):
+    """Eager-loading strategies services can opt into per query."""
+
+    DEFAULT = "default"
+
+
+_PROFILES: dict[LoaderProfile, tuple[ExecutableOption, ...]] = {
+    LoaderProfile.DEFAULT: (),
+}
+
+
+def loader_options(profile: LoaderProfile | str = LoaderProfile.DEFAULT) -> tuple[ExecutableOption, ...]:
+    """Return the loader options registered for ``profile``."""
+
+    return _PROFILES[LoaderProfile(profile)]
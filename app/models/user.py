@@ -37,17 +37,21 @@ class User(UUIDPrimaryKeyMixin, TimestampMixin, ReprMixin, Base):
     interactions: Mapped[List["Interaction"]] = relationship(
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,
     )
     assignments: Mapped[List["ABTestAssignment"]] = relationship(
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,
     )
+    # ``event_logs.user_id`` is ON DELETE SET NULL, so the ORM cascade is what deletes a
+    # user's logs; it loads them at flush even under lazy="raise".
     event_logs: Mapped[List["EventLog"]] = relationship(
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="raise",
     )
 
     __repr_attrs__ = ("id", "email", "role")
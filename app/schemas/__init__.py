@@ -9,8 +9,15 @@ from .feature_store import (
     RecommendationScoreRead,
     UserEmbeddingRead,
 )
-from .interaction import InteractionCreate, InteractionRead, InteractionType
+from .interaction import (
+    InteractionBatchCreate,
+    InteractionBatchResult,
+    InteractionCreate,
+    InteractionRead,
+    InteractionType,
+)
 from .item import ItemCreate, ItemRead, ItemSearchFilters, ItemUpdate
+from .recommendation import BatchRecommendationRequest, RecommendedItem, UserRecommendations
 from .user import UserCreate, UserRead, UserRole, UserUpdate, UsersPage
 
 __all__ = [
@@ -18,11 +25,14 @@ __all__ = [
     "ABTestCreate",
     "ABTestRead",
     "ABTestUpdate",
+    "BatchRecommendationRequest",
     "EventLogCreate",
     "EventLogRead",
     "FeatureFlagCreate",
     "FeatureFlagRead",
     "FeatureFlagUpdate",
+    "InteractionBatchCreate",
+    "InteractionBatchResult",
     "InteractionCreate",
     "InteractionRead",
     "InteractionType",
@@ -32,9 +42,11 @@ __all__ = [
     "ItemUpdate",
     "ItemEmbeddingRead",
     "RecommendationScoreRead",
+    "RecommendedItem",
     "UserEmbeddingRead",
     "UserCreate",
     "UserRead",
+    "UserRecommendations",
     "UserRole",
     "UserUpdate",
     "UsersPage",
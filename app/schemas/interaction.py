@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from pydantic import Field
 
@@ -19,7 +19,17 @@ class InteractionCreate(APIModel):
     rating: Optional[float] = Field(default=None, ge=0.0, le=5.0)
     source: str = Field(default="web", max_length=64)
     metadata_json: Dict[str, Optional[str]] = Field(default_factory=dict)
+    idempotency_key: Optional[str] = Field(default=None, max_length=128)
 
 
 class InteractionRead(TimestampedModel, InteractionCreate):
     id: uuid.UUID
+
+
+class InteractionBatchCreate(APIModel):
+    events: List[InteractionCreate] = Field(min_length=1, max_length=50_000)
+
+
+class InteractionBatchResult(APIModel):
+    accepted: int
+    inserted: Optional[int] = None
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import uuid
+from typing import Dict, List, Optional
+
+from pydantic import Field
+
+from app.schemas.common import APIModel
+from app.schemas.item import ItemRead
+
+
+class RecommendedItem(APIModel):
+    item: ItemRead
+    score: float
+    rank: Optional[int] = None
+    explanation: Dict[str, float] = Field(default_factory=dict)
+
+
+class UserRecommendations(APIModel):
+    user_id: uuid.UUID
+    model_version: Optional[str] = None
+    items: List[RecommendedItem] = Field(default_factory=list)
+
+
+class BatchRecommendationRequest(APIModel):
+    user_ids: List[uuid.UUID] = Field(min_length=1, max_length=100_000)
+    model_version: Optional[str] = Field(default=None, max_length=64)
+    limit: int = Field(default=20, ge=1, le=200)
+    chunk_size: int = Field(default=1_000, ge=1, le=10_000)
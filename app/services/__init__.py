@@ -2,14 +2,26 @@ from __future__ import annotations
 
 """Domain service layer modules."""
 
+from .ann_index import ANNRetrievalService, IVFFlatIndex
+from .covisitation import CovisitationService
 from .feature_store import FeatureStoreService
+from .fold_in import FoldInService
 from .interactions import InteractionIngestionService
+from .item_neighbors import ItemNeighborService, NeighborRetriever
+from .model_versions import ModelVersionService
 from .recommender import RecommenderService
 from .users import UserService
 
 __all__ = [
+    "ANNRetrievalService",
+    "CovisitationService",
     "FeatureStoreService",
+    "FoldInService",
+    "IVFFlatIndex",
     "InteractionIngestionService",
+    "ItemNeighborService",
+    "ModelVersionService",
+    "NeighborRetriever",
     "RecommenderService",
     "UserService",
 ]
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import math
+import uuid
+from datetime import datetime
+from typing import Sequence
+
+import structlog
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, DOUBLE_PRECISION, TIMESTAMP
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import User
+
+logger = structlog.get_logger(__name__)
+
+# Postgres raises on ``exp()`` underflow, so decay exponents are clamped well before it.
+_MIN_EXPONENT = -700.0
+
+
+def decay_rate(half_life_days: float | None = None) -> float:
+    """Per-second exponential decay rate for a half-life; ``0.0`` when decay is disabled."""
+
+    half_life_days = settings.affinity_half_life_days if half_life_days is None else half_life_days
+    if not half_life_days:
+        return 0.0
+    return math.log(2.0) / (half_life_days * 86_400.0)
+
+
+def _decay(seconds: str) -> str:
+    return f"exp(greatest(-CAST(:decay_rate AS double precision) * ({seconds}), {_MIN_EXPONENT}))"
+
+
+def aggregate_events_sql(events: str) -> str:
+    """Collapse ``events`` (``user_id, item_id, weight, event_at``) into one row per pair.
+
+    Each pair's decayed weight is expressed as of its own latest event. Rows come out in key
+    order so concurrent batches lock overlapping rollup rows in the same order.
+    """
+
+    return f"""
+        SELECT user_id,
+               item_id,
+               sum(weight) AS total_weight,
+               sum(weight * {_decay("extract(epoch FROM last_at - event_at)")}) AS decayed_weight,
+               count(*) AS event_count,
+               max(event_at) AS last_event_at
+        FROM (
+            SELECT user_id, item_id, weight, event_at,
+                   max(event_at) OVER (PARTITION BY user_id, item_id) AS last_at
+            FROM {events}
+        ) AS events
+        GROUP BY user_id, item_id
+        ORDER BY user_id, item_id
+    """
+
+
+def merge_affinity_sql(events: str) -> str:
+    """Upsert the aggregate of ``events`` into ``user_item_affinity``.
+
+    Existing and incoming decayed weights are both brought forward to the later of the two
+    ``last_event_at`` values before being added, so out-of-order batches merge correctly.
+    """
+
+    return f"""
+        INSERT INTO user_item_affinity AS affinity
+            (user_id, item_id, total_weight, decayed_weight, event_count, last_event_at)
+        SELECT user_id, item_id, total_weight, decayed_weight, event_count, last_event_at
+        FROM ({aggregate_events_sql(events)}) AS batch
+        ON CONFLICT (user_id, item_id) DO UPDATE SET
+            total_weight = affinity.total_weight + excluded.total_weight,
+            decayed_weight =
+                affinity.decayed_weight
+                    * {_decay("greatest(0, extract(epoch FROM excluded.last_event_at - affinity.last_event_at))")}
+                + excluded.decayed_weight
+                    * {_decay("greatest(0, extract(epoch FROM affinity.last_event_at - excluded.last_event_at))")},
+            event_count = affinity.event_count + excluded.event_count,
+            last_event_at = greatest(affinity.last_event_at, excluded.last_event_at),
+            updated_at = now()
+    """
+
+
+def retire_affinity_sql(events: str, *, preceding: str = "") -> str:
+    """Subtract the aggregate of ``events`` from ``user_item_affinity``; pairs left without events are deleted.
+
+    Meant for events purged by retention, which are older than every event kept for their
+    pair, so ``last_event_at`` stays put and their decayed weight is simply brought forward
+    to it before being taken off. ``preceding`` adds CTEs ahead of the statement's own, such
+    as a ``DELETE ... RETURNING`` that ``events`` reads from.
+    """
+
+    return f"""
+        WITH {preceding + "," if preceding else ""}
+        expired AS ({aggregate_events_sql(events)}),
+        emptied AS (
+            DELETE FROM user_item_affinity AS affinity
+            USING expired
+            WHERE affinity.user_id = expired.user_id
+              AND affinity.item_id = expired.item_id
+              AND affinity.event_count <= expired.event_count
+        )
+        UPDATE user_item_affinity AS affinity SET
+            total_weight = affinity.total_weight - expired.total_weight,
+            decayed_weight = affinity.decayed_weight
+                - expired.decayed_weight
+                    * {_decay("greatest(0, extract(epoch FROM affinity.last_event_at - expired.last_event_at))")},
+            event_count = affinity.event_count - expired.event_count,
+            updated_at = now()
+        FROM expired
+        WHERE affinity.user_id = expired.user_id
+          AND affinity.item_id = expired.item_id
+          AND affinity.event_count > expired.event_count
+    """
+
+
+_UNNEST_EVENTS = """
+    unnest(
+        CAST(:user_ids AS uuid[]),
+        CAST(:item_ids AS uuid[]),
+        CAST(:weights AS double precision[]),
+        CAST(:event_ats AS timestamptz[])
+    ) AS batch_events(user_id, item_id, weight, event_at)
+"""
+
+
+class AffinityService:
+    """Maintains and reads the ``user_item_affinity`` rollup of ``interactions``."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def apply_events(
+        self,
+        user_ids: Sequence[uuid.UUID],
+        item_ids: Sequence[uuid.UUID],
+        weights: Sequence[float],
+        event_ats: Sequence[datetime],
+    ) -> None:
+        """Fold a batch of just-written interactions into the rollup (same transaction)."""
+
+        if not user_ids:
+            return
+        stmt = text(merge_affinity_sql(_UNNEST_EVENTS)).bindparams(
+            bindparam("user_ids", list(user_ids), type_=ARRAY(PG_UUID(as_uuid=True))),
+            bindparam("item_ids", list(item_ids), type_=ARRAY(PG_UUID(as_uuid=True))),
+            bindparam("weights", list(weights), type_=ARRAY(DOUBLE_PRECISION)),
+            bindparam("event_ats", list(event_ats), type_=ARRAY(TIMESTAMP(timezone=True))),
+            decay_rate=decay_rate(),
+        )
+        await self.session.execute(stmt)
+
+    @staticmethod
+    def _weight_sql(decayed: bool) -> str:
+        if decayed:
+            return f"decayed_weight * {_decay('greatest(0, extract(epoch FROM now() - last_event_at))')}"
+        return "total_weight"
+
+    async def fetch(self, user_id: uuid.UUID, *, decayed: bool = False) -> dict[uuid.UUID, float]:
+        """Return ``item_id -> weight`` for one user, reading one row per distinct item."""
+
+        stmt = text(
+            f"SELECT item_id, {self._weight_sql(decayed)} FROM user_item_affinity WHERE user_id = :user_id"
+        ).bindparams(
+            bindparam("user_id", user_id, type_=PG_UUID(as_uuid=True)),
+            decay_rate=decay_rate(),
+        )
+        rows = await self.session.execute(stmt)
+        return {item_id: float(value or 0.0) for item_id, value in rows.all()}
+
+    async def fetch_many(
+        self,
+        user_ids: Sequence[uuid.UUID],
+        *,
+        decayed: bool = False,
+    ) -> dict[uuid.UUID, dict[uuid.UUID, float]]:
+        """:meth:`fetch` for many users in one query; users without any affinity are absent."""
+
+        if not user_ids:
+            return {}
+        stmt = text(
+            f"SELECT user_id, item_id, {self._weight_sql(decayed)} FROM user_item_affinity "
+            "WHERE user_id = ANY(:user_ids)"
+        ).bindparams(
+            bindparam("user_ids", list(user_ids), type_=ARRAY(PG_UUID(as_uuid=True))),
+            decay_rate=decay_rate(),
+        )
+        rows = await self.session.execute(stmt)
+        weights: dict[uuid.UUID, dict[uuid.UUID, float]] = {}
+        for user_id, item_id, value in rows.all():
+            weights.setdefault(user_id, {})[item_id] = float(value or 0.0)
+        return weights
+
+    async def rebuild(self, *, chunk_size: int = 5_000) -> int:
+        """Recompute the rollup from ``interactions`` in user-id chunks, committing per chunk.
+
+        Each chunk holds a ``SHARE ROW EXCLUSIVE`` lock on the rollup, which waits for in-flight
+        ingest transactions to commit and blocks new ones until the chunk is rewritten; that
+        keeps concurrent upserts from being lost or double counted. Returns rows written.
+        """
+
+        written = 0
+        last_user_id: uuid.UUID | None = None
+        while True:
+            stmt = select(User.id).order_by(User.id).limit(chunk_size)
+            if last_user_id is not None:
+                stmt = stmt.where(User.id > last_user_id)
+            chunk = list((await self.session.scalars(stmt)).all())
+            if not chunk:
+                break
+            last_user_id = chunk[-1]
+            users = bindparam("user_ids", chunk, type_=ARRAY(PG_UUID(as_uuid=True)))
+            await self.session.execute(text("LOCK TABLE user_item_affinity IN SHARE ROW EXCLUSIVE MODE"))
+            await self.session.execute(
+                text("DELETE FROM user_item_affinity WHERE user_id = ANY(:user_ids)").bindparams(users)
+            )
+            events = """
+                (SELECT user_id, item_id, weight, event_at FROM interactions WHERE user_id = ANY(:user_ids))
+                AS source_events
+            """
+            result = await self.session.execute(
+                text(merge_affinity_sql(events)).bindparams(users, decay_rate=decay_rate())
+            )
+            await self.session.commit()
+            written += int(result.rowcount or 0)
+            logger.info("affinity.rebuild.chunk", users=len(chunk), rows=written)
+        return written
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.services.embedding_snapshot import array_to_uuids, uuids_to_array
+from app.services.feature_store import FeatureStoreService, RecommendationCandidate
+
+logger = structlog.get_logger(__name__)
+
+
+def _kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    *,
+    iterations: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Lloyd's k-means with matmul-based L2 assignment."""
+
+    centroids = vectors[rng.choice(len(vectors), size=n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _assign(vectors, centroids)
+        counts = np.bincount(assignments, minlength=n_clusters).astype(np.float32)
+        sums = _cluster_sums(vectors, assignments, n_clusters)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty clusters from random points so every list stays usable.
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+            counts[empty] = 1.0
+        centroids = sums / counts[:, None]
+    return centroids.astype(np.float32)
+
+
+def _cluster_sums(vectors: np.ndarray, assignments: np.ndarray, n_clusters: int) -> np.ndarray:
+    """Sum member vectors per cluster with one sort + ``reduceat`` instead of scattered adds."""
+
+    order = np.argsort(assignments, kind="stable")
+    sorted_assignments = assignments[order]
+    starts = np.flatnonzero(np.r_[True, sorted_assignments[1:] != sorted_assignments[:-1]])
+    sums = np.zeros((n_clusters, vectors.shape[1]), dtype=np.float32)
+    sums[sorted_assignments[starts]] = np.add.reduceat(vectors[order], starts, axis=0)
+    return sums
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, *, chunk_size: int = 65_536) -> np.ndarray:
+    """Return the nearest centroid (L2) for every row, processed in bounded chunks."""
+
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        block = vectors[start : start + chunk_size]
+        # ||x||^2 is constant per row, so argmin(||c||^2 - 2 x.c) is the L2 nearest centroid.
+        distances = centroid_norms[None, :] - 2.0 * (block @ centroids.T)
+        assignments[start : start + chunk_size] = np.argmin(distances, axis=1)
+    return assignments
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return column indices of the ``k`` best scores per row, sorted descending."""
+
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    partitioned = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, partitioned, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(partitioned, order, axis=-1)
+
+
+@dataclass(slots=True)
+class IVFFlatIndex:
+    """Inverted-file index with exact inner-product scoring inside probed lists.
+
+    Vectors are stored grouped by their coarse cluster so a probe reads one contiguous
+    slice per list. The index is persisted as plain ``.npy`` files so it can be opened
+    with ``mmap_mode="r"`` and shared between worker processes.
+    """
+
+    centroids: np.ndarray
+    vectors: np.ndarray
+    offsets: np.ndarray
+    ids: np.ndarray
+    model_version: str | None = None
+
+    @property
+    def dim(self) -> int:
+        return int(self.centroids.shape[1])
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[uuid.UUID],
+        vectors: np.ndarray,
+        *,
+        nlist: int | None = None,
+        train_size: int = 100_000,
+        iterations: int = 15,
+        seed: int = 0,
+        model_version: str | None = None,
+    ) -> IVFFlatIndex:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(ids) != len(vectors):
+            raise ValueError("ids and vectors must describe the same number of rows")
+        if not len(vectors):
+            raise ValueError("Cannot build an index without vectors")
+        if nlist is None:
+            nlist = int(4 * np.sqrt(len(vectors)))
+        nlist = max(1, min(nlist, len(vectors)))
+
+        rng = np.random.default_rng(seed)
+        sample = vectors
+        if len(vectors) > train_size:
+            sample = vectors[rng.choice(len(vectors), size=train_size, replace=False)]
+        centroids = _kmeans(sample, nlist, iterations=iterations, rng=rng)
+        assignments = _assign(vectors, centroids)
+
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=nlist)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(
+            centroids=centroids,
+            vectors=vectors[order],
+            offsets=offsets,
+            ids=uuids_to_array(ids)[order],
+            model_version=model_version,
+        )
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        *,
+        nprobe: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(rows, scores)`` of shape ``(n_queries, k)``; missing slots are ``-1``/``-inf``."""
+
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        nprobe = max(1, min(nprobe or settings.ann_nprobe, self.nlist))
+        probes = top_k(queries @ self.centroids.T, nprobe)
+
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for position, (query, lists) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate(
+                [np.arange(self.offsets[idx], self.offsets[idx + 1]) for idx in lists]
+            )
+            if not len(candidates):
+                continue
+            candidate_scores = self.vectors[candidates] @ query
+            best = top_k(candidate_scores, k)
+            rows[position, : len(best)] = candidates[best]
+            scores[position, : len(best)] = candidate_scores[best]
+        return rows, scores
+
+    def search_ids(
+        self,
+        query: np.ndarray,
+        k: int,
+        *,
+        nprobe: int | None = None,
+    ) -> list[tuple[uuid.UUID, float]]:
+        rows, scores = self.search(query, k, nprobe=nprobe)
+        valid = rows[0] >= 0
+        return list(zip(array_to_uuids(self.ids[rows[0][valid]]), scores[0][valid].tolist()))
+
+    def save(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "centroids.npy", self.centroids)
+        np.save(directory / "vectors.npy", self.vectors)
+        np.save(directory / "offsets.npy", self.offsets)
+        np.save(directory / "ids.npy", self.ids)
+        meta = {
+            "kind": "ivf_flat",
+            "model_version": self.model_version,
+            "dim": self.dim,
+            "nlist": self.nlist,
+            "size": len(self),
+            "built_at": datetime.now(tz=UTC).isoformat(),
+        }
+        (directory / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, directory: Path, *, mmap: bool = True) -> IVFFlatIndex:
+        mode = "r" if mmap else None
+        meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        return cls(
+            centroids=np.load(directory / "centroids.npy"),
+            vectors=np.load(directory / "vectors.npy", mmap_mode=mode),
+            offsets=np.load(directory / "offsets.npy"),
+            ids=np.load(directory / "ids.npy", mmap_mode=mode),
+            model_version=meta.get("model_version"),
+        )
+
+
+_indexes: dict[str, IVFFlatIndex] = {}
+_index_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+# Strong references to background builds, one per version at most.
+_builds: dict[str, asyncio.Task[None]] = {}
+
+
+def index_directory(model_version: str) -> Path:
+    return settings.ann_index_dir / model_version
+
+
+async def build_item_index(
+    session: AsyncSession,
+    model_version: str,
+    *,
+    nlist: int | None = None,
+    train_size: int = 100_000,
+    iterations: int = 15,
+    seed: int = 0,
+) -> IVFFlatIndex:
+    """Build an item index from ``ItemEmbedding`` rows and persist it for other processes."""
+
+    item_ids, matrix = await FeatureStoreService(session).fetch_item_embedding_matrix(model_version)
+    if not item_ids:
+        raise LookupError(f"No item embeddings stored for model version {model_version!r}")
+    index = await asyncio.to_thread(
+        IVFFlatIndex.build,
+        item_ids,
+        matrix,
+        nlist=nlist,
+        train_size=train_size,
+        iterations=iterations,
+        seed=seed,
+        model_version=model_version,
+    )
+    await asyncio.to_thread(index.save, index_directory(model_version))
+    logger.info("ann.index.built", model_version=model_version, size=len(index), nlist=index.nlist)
+    return index
+
+
+async def _build_in_background(model_version: str) -> None:
+    try:
+        # The requests that asked for the index finish long before k-means does; own a session.
+        async with async_session_factory() as session:
+            _indexes[model_version] = await build_item_index(session, model_version)
+    except LookupError as exc:
+        logger.warning("ann.index.build_skipped", model_version=model_version, reason=str(exc))
+    except Exception:
+        logger.exception("ann.index.build_failed", model_version=model_version)
+
+
+def _start_build(model_version: str) -> None:
+    build = _builds.get(model_version)
+    if build is None or build.done():
+        _builds[model_version] = asyncio.create_task(
+            _build_in_background(model_version), name=f"ann-index-build-{model_version}"
+        )
+
+
+async def get_item_index(model_version: str) -> IVFFlatIndex | None:
+    """Return the process-wide index for ``model_version``, or ``None`` while it is being built.
+
+    A persisted index is memory-mapped under a per-version lock, so other versions never
+    wait on it. A missing one is built by a background task instead of on the request path;
+    callers fall back to exact scoring until it lands.
+    """
+
+    index = _indexes.get(model_version)
+    if index is not None:
+        return index
+    async with _index_locks[model_version]:
+        index = _indexes.get(model_version)
+        if index is None:
+            directory = index_directory(model_version)
+            if (directory / "meta.json").exists():
+                index = await asyncio.to_thread(IVFFlatIndex.load, directory)
+                _indexes[model_version] = index
+            else:
+                _start_build(model_version)
+    return index
+
+
+def evict_item_index(model_version: str | None = None) -> None:
+    """Drop cached indexes so the next lookup reloads them from disk."""
+
+    if model_version is None:
+        _indexes.clear()
+    else:
+        _indexes.pop(model_version, None)
+
+
+class ANNRetrievalService:
+    """Real-time candidate retrieval from user embeddings via the in-process item index."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.feature_store = FeatureStoreService(session)
+
+    async def retrieve(
+        self,
+        user_id: uuid.UUID,
+        *,
+        model_version: str,
+        limit: int = 20,
+        nprobe: int | None = None,
+    ) -> list[RecommendationCandidate]:
+        index = await get_item_index(model_version)
+        if index is None:
+            # The recommender imports this module for ``top_k``.
+            from app.services.recommender import RecommenderService
+
+            return await RecommenderService(self.session).recommend(user_id, model_version=model_version, limit=limit)
+        embeddings = await self.feature_store.fetch_user_embeddings([user_id], model_version=model_version)
+        embedding = embeddings.get(user_id)
+        if embedding is None:
+            return []
+        neighbours = index.search_ids(np.asarray(embedding.embedding, dtype=np.float32), limit, nprobe=nprobe)
+        items = await self.feature_store.fetch_items([item_id for item_id, _ in neighbours])
+        found = [(items[item_id], score) for item_id, score in neighbours if item_id in items]
+        return [
+            RecommendationCandidate(item=item, score=score, rank=rank)
+            for rank, (item, score) in enumerate(found, start=1)
+        ]
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import UTC, datetime, timedelta
+from typing import Iterable, Sequence
+
+import structlog
+from sqlalchemy import BindParameter, String, any_, bindparam, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, DOUBLE_PRECISION
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import COVISIT_UPDATE_DURATION
+from app.models import Interaction, NeighborKind
+from app.schemas.interaction import InteractionCreate
+
+logger = structlog.get_logger(__name__)
+
+# Incremental updates hold the rebuild key shared, so the rebuild's swap (which deletes what
+# they add to) excludes them without queueing them, and serialize among themselves on the other.
+_LOCK_KEY = 0x636F7669  # "covi"
+_REBUILD_LOCK_KEY = 0x636F7652  # "covR"
+
+_STAGING_TABLE = "covisit_rebuild"
+
+# A group is a session ("s:<session_id>") or one user's tumbling window ("u:<user_id>:<bucket>").
+_GROUPS_SQL = """
+    SELECT 's:' || session_id AS group_key, CAST(:session_weight AS double precision) AS weight, item_id
+    FROM events
+    WHERE session_id IS NOT NULL
+    UNION ALL
+    SELECT 'u:' || user_id || ':' || CAST(floor(extract(epoch FROM event_at) / :window_seconds) AS bigint),
+           CAST(:user_weight AS double precision),
+           item_id
+    FROM events
+"""
+
+_REBUILD_PAIRS_SQL = f"""
+    WITH events AS (
+        SELECT user_id, item_id, event_at, metadata_json ->> 'session_id' AS session_id
+        FROM interactions
+        WHERE event_at >= :since
+    ),
+    members AS (
+        SELECT group_key, weight, item_id, count(*) OVER (PARTITION BY group_key) AS size
+        FROM (SELECT DISTINCT group_key, weight, item_id FROM ({_GROUPS_SQL}) AS grouped) AS distinct_members
+    ),
+    pairs AS (
+        SELECT a.item_id, b.item_id AS neighbor_id, sum(a.weight) AS score
+        FROM members AS a
+        JOIN members AS b ON b.group_key = a.group_key AND b.item_id <> a.item_id
+        WHERE a.size <= :max_group_items
+        GROUP BY a.item_id, b.item_id
+    )
+    INSERT INTO {_STAGING_TABLE} (item_id, neighbor_id, score)
+    SELECT item_id, neighbor_id, score
+    FROM (
+        SELECT item_id, neighbor_id, score,
+               row_number() OVER (PARTITION BY item_id ORDER BY score DESC, neighbor_id) AS rank
+        FROM pairs
+    ) AS ranked
+    WHERE rank <= :pairs_per_item
+"""
+
+
+def _publish_lists_sql(where: str = "") -> str:
+    """Upsert each item's best ``:neighbors`` pairs into ``item_neighbors`` as one ``:kind`` row."""
+
+    return f"""
+        INSERT INTO item_neighbors (item_id, kind, neighbor_ids, scores, computed_at)
+        SELECT item_id,
+               CAST(:kind AS neighborkind),
+               array_agg(neighbor_id ORDER BY rank),
+               array_agg(score ORDER BY rank),
+               now()
+        FROM (
+            SELECT item_id, neighbor_id, score,
+                   row_number() OVER (PARTITION BY item_id ORDER BY score DESC, neighbor_id) AS rank
+            FROM item_covisit_pairs
+            {where}
+        ) AS ranked
+        WHERE rank <= :neighbors
+        GROUP BY item_id
+        ON CONFLICT (item_id, kind) DO UPDATE SET
+            neighbor_ids = excluded.neighbor_ids,
+            scores = excluded.scores,
+            computed_at = excluded.computed_at,
+            updated_at = now()
+    """
+
+
+_ADD_PAIRS_SQL = """
+    INSERT INTO item_covisit_pairs AS pairs (item_id, neighbor_id, score)
+    SELECT item_id, neighbor_id, sum(score)
+    FROM unnest(
+        CAST(:item_ids AS uuid[]),
+        CAST(:neighbor_ids AS uuid[]),
+        CAST(:scores AS double precision[])
+    ) AS batch(item_id, neighbor_id, score)
+    WHERE EXISTS (SELECT 1 FROM items WHERE items.id = batch.item_id)
+      AND EXISTS (SELECT 1 FROM items WHERE items.id = batch.neighbor_id)
+    GROUP BY item_id, neighbor_id
+    ORDER BY item_id, neighbor_id
+    ON CONFLICT (item_id, neighbor_id) DO UPDATE SET
+        score = pairs.score + excluded.score,
+        updated_at = now()
+"""
+
+
+def _uuid_array(name: str, values: Iterable[uuid.UUID]) -> BindParameter[Sequence[uuid.UUID]]:
+    return bindparam(name, list(values), type_=ARRAY(PG_UUID(as_uuid=True)))
+
+
+def _window_seconds() -> int:
+    return settings.covisit_window_minutes * 60
+
+
+def _bucket(event_at: datetime) -> int:
+    if event_at.tzinfo is None:
+        event_at = event_at.replace(tzinfo=UTC)
+    return int(event_at.timestamp() // _window_seconds())
+
+
+def group_keys(event: InteractionCreate) -> list[tuple[str, float]]:
+    """The co-visitation groups an event belongs to, with the score a pair in that group earns."""
+
+    keys = [(f"u:{event.user_id}:{_bucket(event.event_at)}", settings.covisit_user_weight)]
+    session_id = (event.metadata_json or {}).get("session_id")
+    if session_id:
+        keys.append((f"s:{session_id}", settings.covisit_session_weight))
+    return keys
+
+
+def new_pairs(
+    members: dict[uuid.UUID, int],
+    batch: Counter[uuid.UUID],
+    weight: float,
+) -> Iterable[tuple[uuid.UUID, uuid.UUID, float]]:
+    """Ordered pairs a group gained from ``batch``, given its item counts after the batch.
+
+    An item is new to the group when every one of its events there came in this batch; each
+    pair involving a new item is emitted once in each direction, so a group contributes every
+    distinct pair exactly once over its lifetime, as the nightly rebuild counts them.
+    """
+
+    if len(members) > settings.covisit_max_group_items:
+        return
+    added = [item_id for item_id, count in members.items() if count <= batch.get(item_id, 0)]
+    if not added:
+        return
+    existing = [item_id for item_id, count in members.items() if count > batch.get(item_id, 0)]
+    for position, item_id in enumerate(added):
+        for other in existing + added[position + 1 :]:
+            yield item_id, other, weight
+            yield other, item_id, weight
+
+
+class CovisitationService:
+    """Maintains ``covisit`` neighbour lists: items seen together in a session or a user's time window.
+
+    Pair scores live in ``item_covisit_pairs``. :meth:`apply_events` adds the pairs completed
+    by freshly written interactions and republishes the affected items' lists; :meth:`rebuild`
+    recomputes every pair from the lookback window, which also ages out old sessions and caps
+    the working table per item. Interactions committed after a rebuild has read the lookback
+    window are left to the next rebuild: batches applied during its join land in the table it
+    replaces, and batches arriving during its swap are skipped rather than queued behind it.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _lock_for_rebuild(self) -> None:
+        await self.session.execute(select(func.pg_advisory_xact_lock(_REBUILD_LOCK_KEY)))
+
+    async def _lock_for_update(self) -> bool:
+        """Take the incremental locks, or return False at once while a rebuild is swapping."""
+
+        if not await self.session.scalar(select(func.pg_try_advisory_xact_lock_shared(_REBUILD_LOCK_KEY))):
+            return False
+        await self.session.execute(select(func.pg_advisory_xact_lock(_LOCK_KEY)))
+        return True
+
+    async def rebuild(self) -> int:
+        """Recompute every pair and list from scratch in the session's transaction; returns lists written.
+
+        The self-join runs into a temporary table without the lock, so incremental updates
+        keep flowing while it runs; only the swap into ``item_covisit_pairs`` and the
+        republish hold it.
+        """
+
+        started = time.perf_counter()
+        await self.session.execute(
+            text(
+                f"CREATE TEMPORARY TABLE {_STAGING_TABLE} "
+                "(item_id uuid NOT NULL, neighbor_id uuid NOT NULL, score double precision NOT NULL) "
+                "ON COMMIT DROP"
+            )
+        )
+        await self.session.execute(
+            text(_REBUILD_PAIRS_SQL).bindparams(
+                since=datetime.now(tz=UTC) - timedelta(days=settings.covisit_lookback_days),
+                session_weight=settings.covisit_session_weight,
+                user_weight=settings.covisit_user_weight,
+                window_seconds=_window_seconds(),
+                max_group_items=settings.covisit_max_group_items,
+                pairs_per_item=settings.covisit_pairs_per_item,
+            )
+        )
+        computed = time.perf_counter()
+        await self._lock_for_rebuild()
+        await self.session.execute(text("DELETE FROM item_covisit_pairs"))
+        # Items deleted since the join read the interactions would violate the foreign keys.
+        await self.session.execute(
+            text(
+                f"""
+                INSERT INTO item_covisit_pairs (item_id, neighbor_id, score)
+                SELECT item_id, neighbor_id, score FROM {_STAGING_TABLE} AS staged
+                WHERE EXISTS (SELECT 1 FROM items WHERE items.id = staged.item_id)
+                  AND EXISTS (SELECT 1 FROM items WHERE items.id = staged.neighbor_id)
+                """
+            )
+        )
+        await self.session.execute(
+            text("DELETE FROM item_neighbors WHERE kind = CAST(:kind AS neighborkind)").bindparams(
+                kind=NeighborKind.COVISIT.value
+            )
+        )
+        result = await self.session.execute(
+            text(_publish_lists_sql()).bindparams(
+                kind=NeighborKind.COVISIT.value, neighbors=settings.covisit_neighbors
+            )
+        )
+        lists = int(result.rowcount or 0)
+        COVISIT_UPDATE_DURATION.labels(trigger="rebuild").observe(time.perf_counter() - started)
+        logger.info(
+            "covisitation.rebuilt",
+            lists=lists,
+            seconds=round(time.perf_counter() - started, 2),
+            swap_seconds=round(time.perf_counter() - computed, 2),
+        )
+        return lists
+
+    async def _members(
+        self,
+        groups: dict[str, Counter[uuid.UUID]],
+        since: datetime,
+    ) -> dict[str, dict[uuid.UUID, int]]:
+        """Item counts per touched group as stored now, batch included; two indexed queries."""
+
+        members: dict[str, dict[uuid.UUID, int]] = defaultdict(dict)
+        session_ids = [key[2:] for key in groups if key.startswith("s:")]
+        if session_ids:
+            # Spelled out so it matches the ix_interactions_session_id expression; a bound key would not.
+            session_id = literal_column("interactions.metadata_json ->> 'session_id'", String)
+            rows = await self.session.execute(
+                select(session_id, Interaction.item_id, func.count())
+                .where(
+                    session_id == any_(bindparam("session_ids", session_ids, type_=ARRAY(String))),
+                    Interaction.event_at >= since,
+                )
+                .group_by(session_id, Interaction.item_id)
+            )
+            for key, item_id, count in rows:
+                members[f"s:{key}"][item_id] = count
+
+        windows = [key.split(":")[1:] for key in groups if key.startswith("u:")]
+        if windows:
+            width = _window_seconds()
+            buckets = [int(bucket) for _, bucket in windows]
+            bucket = func.floor(func.extract("epoch", Interaction.event_at) / width)
+            rows = await self.session.execute(
+                select(Interaction.user_id, bucket, Interaction.item_id, func.count())
+                .where(
+                    Interaction.user_id == any_(_uuid_array("user_ids", {uuid.UUID(user) for user, _ in windows})),
+                    Interaction.event_at >= max(since, datetime.fromtimestamp(min(buckets) * width, tz=UTC)),
+                    Interaction.event_at < datetime.fromtimestamp((max(buckets) + 1) * width, tz=UTC),
+                )
+                .group_by(Interaction.user_id, bucket, Interaction.item_id)
+            )
+            for user_id, user_bucket, item_id, count in rows:
+                key = f"u:{user_id}:{int(user_bucket)}"
+                if key in groups:
+                    members[key][item_id] = count
+        return members
+
+    async def apply_events(self, events: Sequence[InteractionCreate], *, trigger: str = "stream") -> int:
+        """Add the pairs that ``events`` complete and republish the touched lists.
+
+        ``events`` must be exactly the rows this caller committed: an event passed twice, or
+        one that was skipped as a duplicate, counts as a new group member and double-counts
+        its pairs. Runs in the session's transaction; the caller commits. Returns pairs added,
+        or 0 when a rebuild holds the lock and the batch is skipped.
+        """
+
+        started = time.perf_counter()
+        since = datetime.now(tz=UTC) - timedelta(days=settings.covisit_lookback_days)
+        groups: dict[str, Counter[uuid.UUID]] = defaultdict(Counter)
+        weights: dict[str, float] = {}
+        for event in events:
+            at = event.event_at if event.event_at.tzinfo else event.event_at.replace(tzinfo=UTC)
+            if at < since:
+                continue
+            for key, weight in group_keys(event):
+                groups[key][event.item_id] += 1
+                weights[key] = weight
+        if not groups:
+            return 0
+
+        if not await self._lock_for_update():
+            logger.info("covisitation.skipped_during_rebuild", events=len(events), groups=len(groups))
+            return 0
+        members = await self._members(groups, since)
+        pairs = [pair for key, batch in groups.items() for pair in new_pairs(members.get(key, {}), batch, weights[key])]
+        if pairs:
+            await self.session.execute(
+                text(_ADD_PAIRS_SQL).bindparams(
+                    _uuid_array("item_ids", (item_id for item_id, _, _ in pairs)),
+                    _uuid_array("neighbor_ids", (neighbor_id for _, neighbor_id, _ in pairs)),
+                    bindparam("scores", [score for _, _, score in pairs], type_=ARRAY(DOUBLE_PRECISION)),
+                )
+            )
+            await self.session.execute(
+                text(_publish_lists_sql("WHERE item_id = ANY(:touched)")).bindparams(
+                    _uuid_array("touched", {item_id for item_id, _, _ in pairs}),
+                    kind=NeighborKind.COVISIT.value,
+                    neighbors=settings.covisit_neighbors,
+                )
+            )
+        COVISIT_UPDATE_DURATION.labels(trigger=trigger).observe(time.perf_counter() - started)
+        logger.debug("covisitation.applied", events=len(events), groups=len(groups), pairs=len(pairs))
+        return len(pairs)
+
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from enum import Enum
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import structlog
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import ItemEmbedding, UserEmbedding
+
+logger = structlog.get_logger(__name__)
+
+UUID_DTYPE = np.dtype("V16")
+MANIFEST_NAME = "manifest.json"
+
+
+def uuids_to_array(ids: Sequence[uuid.UUID]) -> np.ndarray:
+    """Pack UUIDs into a fixed-width 16-byte NumPy array."""
+
+    return np.frombuffer(b"".join(value.bytes for value in ids), dtype=UUID_DTYPE).copy()
+
+
+def array_to_uuids(values: np.ndarray) -> list[uuid.UUID]:
+    """Unpack a 16-byte NumPy array produced by :func:`uuids_to_array`."""
+
+    return [uuid.UUID(bytes=value.tobytes()) for value in values]
+
+
+class SnapshotKind(str, Enum):
+    """Embedding families stored in a snapshot."""
+
+    USERS = "users"
+    ITEMS = "items"
+
+
+@dataclass(slots=True)
+class EmbeddingMatrix:
+    """Memory-mapped embedding rows sorted by entity id.
+
+    ``ids`` and ``vectors`` are views over page-cached files, so every process opening the
+    same snapshot shares one physical copy of the bytes.
+    """
+
+    model_version: str
+    kind: SnapshotKind
+    ids: np.ndarray
+    vectors: np.ndarray
+    computed_at: datetime
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1])
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    def lookup(self, ids: Sequence[uuid.UUID]) -> np.ndarray:
+        """Return the row of each id, or ``-1`` when it is not part of the snapshot."""
+
+        if not len(self) or not ids:
+            return np.full(len(ids), -1, dtype=np.int64)
+        keys = uuids_to_array(ids).view(">u8").reshape(-1, 2)
+        stored = self.ids.view(">u8").reshape(-1, 2)
+        # UUIDs compare like big-endian 128-bit integers: bisect on the high word, then
+        # resolve the (rare) shared-prefix runs on the low word.
+        lo = np.searchsorted(stored[:, 0], keys[:, 0], side="left")
+        hi = np.searchsorted(stored[:, 0], keys[:, 0], side="right")
+        rows = np.full(len(ids), -1, dtype=np.int64)
+        for position, (start, stop) in enumerate(zip(lo, hi)):
+            if start == stop:
+                continue
+            offset = np.searchsorted(stored[start:stop, 1], keys[position, 1])
+            if offset < stop - start and stored[start + offset, 1] == keys[position, 1]:
+                rows[position] = start + offset
+        return rows
+
+    def vectors_for(self, ids: Sequence[uuid.UUID]) -> dict[uuid.UUID, np.ndarray]:
+        rows = self.lookup(ids)
+        return {entity_id: self.vectors[row] for entity_id, row in zip(ids, rows) if row >= 0}
+
+
+def snapshot_directory(model_version: str) -> Path:
+    return settings.embedding_snapshot_dir / model_version
+
+
+def _read_manifest(directory: Path) -> dict[str, object] | None:
+    path = directory / MANIFEST_NAME
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+_open_snapshots: dict[tuple[str, SnapshotKind], tuple[float, EmbeddingMatrix]] = {}
+
+
+def open_snapshot(model_version: str, kind: SnapshotKind) -> EmbeddingMatrix | None:
+    """Open (or reuse) the memory-mapped matrix for ``model_version`` if one was exported."""
+
+    directory = snapshot_directory(model_version)
+    manifest_path = directory / MANIFEST_NAME
+    try:
+        mtime = manifest_path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    cached = _open_snapshots.get((model_version, kind))
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    manifest = _read_manifest(directory)
+    if manifest is None or kind.value not in manifest:
+        return None
+    section = manifest[kind.value]
+    count, dim = int(section["count"]), int(section["dim"])
+    vectors = (
+        np.memmap(directory / f"{kind.value}.f32", dtype=np.float32, mode="r", shape=(count, dim))
+        if count
+        else np.empty((0, dim), dtype=np.float32)
+    )
+    matrix = EmbeddingMatrix(
+        model_version=model_version,
+        kind=kind,
+        ids=np.load(directory / f"{kind.value}.ids.npy", mmap_mode="r"),
+        vectors=vectors,
+        computed_at=datetime.fromisoformat(str(manifest["created_at"])),
+    )
+    _open_snapshots[(model_version, kind)] = (mtime, matrix)
+    return matrix
+
+
+async def _export_kind(
+    session: AsyncSession,
+    model: type[UserEmbedding] | type[ItemEmbedding],
+    model_version: str,
+    directory: Path,
+    kind: SnapshotKind,
+    chunk_size: int,
+) -> dict[str, int]:
+    id_column = model.user_id if model is UserEmbedding else model.item_id
+    count = await session.scalar(select(func.count()).select_from(model).where(model.model_version == model_version))
+    count = int(count or 0)
+    dim = int(
+        await session.scalar(select(model.embedding_dim).where(model.model_version == model_version).limit(1)) or 0
+    )
+    if not count:
+        np.save(directory / f"{kind.value}.ids.npy", np.empty(0, dtype=UUID_DTYPE))
+        (directory / f"{kind.value}.f32").touch()
+        return {"count": 0, "dim": dim}
+    ids = np.lib.format.open_memmap(directory / f"{kind.value}.ids.npy", mode="w+", dtype=UUID_DTYPE, shape=(count,))
+    # Postgres orders uuid columns bytewise, which is exactly the order ``lookup`` bisects on.
+    stmt = (
+        select(id_column, model.embedding)
+        .where(model.model_version == model_version)
+        .order_by(id_column)
+        .execution_options(yield_per=chunk_size)
+    )
+    written = 0
+    with (directory / f"{kind.value}.f32").open("wb") as handle:
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            block = np.asarray([row[1] for row in partition], dtype=np.float32)
+            if block.shape[1] != dim:
+                raise ValueError(f"Mixed embedding dimensions found for {kind.value} in {model_version!r}")
+            block.tofile(handle)
+            ids[written : written + len(partition)] = uuids_to_array([row[0] for row in partition])
+            written += len(partition)
+    ids.flush()
+    if written != count:
+        raise RuntimeError(f"{kind.value} embeddings changed during export ({written} != {count})")
+    return {"count": count, "dim": dim}
+
+
+async def export_embedding_snapshot(
+    session: AsyncSession,
+    model_version: str,
+    *,
+    chunk_size: int = 10_000,
+) -> Path:
+    """Write user and item embeddings of ``model_version`` to contiguous float32 files.
+
+    The snapshot is assembled in a scratch directory and swapped into place, so readers
+    either see the previous snapshot or the complete new one.
+    """
+
+    target = snapshot_directory(model_version)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    scratch = Path(tempfile.mkdtemp(prefix=f".{model_version}-", dir=target.parent))
+    try:
+        manifest: dict[str, object] = {
+            "model_version": model_version,
+            "created_at": datetime.now(tz=UTC).isoformat(),
+            "dtype": "float32",
+        }
+        manifest[SnapshotKind.USERS.value] = await _export_kind(
+            session, UserEmbedding, model_version, scratch, SnapshotKind.USERS, chunk_size
+        )
+        manifest[SnapshotKind.ITEMS.value] = await _export_kind(
+            session, ItemEmbedding, model_version, scratch, SnapshotKind.ITEMS, chunk_size
+        )
+        (scratch / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        retired = target.with_name(f".{model_version}-retired")
+        if target.exists():
+            shutil.rmtree(retired, ignore_errors=True)
+            os.replace(target, retired)
+        os.replace(scratch, target)
+        shutil.rmtree(retired, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(scratch, ignore_errors=True)
+        raise
+    logger.info("embedding_snapshot.exported", model_version=model_version, directory=str(target))
+    return target
@@ -1,15 +1,38 @@
 from __future__ import annotations
 
+import json
 import uuid
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import UTC, datetime
-from typing import Iterable, Sequence
+from typing import Any, Iterable, Mapping, Sequence
 
-from sqlalchemy import Select, delete, func, select
+import numpy as np
+from sqlalchemy import Select, and_, any_, bindparam, delete, func, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Item, RecommendationScore, UserEmbedding
+from app.core.database import async_session_factory
+from app.core.ids import uuid7
+from app.core.singleflight import RedisSingleFlight, SingleFlight
+from app.models import (
+    Item,
+    ItemEmbedding,
+    LoaderProfile,
+    RecommendationScore,
+    UserEmbedding,
+    loader_options,
+)
+from app.schemas.recommendation import RecommendedItem
+from app.services.affinity import AffinityService
+from app.services.embedding_snapshot import SnapshotKind, array_to_uuids, open_snapshot
+from app.services.model_versions import ModelVersionService
+from app.services.recommendation_cache import (
+    RecommendationCache,
+    get_recommendation_cache,
+    to_recommended_items,
+)
 
 
 @dataclass(slots=True)
@@ -20,24 +43,172 @@ class RecommendationCandidate:
     explanation: dict[str, float] | None = None
 
 
+_recommendation_flight: SingleFlight[tuple[uuid.UUID, str, int], list[RecommendedItem]] = SingleFlight("recommendations")
+_recommendation_redis_flight: RedisSingleFlight[list[RecommendedItem]] = RedisSingleFlight("recommendations")
+
+
 class FeatureStoreService:
     """Read/write helpers for recommendation artifacts."""
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, *, cache: RecommendationCache | None = None):
         self.session = session
+        self.cache = cache or get_recommendation_cache()
 
     async def fetch_user_embeddings(self, user_ids: Sequence[uuid.UUID], *, model_version: str | None = None) -> dict[uuid.UUID, UserEmbedding]:
+        """Latest embedding per user, from the version's snapshot where present.
+
+        A user folded in since the snapshot was exported has a newer ``fold_in`` row in the
+        database, which replaces the snapshot vector; for every other snapshot user the
+        query matches nothing and the snapshot row stands.
+        """
+
+        embeddings: dict[uuid.UUID, UserEmbedding] = {}
         stmt: Select = select(UserEmbedding).where(UserEmbedding.user_id.in_(user_ids))
         if model_version:
+            embeddings.update(self._snapshot_user_embeddings(user_ids, model_version))
             stmt = stmt.where(UserEmbedding.model_version == model_version)
+            if embeddings:
+                snapshot_at = next(iter(embeddings.values())).computed_at
+                stmt = stmt.where(
+                    or_(
+                        UserEmbedding.user_id.not_in(list(embeddings)),
+                        and_(
+                            UserEmbedding.metadata_json["source"].astext == "fold_in",
+                            UserEmbedding.computed_at > snapshot_at,
+                        ),
+                    )
+                )
         stmt = stmt.order_by(UserEmbedding.computed_at.desc())
         records = (await self.session.scalars(stmt)).all()
-        embeddings: dict[uuid.UUID, UserEmbedding] = {}
+        fetched: set[uuid.UUID] = set()
         for record in records:
-            if record.user_id not in embeddings:
+            if record.user_id not in fetched:
                 embeddings[record.user_id] = record
+                fetched.add(record.user_id)
         return embeddings
 
+    @staticmethod
+    def _snapshot_user_embeddings(user_ids: Sequence[uuid.UUID], model_version: str) -> dict[uuid.UUID, UserEmbedding]:
+        """Serve embeddings from the memory-mapped snapshot; the rows are transient, not session-bound."""
+
+        snapshot = open_snapshot(model_version, SnapshotKind.USERS)
+        if snapshot is None:
+            return {}
+        return {
+            user_id: UserEmbedding(
+                user_id=user_id,
+                model_version=model_version,
+                embedding=vector.tolist(),
+                embedding_dim=snapshot.dim,
+                metadata_json={"source": "snapshot"},
+                computed_at=snapshot.computed_at,
+            )
+            for user_id, vector in snapshot.vectors_for(user_ids).items()
+        }
+
+    async def fetch_item_embedding_matrix(
+        self,
+        model_version: str,
+        *,
+        chunk_size: int = 10_000,
+    ) -> tuple[list[uuid.UUID], np.ndarray]:
+        """Return every item embedding for a model version as a dense float32 matrix.
+
+        An exported snapshot is returned as a zero-copy memory map; otherwise rows are
+        streamed from the database.
+        """
+
+        snapshot = open_snapshot(model_version, SnapshotKind.ITEMS)
+        if snapshot is not None:
+            return array_to_uuids(snapshot.ids), snapshot.vectors
+        stmt = (
+            select(ItemEmbedding.item_id, ItemEmbedding.embedding)
+            .where(ItemEmbedding.model_version == model_version)
+            .order_by(ItemEmbedding.item_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        item_ids: list[uuid.UUID] = []
+        blocks: list[np.ndarray] = []
+        result = await self.session.stream(stmt)
+        async for partition in result.partitions():
+            item_ids.extend(row.item_id for row in partition)
+            blocks.append(np.asarray([row.embedding for row in partition], dtype=np.float32))
+        if not blocks:
+            return [], np.empty((0, 0), dtype=np.float32)
+        return item_ids, np.vstack(blocks)
+
+    async def copy_embeddings(
+        self,
+        kind: SnapshotKind,
+        model_version: str,
+        entity_ids: Sequence[uuid.UUID],
+        vectors: np.ndarray,
+        *,
+        metadata: dict[str, Any] | None = None,
+        chunk_size: int = 10_000,
+    ) -> int:
+        """``COPY`` one embedding per entity of ``kind`` for ``model_version``; returns rows written.
+
+        Rows go through the session's connection and transaction, like the interaction bulk path.
+        """
+
+        model = UserEmbedding if kind is SnapshotKind.USERS else ItemEmbedding
+        entity_column = "user_id" if kind is SnapshotKind.USERS else "item_id"
+        columns = ("id", entity_column, "model_version", "embedding", "embedding_dim", "metadata_json", "computed_at")
+        connection = await (await self.session.connection()).get_raw_connection()
+        payload = json.dumps(metadata or {})
+        computed_at = datetime.now(tz=UTC)
+        dim = int(vectors.shape[1])
+        for start in range(0, len(entity_ids), chunk_size):
+            block = vectors[start : start + chunk_size].astype(np.float64).tolist()
+            records = [
+                (uuid7(), entity_id, model_version, vector, dim, payload, computed_at)
+                for entity_id, vector in zip(entity_ids[start : start + chunk_size], block)
+            ]
+            await connection.driver_connection.copy_records_to_table(
+                model.__tablename__, records=records, columns=columns
+            )
+        return len(entity_ids)
+
+    async def upsert_user_embeddings(
+        self,
+        model_version: str,
+        vectors: Mapping[uuid.UUID, np.ndarray],
+        *,
+        metadata: Mapping[uuid.UUID, dict[str, str]] | None = None,
+    ) -> dict[uuid.UUID, UserEmbedding]:
+        """Insert or replace a few users' embeddings with one statement; returns them unattached."""
+
+        if not vectors:
+            return {}
+        computed_at = datetime.now(tz=UTC)
+        rows = [
+            {
+                "id": uuid7(),
+                "user_id": user_id,
+                "model_version": model_version,
+                "embedding": np.asarray(vector, dtype=np.float64).tolist(),
+                "embedding_dim": len(vector),
+                "metadata_json": (metadata or {}).get(user_id, {}),
+                "computed_at": computed_at,
+            }
+            for user_id, vector in vectors.items()
+        ]
+        stmt = insert(UserEmbedding).values(rows)
+        await self.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserEmbedding.user_id, UserEmbedding.model_version],
+                set_={
+                    "embedding": stmt.excluded.embedding,
+                    "embedding_dim": stmt.excluded.embedding_dim,
+                    "metadata_json": stmt.excluded.metadata_json,
+                    "computed_at": stmt.excluded.computed_at,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+        return {row["user_id"]: UserEmbedding(**row) for row in rows}
+
     async def fetch_recommendation_scores(
         self,
         user_id: uuid.UUID,
@@ -45,15 +216,17 @@ class FeatureStoreService:
         model_version: str | None = None,
         limit: int = 20,
     ) -> list[RecommendationCandidate]:
+        model_version = await ModelVersionService(self.session).resolve(model_version)
         stmt = (
             select(RecommendationScore, Item)
             .join(Item, RecommendationScore.item_id == Item.id)
-            .where(RecommendationScore.user_id == user_id)
+            .where(
+                RecommendationScore.user_id == user_id,
+                RecommendationScore.model_version == model_version,
+            )
             .order_by(RecommendationScore.score.desc())
             .limit(limit)
         )
-        if model_version:
-            stmt = stmt.where(RecommendationScore.model_version == model_version)
         results = await self.session.execute(stmt)
         candidates: list[RecommendationCandidate] = []
         for score, item in results.all():
@@ -67,6 +240,91 @@ class FeatureStoreService:
             )
         return candidates
 
+    async def fetch_recommendations(
+        self,
+        user_id: uuid.UUID,
+        *,
+        model_version: str | None = None,
+        limit: int = 20,
+    ) -> list[RecommendedItem]:
+        """Cached read of a user's materialized recommendations, serialized for the API."""
+
+        model_version = await ModelVersionService(self.session).resolve(model_version)
+        cached = await self.cache.get(user_id, model_version, limit)
+        if cached is not None:
+            return cached
+
+        async def load() -> list[RecommendedItem]:
+            # Coalesced callers share this load, so it must not run on one caller's session,
+            # which is closed if that caller's request is cancelled.
+            async with async_session_factory() as session:
+                candidates = await FeatureStoreService(session, cache=self.cache).fetch_recommendation_scores(
+                    user_id, model_version=model_version, limit=limit
+                )
+                items = to_recommended_items(candidates)
+            await self.cache.set(user_id, model_version, limit, items)
+            return items
+
+        async def load_once_across_workers() -> list[RecommendedItem]:
+            return await _recommendation_redis_flight.do(
+                f"{model_version}:{user_id}:{limit}",
+                load,
+                lambda: self.cache.get(user_id, model_version, limit),
+            )
+
+        # Results differ per ``limit``, so it is part of the key next to user and model version.
+        return await _recommendation_flight.do((user_id, model_version, limit), load_once_across_workers)
+
+    async def fetch_recommendation_scores_batch(
+        self,
+        user_ids: Sequence[uuid.UUID],
+        *,
+        model_version: str | None = None,
+        limit: int = 20,
+    ) -> dict[uuid.UUID, list[RecommendationCandidate]]:
+        """Fetch the top ``limit`` scores of many users with a single windowed query."""
+
+        if not user_ids:
+            return {}
+        model_version = await ModelVersionService(self.session).resolve(model_version)
+        position = (
+            func.row_number()
+            .over(partition_by=RecommendationScore.user_id, order_by=RecommendationScore.score.desc())
+            .label("position")
+        )
+        ranked = select(
+            RecommendationScore.user_id,
+            RecommendationScore.item_id,
+            RecommendationScore.score,
+            RecommendationScore.rank,
+            RecommendationScore.explanation,
+            position,
+        ).where(
+            RecommendationScore.user_id
+            == any_(bindparam("user_ids", list(user_ids), type_=ARRAY(PG_UUID(as_uuid=True)))),
+            RecommendationScore.model_version == model_version,
+        )
+        ranked_subquery = ranked.subquery("ranked")
+        stmt = (
+            select(
+                ranked_subquery.c.user_id,
+                ranked_subquery.c.score,
+                ranked_subquery.c.rank,
+                ranked_subquery.c.explanation,
+                Item,
+            )
+            .join(Item, Item.id == ranked_subquery.c.item_id)
+            .where(ranked_subquery.c.position <= limit)
+            .order_by(ranked_subquery.c.user_id, ranked_subquery.c.position)
+        )
+        results = await self.session.execute(stmt)
+        grouped: dict[uuid.UUID, list[RecommendationCandidate]] = defaultdict(list)
+        for user_id, score, rank, explanation, item in results.all():
+            grouped[user_id].append(
+                RecommendationCandidate(item=item, score=score, rank=rank, explanation=explanation)
+            )
+        return dict(grouped)
+
     async def upsert_recommendation_scores(
         self,
         user_id: uuid.UUID,
@@ -74,6 +332,9 @@ class FeatureStoreService:
         *,
         model_version: str,
     ) -> None:
+        """Replace one user's scores row by row; batch runs publish through :class:`ModelVersionService`."""
+
+        await ModelVersionService(self.session).ensure_partition(model_version)
         await self.session.execute(
             delete(RecommendationScore).where(
                 RecommendationScore.user_id == user_id,
@@ -94,21 +355,26 @@ class FeatureStoreService:
                 )
             )
         await self.session.flush()
+        self.cache.invalidate_after_commit(self.session, user_id, model_version)
 
-    async def aggregate_interaction_counts(self, user_id: uuid.UUID) -> dict[uuid.UUID, float]:
-        from app.models import Interaction
+    async def aggregate_interaction_counts(
+        self,
+        user_id: uuid.UUID,
+        *,
+        decayed: bool = False,
+    ) -> dict[uuid.UUID, float]:
+        """Interaction weight per item for ``user_id`` from the incrementally maintained rollup."""
 
-        stmt = (
-            select(Interaction.item_id, func.sum(Interaction.weight))
-            .where(Interaction.user_id == user_id)
-            .group_by(Interaction.item_id)
-        )
-        rows = await self.session.execute(stmt)
-        return {item_id: float(weight or 0.0) for item_id, weight in rows.all()}
+        return await AffinityService(self.session).fetch(user_id, decayed=decayed)
 
-    async def fetch_items(self, item_ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, Item]:
+    async def fetch_items(
+        self,
+        item_ids: Iterable[uuid.UUID],
+        *,
+        profile: LoaderProfile = LoaderProfile.DEFAULT,
+    ) -> dict[uuid.UUID, Item]:
         if not item_ids:
             return {}
-        stmt = select(Item).where(Item.id.in_(item_ids))
+        stmt = select(Item).where(Item.id.in_(item_ids)).options(*loader_options(profile))
         records = (await self.session.scalars(stmt)).all()
         return {item.id: item for item in records}
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from typing import Mapping, Sequence
+
+import numpy as np
+import structlog
+from sqlalchemy import and_, any_, bindparam, func, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import FOLD_IN_DURATION, FOLD_IN_USERS
+from app.models import UserEmbedding, UserItemAffinity
+from app.services.affinity import AffinityService
+from app.services.feature_store import FeatureStoreService, RecommendationCandidate
+from app.services.model_versions import ModelVersionService
+from app.services.recommender import ItemMatrix, RecommenderService
+
+logger = structlog.get_logger(__name__)
+
+
+def fold_in_vectors(
+    matrix: ItemMatrix,
+    weights: Sequence[Mapping[uuid.UUID, float]],
+    *,
+    alpha: float,
+    regularization: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Solve the ALS user step exactly for each weight map against fixed item factors.
+
+    For a user with observed items ``Y_u`` and weights ``w`` this is
+    ``(YᵀY + Y_uᵀ diag(alpha |w|) Y_u + λI) x = Y_uᵀ ((1 + alpha |w|) * [w > 0])``, the same
+    objective the trainer minimizes. Items unknown to the model are ignored. Returns
+    ``(vectors, observed)``: one row per input and how many known items each used.
+    """
+
+    dim = matrix.vectors.shape[1]
+    base = matrix.gram() + regularization * np.eye(dim)
+    systems = np.repeat(base[None, :, :], len(weights), axis=0)
+    targets = np.zeros((len(weights), dim))
+    observed = np.zeros(len(weights), dtype=np.int64)
+    index = matrix.row_index()
+    for position, user_weights in enumerate(weights):
+        known = [(index[item_id], weight) for item_id, weight in user_weights.items() if item_id in index]
+        if not known:
+            continue
+        rows = np.fromiter((row for row, _ in known), dtype=np.int64, count=len(known))
+        signed = np.fromiter((weight for _, weight in known), dtype=np.float64, count=len(known))
+        confidence = alpha * np.abs(signed)
+        factors = np.asarray(matrix.vectors[rows], dtype=np.float64)
+        systems[position] += factors.T @ (confidence[:, None] * factors)
+        targets[position] = factors.T @ ((1.0 + confidence) * (signed > 0))
+        observed[position] = len(rows)
+    vectors = np.linalg.solve(systems, targets[:, :, None])[:, :, 0]
+    return vectors.astype(np.float32), observed
+
+
+class FoldInService:
+    """Produces user embeddings between training runs by folding users into the live model.
+
+    Item factors stay fixed, so a user's embedding is a single small least-squares solve over
+    their affinity rollup: milliseconds instead of a retrain. Embeddings are written through
+    :class:`FeatureStoreService` and tagged ``metadata_json["source"] == "fold_in"``, which is
+    what lets the reader prefer them over an older exported snapshot vector. The solves run on
+    a worker thread so a large batch does not stall the event loop.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.feature_store = FeatureStoreService(session)
+        self.affinity = AffinityService(session)
+        self.recommender = RecommenderService(session)
+
+    async def stale_users(self, user_ids: Sequence[uuid.UUID], *, model_version: str) -> list[uuid.UUID]:
+        """Users with affinity but no embedding in ``model_version``, or one older than their affinity."""
+
+        if not user_ids:
+            return []
+        stmt = (
+            select(UserItemAffinity.user_id)
+            .outerjoin(
+                UserEmbedding,
+                and_(
+                    UserEmbedding.user_id == UserItemAffinity.user_id,
+                    UserEmbedding.model_version == model_version,
+                ),
+            )
+            .where(
+                UserItemAffinity.user_id
+                == any_(bindparam("user_ids", list(user_ids), type_=ARRAY(PG_UUID(as_uuid=True))))
+            )
+            .group_by(UserItemAffinity.user_id, UserEmbedding.computed_at)
+            .having(
+                or_(
+                    UserEmbedding.computed_at.is_(None),
+                    func.max(UserItemAffinity.updated_at) > UserEmbedding.computed_at,
+                )
+            )
+        )
+        return list((await self.session.scalars(stmt)).all())
+
+    async def fold_in_many(
+        self,
+        user_ids: Sequence[uuid.UUID],
+        *,
+        model_version: str | None = None,
+        trigger: str = "request",
+    ) -> dict[uuid.UUID, UserEmbedding]:
+        """Fold in and persist ``user_ids`` in micro-batches; users with no usable affinity are skipped.
+
+        Writes join the session's transaction; the caller commits.
+        """
+
+        model_version = await ModelVersionService(self.session).resolve(model_version)
+        matrix = await self.recommender.load_item_matrix(model_version)
+        if not matrix.item_ids:
+            return {}
+        embeddings: dict[uuid.UUID, UserEmbedding] = {}
+        for start in range(0, len(user_ids), settings.fold_in_batch_size):
+            chunk = list(user_ids[start : start + settings.fold_in_batch_size])
+            started = time.perf_counter()
+            affinity = await self.affinity.fetch_many(chunk, decayed=True)
+            folded = [user_id for user_id in chunk if affinity.get(user_id)]
+            vectors, observed = await asyncio.to_thread(
+                fold_in_vectors,
+                matrix,
+                [affinity[user_id] for user_id in folded],
+                alpha=settings.fold_in_alpha,
+                regularization=settings.fold_in_regularization,
+            )
+            usable = {user_id: vector for user_id, vector, count in zip(folded, vectors, observed) if count}
+            metadata = {
+                user_id: {"source": "fold_in", "interactions": str(int(count))}
+                for user_id, count in zip(folded, observed)
+                if count
+            }
+            embeddings.update(await self.feature_store.upsert_user_embeddings(model_version, usable, metadata=metadata))
+            FOLD_IN_DURATION.labels(trigger=trigger).observe(time.perf_counter() - started)
+            FOLD_IN_USERS.labels(trigger=trigger).inc(len(usable))
+            logger.debug("fold_in.batch", model_version=model_version, requested=len(chunk), folded=len(usable))
+        return embeddings
+
+    async def refresh(
+        self,
+        user_ids: Sequence[uuid.UUID],
+        *,
+        model_version: str | None = None,
+        trigger: str = "request",
+    ) -> dict[uuid.UUID, UserEmbedding]:
+        """Fold in only the users whose embedding is missing or predates their latest interactions."""
+
+        model_version = await ModelVersionService(self.session).resolve(model_version)
+        stale = await self.stale_users(user_ids, model_version=model_version)
+        return await self.fold_in_many(stale, model_version=model_version, trigger=trigger)
+
+    async def recommend(
+        self,
+        user_id: uuid.UUID,
+        *,
+        model_version: str | None = None,
+        limit: int = 20,
+    ) -> list[RecommendationCandidate]:
+        """Online recommendations for a user without materialized scores, folding them in first."""
+
+        model_version = await ModelVersionService(self.session).resolve(model_version)
+        await self.refresh([user_id], model_version=model_version)
+        seen = await self.affinity.fetch(user_id)
+        return await self.recommender.recommend(
+            user_id, model_version=model_version, limit=limit, exclude_item_ids=seen
+        )
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import uuid
+from typing import Sequence
+
+from app.core.cache import get_redis_client
+from app.core.config import settings
+from app.schemas.interaction import InteractionCreate
+
+PAYLOAD_FIELD = "payload"
+
+
+def with_idempotency_key(event: InteractionCreate) -> InteractionCreate:
+    """Give ``event`` a key if the client did not, so stream redelivery cannot duplicate it."""
+
+    if event.idempotency_key:
+        return event
+    return event.model_copy(update={"idempotency_key": uuid.uuid4().hex})
+
+
+class InteractionBuffer:
+    """Write-behind producer appending validated interactions to a Redis stream.
+
+    The stream is drained into Postgres by :class:`app.workers.interaction_stream.InteractionStreamWorker`.
+    """
+
+    async def publish(self, events: Sequence[InteractionCreate]) -> list[str]:
+        """``XADD`` every event in one pipelined round trip and return the stream entry ids."""
+
+        if not events:
+            return []
+        redis = await get_redis_client()
+        async with redis.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.xadd(
+                    settings.interaction_stream_key,
+                    {PAYLOAD_FIELD: with_idempotency_key(event).model_dump_json()},
+                    maxlen=settings.interaction_stream_maxlen,
+                    approximate=True,
+                )
+            return list(await pipe.execute())
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import json
+import uuid
+from typing import Any, Sequence
+
+import structlog
+from fastapi import HTTPException, status
+from sqlalchemy import any_, bindparam, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.ids import uuid7
+from app.models import Interaction, Item, User
+from app.schemas.interaction import InteractionCreate
+from app.services.affinity import AffinityService, decay_rate, merge_affinity_sql
+
+logger = structlog.get_logger(__name__)
+
+COPY_COLUMNS: tuple[str, ...] = (
+    "id",
+    "user_id",
+    "item_id",
+    "event_type",
+    "event_at",
+    "weight",
+    "rating",
+    "source",
+    "metadata_json",
+    "idempotency_key",
+)
+
+
+def to_copy_record(event: InteractionCreate) -> tuple[Any, ...]:
+    """Flatten a validated event into a row matching :data:`COPY_COLUMNS`."""
+
+    return (
+        uuid7(),
+        event.user_id,
+        event.item_id,
+        event.event_type.value,
+        event.event_at,
+        event.weight,
+        event.rating,
+        event.source,
+        json.dumps(event.metadata_json),
+        event.idempotency_key,
+    )
+
+
+class InteractionIngestionService:
+    """Bulk interaction writes streamed to PostgreSQL with ``COPY`` instead of ORM inserts."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.affinity = AffinityService(session)
+
+    async def _existing_ids(self, model: type[User] | type[Item], ids: set[uuid.UUID]) -> set[uuid.UUID]:
+        stmt = select(model.id).where(
+            model.id == any_(bindparam("ids", list(ids), type_=ARRAY(PG_UUID(as_uuid=True))))
+        )
+        return set((await self.session.scalars(stmt)).all())
+
+    async def validate_references(self, events: Sequence[InteractionCreate]) -> None:
+        """Reject the batch if any user or item is unknown, using one query per table."""
+
+        user_ids = {event.user_id for event in events}
+        item_ids = {event.item_id for event in events}
+        missing_users = user_ids - await self._existing_ids(User, user_ids)
+        missing_items = item_ids - await self._existing_ids(Item, item_ids)
+        if missing_users or missing_items:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={
+                    "message": "Unknown users or items referenced",
+                    "user_ids": sorted(str(user_id) for user_id in missing_users),
+                    "item_ids": sorted(str(item_id) for item_id in missing_items),
+                },
+            )
+
+    async def copy_records(self, records: Sequence[tuple[Any, ...]], *, table: str = Interaction.__tablename__) -> None:
+        """Stream ``records`` through the session's own connection, inside its transaction."""
+
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(table, records=records, columns=COPY_COLUMNS)
+
+    async def copy_deduplicated(self, records: Sequence[tuple[Any, ...]]) -> set[uuid.UUID]:
+        """``COPY`` into a temporary staging table, then merge rows not seen before.
+
+        Rows whose idempotency key already exists, and rows referencing users or items that
+        no longer exist, are skipped instead of failing the whole batch; only the rows actually
+        inserted are folded into the affinity rollup. Returns the ids of the rows inserted.
+        """
+
+        staging = f"interactions_staging_{uuid.uuid4().hex[:12]}"
+        columns = ", ".join(COPY_COLUMNS)
+        await self.session.execute(
+            text(f"CREATE TEMPORARY TABLE {staging} (LIKE interactions INCLUDING DEFAULTS) ON COMMIT DROP")
+        )
+        await self.copy_records(records, table=staging)
+        inserted = await self.session.scalars(
+            text(
+                f"""
+                WITH inserted AS (
+                    INSERT INTO interactions ({columns})
+                    SELECT {columns} FROM {staging} AS staged
+                    WHERE EXISTS (SELECT 1 FROM users WHERE users.id = staged.user_id)
+                      AND EXISTS (SELECT 1 FROM items WHERE items.id = staged.item_id)
+                    ON CONFLICT (idempotency_key, event_at) DO NOTHING
+                    RETURNING id, user_id, item_id, weight, event_at
+                ),
+                rollup AS ({merge_affinity_sql("inserted")})
+                SELECT id FROM inserted
+                """
+            )
+            .bindparams(decay_rate=decay_rate())
+            .columns(id=PG_UUID(as_uuid=True))
+        )
+        return set(inserted.all())
+
+    async def insert_events(
+        self,
+        events: Sequence[InteractionCreate],
+        *,
+        validate: bool = True,
+        deduplicate: bool | None = None,
+    ) -> list[InteractionCreate]:
+        """Write ``events`` with a single ``COPY`` and update the affinity rollup.
+
+        Returns the events actually inserted, in order: with ``deduplicate`` (the default when
+        any event carries an idempotency key) replays and rows referencing deleted users or
+        items are left out. The caller owns the commit.
+        """
+
+        if not events:
+            return []
+        if validate:
+            await self.validate_references(events)
+        if deduplicate is None:
+            deduplicate = any(event.idempotency_key for event in events)
+        records = [to_copy_record(event) for event in events]
+        if deduplicate:
+            inserted_ids = await self.copy_deduplicated(records)
+            inserted = [event for event, record in zip(events, records) if record[0] in inserted_ids]
+        else:
+            await self.copy_records(records)
+            await self.affinity.apply_events(
+                [event.user_id for event in events],
+                [event.item_id for event in events],
+                [event.weight for event in events],
+                [event.event_at for event in events],
+            )
+            inserted = list(events)
+        logger.info("interactions.ingested", rows=len(events), inserted=len(inserted))
+        return inserted
+
+    async def ingest(
+        self,
+        events: Sequence[InteractionCreate],
+        *,
+        validate: bool = True,
+        deduplicate: bool | None = None,
+    ) -> int:
+        """Write ``events`` like :meth:`insert_events`; returns the number of rows inserted."""
+
+        return len(await self.insert_events(events, validate=validate, deduplicate=deduplicate))
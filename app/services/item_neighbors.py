@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import uuid
+from collections import defaultdict
+from datetime import UTC, datetime
+from typing import Iterable, Mapping, Sequence
+
+from sqlalchemy import BindParameter, any_, bindparam, delete, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ItemNeighbor, NeighborKind
+from app.services.feature_store import FeatureStoreService, RecommendationCandidate
+
+Neighbors = list[tuple[uuid.UUID, float]]
+
+# asyncpg caps a statement at 32767 bind parameters; an upserted row binds five.
+_UPSERT_CHUNK = 5_000
+
+
+def _uuid_array(name: str, values: Iterable[uuid.UUID]) -> BindParameter[Sequence[uuid.UUID]]:
+    return bindparam(name, list(values), type_=ARRAY(PG_UUID(as_uuid=True)))
+
+
+class ItemNeighborService:
+    """Reads and writes the precomputed neighbour lists in ``item_neighbors``."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def fetch(
+        self,
+        item_ids: Sequence[uuid.UUID],
+        kind: NeighborKind,
+        *,
+        limit: int | None = None,
+    ) -> dict[uuid.UUID, Neighbors]:
+        """Neighbour list per seed item, best first; one primary-key lookup per seed."""
+
+        if not item_ids:
+            return {}
+        neighbor_ids = ItemNeighbor.neighbor_ids if limit is None else ItemNeighbor.neighbor_ids[1:limit]
+        scores = ItemNeighbor.scores if limit is None else ItemNeighbor.scores[1:limit]
+        stmt = select(ItemNeighbor.item_id, neighbor_ids, scores).where(
+            ItemNeighbor.kind == kind, ItemNeighbor.item_id == any_(_uuid_array("item_ids", item_ids))
+        )
+        rows = (await self.session.execute(stmt)).all()
+        return {item_id: list(zip(ids, map(float, values))) for item_id, ids, values in rows}
+
+    async def referencing(self, item_ids: Sequence[uuid.UUID], kind: NeighborKind) -> dict[uuid.UUID, Neighbors]:
+        """Every list of ``kind`` that contains one of ``item_ids`` as a neighbour (GIN-indexed)."""
+
+        if not item_ids:
+            return {}
+        stmt = select(ItemNeighbor.item_id, ItemNeighbor.neighbor_ids, ItemNeighbor.scores).where(
+            ItemNeighbor.kind == kind, ItemNeighbor.neighbor_ids.overlap(_uuid_array("item_ids", item_ids))
+        )
+        rows = (await self.session.execute(stmt)).all()
+        return {item_id: list(zip(ids, map(float, values))) for item_id, ids, values in rows}
+
+    async def upsert(self, kind: NeighborKind, neighbors: Mapping[uuid.UUID, Neighbors]) -> int:
+        """Insert or replace the lists of a few items; empty lists delete the row instead."""
+
+        computed_at = datetime.now(tz=UTC)
+        empty = [item_id for item_id, pairs in neighbors.items() if not pairs]
+        rows = [
+            {
+                "item_id": item_id,
+                "kind": kind,
+                "neighbor_ids": [neighbor_id for neighbor_id, _ in pairs],
+                "scores": [float(score) for _, score in pairs],
+                "computed_at": computed_at,
+            }
+            for item_id, pairs in neighbors.items()
+            if pairs
+        ]
+        await self.delete(kind, empty)
+        for start in range(0, len(rows), _UPSERT_CHUNK):
+            stmt = insert(ItemNeighbor).values(rows[start : start + _UPSERT_CHUNK])
+            await self.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[ItemNeighbor.item_id, ItemNeighbor.kind],
+                    set_={
+                        "neighbor_ids": stmt.excluded.neighbor_ids,
+                        "scores": stmt.excluded.scores,
+                        "computed_at": stmt.excluded.computed_at,
+                        "updated_at": func.now(),
+                    },
+                )
+            )
+        return len(rows)
+
+    async def delete(self, kind: NeighborKind, item_ids: Sequence[uuid.UUID]) -> None:
+        if item_ids:
+            await self.session.execute(
+                delete(ItemNeighbor).where(
+                    ItemNeighbor.kind == kind, ItemNeighbor.item_id == any_(_uuid_array("item_ids", item_ids))
+                )
+            )
+
+    async def replace_all(
+        self,
+        kind: NeighborKind,
+        neighbors: Iterable[tuple[uuid.UUID, Neighbors]],
+        *,
+        chunk_size: int = 10_000,
+    ) -> int:
+        """Swap every list of ``kind`` for ``neighbors`` via ``COPY``; readers see the old lists until commit."""
+
+        await self.session.execute(delete(ItemNeighbor).where(ItemNeighbor.kind == kind))
+        connection = await (await self.session.connection()).get_raw_connection()
+        columns = ("item_id", "kind", "neighbor_ids", "scores", "computed_at")
+        computed_at = datetime.now(tz=UTC)
+        written = 0
+        records: list[tuple[object, ...]] = []
+        for item_id, pairs in neighbors:
+            if not pairs:
+                continue
+            records.append(
+                (
+                    item_id,
+                    kind.value,
+                    [neighbor_id for neighbor_id, _ in pairs],
+                    [float(score) for _, score in pairs],
+                    computed_at,
+                )
+            )
+            if len(records) >= chunk_size:
+                await connection.driver_connection.copy_records_to_table(
+                    ItemNeighbor.__tablename__, records=records, columns=columns
+                )
+                written += len(records)
+                records = []
+        if records:
+            await connection.driver_connection.copy_records_to_table(
+                ItemNeighbor.__tablename__, records=records, columns=columns
+            )
+            written += len(records)
+        return written
+
+
+class NeighborRetriever:
+    """Candidates from precomputed neighbour lists: one primary-key read per seed item, no embeddings.
+
+    Scores of items reached from several seeds are summed, so items related to more of the
+    seeds rank first.
+    """
+
+    def __init__(self, session: AsyncSession, kind: NeighborKind = NeighborKind.COVISIT):
+        self.session = session
+        self.kind = kind
+        self.neighbors = ItemNeighborService(session)
+        self.feature_store = FeatureStoreService(session)
+
+    async def retrieve(
+        self,
+        seed_item_ids: Sequence[uuid.UUID],
+        *,
+        limit: int = 20,
+        exclude_item_ids: Iterable[uuid.UUID] | None = None,
+    ) -> list[RecommendationCandidate]:
+        excluded = set(seed_item_ids) | set(exclude_item_ids or ())
+        scores: dict[uuid.UUID, float] = defaultdict(float)
+        for pairs in (await self.neighbors.fetch(seed_item_ids, self.kind)).values():
+            for neighbor_id, score in pairs:
+                if neighbor_id not in excluded:
+                    scores[neighbor_id] += score
+        # Over-fetch a little: some neighbours may have gone out of stock since the lists were built.
+        ranked = sorted(scores, key=scores.__getitem__, reverse=True)[: limit * 2]
+        items = await self.feature_store.fetch_items(ranked)
+        eligible = [
+            items[item_id]
+            for item_id in ranked
+            if item_id in items and items[item_id].is_active and items[item_id].inventory_count > 0
+        ]
+        return [
+            RecommendationCandidate(
+                item=item,
+                score=scores[item.id],
+                rank=rank,
+                explanation={self.kind.value: scores[item.id]},
+            )
+            for rank, item in enumerate(eligible[:limit], start=1)
+        ]
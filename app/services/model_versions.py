@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from datetime import UTC, datetime, timedelta
+from typing import Any, Iterable, Sequence
+
+import structlog
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import ItemEmbedding, ModelVersion, ModelVersionStatus, RecommendationScore, UserEmbedding
+
+logger = structlog.get_logger(__name__)
+
+SCORES_TABLE = RecommendationScore.__tablename__
+SCORE_COPY_COLUMNS: tuple[str, ...] = (
+    "id",
+    "user_id",
+    "item_id",
+    "model_version",
+    "score",
+    "rank",
+    "explanation",
+    "computed_at",
+)
+
+_live_version: TTLCache[str, str] = TTLCache(max_entries=1, ttl_seconds=settings.live_model_version_ttl_seconds)
+
+
+def partition_name(model_version: str) -> str:
+    """Table name for a version's scores: readable prefix plus a digest, within the 63-byte limit."""
+
+    slug = re.sub(r"[^a-z0-9]+", "_", model_version.lower()).strip("_")[:24]
+    digest = hashlib.sha1(model_version.encode("utf-8")).hexdigest()[:8]
+    return f"fs_scores_{slug}_{digest}"
+
+
+def _literal(value: str) -> str:
+    """Quote ``value`` for DDL, where partition bounds cannot be bind parameters."""
+
+    return "'" + value.replace("'", "''") + "'"
+
+
+class ModelVersionService:
+    """Publishes score batches as whole partitions and resolves the live model version.
+
+    A batch run registers a ``building`` version, streams its scores with ``COPY`` into a
+    detached table, builds that table's indexes and constraints, and then attaches it and
+    moves the live pointer in one short transaction. Readers never see a half-loaded version.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def live_version(self, *, refresh: bool = False) -> str:
+        """The version served when a request does not pin one; cached per process briefly."""
+
+        cached = None if refresh else _live_version.get("live")
+        if cached is not None:
+            return cached
+        version = await self.session.scalar(
+            select(ModelVersion.model_version).where(ModelVersion.status == ModelVersionStatus.LIVE)
+        )
+        version = version or settings.default_model_version
+        _live_version.set("live", version)
+        return version
+
+    async def resolve(self, model_version: str | None) -> str:
+        return model_version or await self.live_version()
+
+    async def get(self, model_version: str) -> ModelVersion | None:
+        return await self.session.get(ModelVersion, model_version, populate_existing=True)
+
+    async def _require(self, model_version: str, *statuses: ModelVersionStatus) -> ModelVersion:
+        record = await self.get(model_version)
+        if record is None:
+            raise LookupError(f"Unknown model version {model_version!r}")
+        if statuses and record.status not in statuses:
+            raise ValueError(f"Model version {model_version!r} is {record.status.value}")
+        return record
+
+    async def _table_exists(self, name: str) -> bool:
+        return await self.session.scalar(text("SELECT to_regclass(:name) IS NOT NULL").bindparams(name=name))
+
+    async def _constraint_exists(self, table: str, constraint: str) -> bool:
+        return await self.session.scalar(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = to_regclass(:table) AND conname = :name)"
+            ).bindparams(table=table, name=constraint)
+        )
+
+    async def ensure_partition(self, model_version: str) -> None:
+        """Make ``model_version`` writable row by row, creating an empty attached partition.
+
+        For small ad hoc writes; batch runs should go through :meth:`begin_build`.
+        """
+
+        record = await self.get(model_version)
+        if record is not None:
+            if record.status == ModelVersionStatus.BUILDING:
+                raise ValueError(f"Model version {model_version!r} is still being built; publish it first")
+            return
+        name = partition_name(model_version)
+        # Concurrent callers serialize on the registry row; only the one that inserts it creates the table.
+        created = await self.session.scalar(
+            insert(ModelVersion)
+            .values(
+                model_version=model_version,
+                status=ModelVersionStatus.PUBLISHED,
+                partition_name=name,
+                published_at=datetime.now(tz=UTC),
+            )
+            .on_conflict_do_nothing(index_elements=[ModelVersion.model_version])
+            .returning(ModelVersion.model_version)
+        )
+        if created is not None and not await self._table_exists(name):
+            await self.session.execute(
+                text(f"CREATE TABLE {name} PARTITION OF {SCORES_TABLE} FOR VALUES IN ({_literal(model_version)})")
+            )
+            logger.info("model_versions.partition_created", model_version=model_version, partition=name)
+
+    async def begin_build(self, model_version: str) -> str:
+        """Register ``model_version`` and create its empty, detached staging table."""
+
+        if await self.get(model_version) is not None:
+            raise ValueError(f"Model version {model_version!r} already exists")
+        name = partition_name(model_version)
+        if await self._table_exists(name):
+            raise ValueError(f"Table {name} for model version {model_version!r} exists but is not registered")
+        self.session.add(ModelVersion(model_version=model_version, partition_name=name))
+        await self.session.flush()
+        # Indexes are built once after loading, which is far cheaper than maintaining them per row.
+        await self.session.execute(text(f"CREATE TABLE {name} (LIKE {SCORES_TABLE} INCLUDING DEFAULTS)"))
+        # Proves the partition bound up front, so ATTACH can skip its validation scan.
+        await self.session.execute(
+            text(f"ALTER TABLE {name} ADD CONSTRAINT {name}_version CHECK (model_version = {_literal(model_version)})")
+        )
+        logger.info("model_versions.build_started", model_version=model_version, staging=name)
+        return name
+
+    async def copy_scores(self, model_version: str, records: Sequence[tuple[Any, ...]]) -> int:
+        """``COPY`` rows matching :data:`SCORE_COPY_COLUMNS` into the version's staging table."""
+
+        record = await self._require(model_version, ModelVersionStatus.BUILDING)
+        connection = await (await self.session.connection()).get_raw_connection()
+        await connection.driver_connection.copy_records_to_table(
+            record.partition_name, records=records, columns=SCORE_COPY_COLUMNS
+        )
+        record.score_count += len(records)
+        return len(records)
+
+    async def publish(self, model_version: str, *, make_live: bool = True) -> None:
+        """Index, attach and (by default) switch readers to a fully loaded version.
+
+        Index builds and foreign-key validation run against the detached table and are
+        committed first. The final transaction only attaches the pre-validated table and
+        updates the registry, so readers go from the old version to the new one atomically.
+        Every step checks what an earlier attempt already built, so a publish that failed,
+        say on the attach's lock timeout, can simply be called again.
+        """
+
+        record = await self._require(model_version, ModelVersionStatus.BUILDING)
+        name = record.partition_name
+        if not await self._constraint_exists(name, f"{name}_pkey"):
+            await self.session.execute(
+                text(f"ALTER TABLE {name} ADD CONSTRAINT {name}_pkey PRIMARY KEY (id, model_version)")
+            )
+        await self.session.execute(
+            text(f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_user_item ON {name} (user_id, item_id, model_version)")
+        )
+        # NOT VALID + VALIDATE keeps the lock on users/items short while the scan runs.
+        for column, parent in (("user_id", "users"), ("item_id", "items")):
+            constraint = f"{name}_{column}_fkey"
+            if not await self._constraint_exists(name, constraint):
+                await self.session.execute(
+                    text(
+                        f"ALTER TABLE {name} ADD CONSTRAINT {constraint} FOREIGN KEY ({column}) "
+                        f"REFERENCES {parent} (id) ON DELETE CASCADE NOT VALID"
+                    )
+                )
+            # A no-op for a constraint an earlier attempt already validated.
+            await self.session.execute(text(f"ALTER TABLE {name} VALIDATE CONSTRAINT {constraint}"))
+        await self.session.execute(text(f"ANALYZE {name}"))
+        await self.session.commit()
+
+        await self.session.execute(text("SET LOCAL lock_timeout = '5s'"))
+        await self.session.execute(
+            text(f"ALTER TABLE {SCORES_TABLE} ATTACH PARTITION {name} FOR VALUES IN ({_literal(model_version)})")
+        )
+        record = await self._require(model_version, ModelVersionStatus.BUILDING)
+        record.status = ModelVersionStatus.PUBLISHED
+        record.published_at = datetime.now(tz=UTC)
+        await self.session.flush()
+        if make_live:
+            await self._make_live(model_version)
+        await self.session.commit()
+        if make_live:
+            _live_version.set("live", model_version)
+        logger.info("model_versions.published", model_version=model_version, scores=record.score_count, live=make_live)
+
+    async def activate(self, model_version: str) -> None:
+        """Point readers at an attached version, e.g. to roll back to a retired one."""
+
+        await self._require(model_version, ModelVersionStatus.PUBLISHED, ModelVersionStatus.RETIRED)
+        await self._make_live(model_version)
+        await self.session.commit()
+        _live_version.set("live", model_version)
+        logger.info("model_versions.activated", model_version=model_version)
+
+    async def _make_live(self, model_version: str) -> None:
+        """Move the live pointer in the session's transaction; callers update the process cache after commit."""
+
+        now = datetime.now(tz=UTC)
+        # Retire first: the partial unique index allows a single live row at any moment.
+        await self.session.execute(
+            update(ModelVersion)
+            .where(ModelVersion.status == ModelVersionStatus.LIVE)
+            .values(status=ModelVersionStatus.RETIRED, retired_at=now)
+        )
+        await self.session.execute(
+            update(ModelVersion)
+            .where(ModelVersion.model_version == model_version)
+            .values(status=ModelVersionStatus.LIVE, retired_at=None)
+        )
+
+    async def publish_scores(
+        self,
+        model_version: str,
+        batches: Iterable[Sequence[tuple[Any, ...]]],
+        *,
+        make_live: bool = True,
+    ) -> int:
+        """Build and publish a version from batches of ``COPY`` rows; returns rows loaded."""
+
+        await self.begin_build(model_version)
+        await self.session.commit()
+        loaded = 0
+        for batch in batches:
+            loaded += await self.copy_scores(model_version, batch)
+            await self.session.commit()
+        await self.publish(model_version, make_live=make_live)
+        return loaded
+
+    async def collect_garbage(self, *, keep: int | None = None) -> list[str]:
+        """Drop retired versions beyond the newest ``keep`` and builds abandoned mid-load.
+
+        A version's embeddings go with its scores.
+        """
+
+        keep = settings.model_versions_retained if keep is None else keep
+        retired = (
+            await self.session.scalars(
+                select(ModelVersion)
+                .where(ModelVersion.status == ModelVersionStatus.RETIRED)
+                .order_by(ModelVersion.retired_at.desc())
+                .offset(keep)
+            )
+        ).all()
+        cutoff = datetime.now(tz=UTC) - timedelta(hours=settings.model_version_build_timeout_hours)
+        abandoned = (
+            await self.session.scalars(
+                select(ModelVersion).where(
+                    ModelVersion.status == ModelVersionStatus.BUILDING,
+                    ModelVersion.created_at < cutoff,
+                )
+            )
+        ).all()
+        dropped: list[str] = []
+        for record in [*retired, *abandoned]:
+            await self._drop(record)
+            dropped.append(record.model_version)
+        return dropped
+
+    async def abandon(self, model_version: str) -> None:
+        """Drop a version that is still ``building`` now, rather than leaving it to the GC timeout.
+
+        For a failed load: its staging table, its embeddings and its registry row all go.
+        """
+
+        await self._drop(await self._require(model_version, ModelVersionStatus.BUILDING))
+
+    async def _drop(self, record: ModelVersion) -> None:
+        version, name = record.model_version, record.partition_name
+        if record.status != ModelVersionStatus.BUILDING:
+            # DETACH briefly locks the parent; give up rather than queue behind long readers.
+            await self.session.execute(text("SET LOCAL lock_timeout = '5s'"))
+            await self.session.execute(text(f"ALTER TABLE {SCORES_TABLE} DETACH PARTITION {name}"))
+        await self.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        for model in (UserEmbedding, ItemEmbedding):
+            await self.session.execute(delete(model).where(model.model_version == version))
+        await self.session.delete(record)
+        await self.session.commit()
+        logger.info("model_versions.dropped", model_version=version, partition=name)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+from typing import Callable
+
+import structlog
+from sqlalchemy import ColumnElement, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.core.config import settings
+from app.services.affinity import decay_rate, retire_affinity_sql
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class PartitionedTable:
+    """A table range-partitioned by month on ``column``."""
+
+    name: str
+    column: str
+    retention_months: Callable[[], int]
+    # Whether rows feed ``user_item_affinity``, which must forget them when they expire.
+    rolled_up: bool = False
+
+    @property
+    def default_partition(self) -> str:
+        return f"{self.name}_default"
+
+    def partition_name(self, month: date) -> str:
+        return f"{self.name}_p{month:%Y%m}"
+
+    @property
+    def partition_pattern(self) -> re.Pattern[str]:
+        return re.compile(rf"^{re.escape(self.name)}_p(\d{{4}})(\d{{2}})$")
+
+
+PARTITIONED_TABLES: tuple[PartitionedTable, ...] = (
+    PartitionedTable("interactions", "event_at", lambda: settings.interactions_retention_months, rolled_up=True),
+    PartitionedTable("event_logs", "occurred_at", lambda: settings.event_logs_retention_months),
+)
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month: date) -> tuple[datetime, datetime]:
+    """UTC ``[start, end)`` of the calendar month containing ``month``."""
+
+    start = month_start(month)
+    end = add_months(start, 1)
+    return datetime(start.year, start.month, 1, tzinfo=UTC), datetime(end.year, end.month, 1, tzinfo=UTC)
+
+
+def time_window(
+    column: ColumnElement[datetime] | InstrumentedAttribute[datetime],
+    since: datetime,
+    until: datetime | None = None,
+) -> ColumnElement[bool]:
+    """Half-open ``[since, until)`` predicate on a partition key.
+
+    Bounding partitioned scans this way lets the planner (or executor, for bound parameters)
+    skip every partition outside the window; predicates wrapping the column in a function or
+    cast defeat pruning.
+    """
+
+    predicate = column >= since
+    if until is not None:
+        predicate = predicate & (column < until)
+    return predicate
+
+
+class PartitionManager:
+    """Creates monthly partitions ahead of time and retires the ones past retention."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def partitions(self, table: PartitionedTable) -> dict[date, str]:
+        """Return ``month -> partition name`` for the monthly partitions attached to ``table``."""
+
+        rows = await self.session.execute(
+            text(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = :table
+                """
+            ).bindparams(table=table.name)
+        )
+        months: dict[date, str] = {}
+        for (name,) in rows.all():
+            match = table.partition_pattern.match(name)
+            if match:
+                months[date(int(match.group(1)), int(match.group(2)), 1)] = name
+        return months
+
+    async def create_partition(self, table: PartitionedTable, month: date) -> str:
+        """Create the partition for ``month``, moving matching rows out of the default partition.
+
+        Rows that landed in the default partition (late or far-future events) would make a
+        plain ``CREATE TABLE ... PARTITION OF`` fail, so they are moved into the new table
+        before it is attached.
+        """
+
+        name = table.partition_name(month)
+        lower, upper = month_bounds(month)
+        bounds = {"lower": lower, "upper": upper}
+        await self.session.execute(
+            text(f"CREATE TABLE {name} (LIKE {table.name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        )
+        await self.session.execute(
+            text(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {table.default_partition}
+                    WHERE {table.column} >= :lower AND {table.column} < :upper
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+                """
+            ).bindparams(**bounds)
+        )
+        # Attaching validates the bound against the new table and the default partition.
+        await self.session.execute(
+            text(
+                f"ALTER TABLE {table.name} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+        )
+        logger.info("partitions.created", table=table.name, partition=name)
+        return name
+
+    async def ensure_partitions(
+        self,
+        table: PartitionedTable,
+        *,
+        start: date | None = None,
+        ahead: int | None = None,
+    ) -> list[str]:
+        """Make sure every month from ``start`` (default: now) to ``ahead`` months out exists."""
+
+        current = month_start(datetime.now(tz=UTC))
+        first = month_start(start) if start is not None else current
+        last = add_months(current, settings.partition_premake_months if ahead is None else ahead)
+        existing = await self.partitions(table)
+        created: list[str] = []
+        month = first
+        while month <= last:
+            if month not in existing:
+                created.append(await self.create_partition(table, month))
+            month = add_months(month, 1)
+        return created
+
+    async def apply_retention(self, table: PartitionedTable, *, keep_months: int | None = None) -> list[str]:
+        """Detach and drop partitions that end before the retention cutoff.
+
+        Dropping a whole partition is a metadata operation, unlike a bulk ``DELETE`` that
+        leaves dead tuples and index bloat behind for vacuum. For a rolled-up table the
+        expired rows are first subtracted from ``user_item_affinity``, so the rollup keeps
+        matching what :meth:`AffinityService.rebuild` would compute from what remains.
+        """
+
+        keep_months = table.retention_months() if keep_months is None else keep_months
+        cutoff = add_months(month_start(datetime.now(tz=UTC)), -keep_months)
+        cutoff_at = month_bounds(cutoff)[0]
+        expired = sorted(name for month, name in (await self.partitions(table)).items() if month < cutoff)
+        if expired:
+            # DETACH takes an ACCESS EXCLUSIVE lock on the parent; fail fast rather than queue
+            # behind long-running readers and stall every writer behind us.
+            await self.session.execute(text("SET LOCAL lock_timeout = '5s'"))
+        if table.rolled_up:
+            # As in AffinityService.rebuild: wait for in-flight ingests, hold new ones off until
+            # the subtraction is written, so no concurrent upsert is lost or deadlocks with it.
+            await self.session.execute(text("LOCK TABLE user_item_affinity IN SHARE ROW EXCLUSIVE MODE"))
+        dropped: list[str] = []
+        for name in expired:
+            if table.rolled_up:
+                await self.session.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+                expired_rows = f"(SELECT user_id, item_id, weight, event_at FROM {name}) AS expired_rows"
+                await self.session.execute(
+                    text(retire_affinity_sql(expired_rows)).bindparams(decay_rate=decay_rate())
+                )
+            await self.session.execute(text(f"ALTER TABLE {table.name} DETACH PARTITION {name}"))
+            await self.session.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+            logger.info("partitions.dropped", table=table.name, partition=name)
+        purge = f"DELETE FROM {table.default_partition} WHERE {table.column} < :cutoff"
+        if table.rolled_up:
+            statement = text(
+                retire_affinity_sql(
+                    "purged", preceding=f"purged AS ({purge} RETURNING user_id, item_id, weight, event_at)"
+                )
+            ).bindparams(bindparam("cutoff", cutoff_at), decay_rate=decay_rate())
+        else:
+            statement = text(purge).bindparams(bindparam("cutoff", cutoff_at))
+        await self.session.execute(statement)
+        return dropped
+
+    async def maintain(self) -> dict[str, dict[str, list[str]]]:
+        """Run creation and retention for every partitioned table, committing per table."""
+
+        report: dict[str, dict[str, list[str]]] = {}
+        for table in PARTITIONED_TABLES:
+            created = await self.ensure_partitions(table)
+            dropped = await self.apply_retention(table)
+            await self.session.commit()
+            report[table.name] = {"created": created, "dropped": dropped}
+        return report
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from typing import TYPE_CHECKING, Sequence
+
+import structlog
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import (
+    TTLCache,
+    get_redis_client,
+    publish_invalidation,
+    register_invalidation_handler,
+)
+from app.core.config import settings
+from app.schemas.item import ItemRead
+from app.schemas.recommendation import RecommendedItem
+
+if TYPE_CHECKING:  # pragma: no cover - typing imports only
+    from app.services.feature_store import RecommendationCandidate
+
+logger = structlog.get_logger(__name__)
+
+NAMESPACE = "recs"
+_PENDING_INVALIDATIONS = "recommendation_invalidations"
+
+# Strong references to after-commit invalidations; the event loop only keeps weak ones.
+_invalidation_tasks: set[asyncio.Task[None]] = set()
+
+_items_adapter: TypeAdapter[list[RecommendedItem]] = TypeAdapter(list[RecommendedItem])
+
+
+def to_recommended_items(candidates: Sequence[RecommendationCandidate]) -> list[RecommendedItem]:
+    return [
+        RecommendedItem(
+            item=ItemRead.model_validate(candidate.item),
+            score=candidate.score,
+            rank=candidate.rank,
+            explanation=candidate.explanation or {},
+        )
+        for candidate in candidates
+    ]
+
+
+class RecommendationCache:
+    """Two-tier cache of serialized recommendation lists.
+
+    The in-process tier is a small LRU keyed by ``(user_id, model_version)`` holding one list
+    per requested ``limit``; Redis mirrors it as a hash ``recs:{model_version}:{user_id}`` with
+    the limit as field, so one ``DEL`` evicts every limit of a user.
+    """
+
+    def __init__(self, local: TTLCache[tuple[uuid.UUID, str], dict[int, list[RecommendedItem]]] | None = None):
+        self.local = local or TTLCache(
+            max_entries=settings.recommendation_cache_max_entries,
+            ttl_seconds=settings.recommendation_cache_local_ttl_seconds,
+        )
+
+    @staticmethod
+    def redis_key(user_id: uuid.UUID, model_version: str) -> str:
+        return f"{NAMESPACE}:{model_version}:{user_id}"
+
+    async def get(self, user_id: uuid.UUID, model_version: str, limit: int) -> list[RecommendedItem] | None:
+        by_limit = self.local.get((user_id, model_version))
+        if by_limit is not None and limit in by_limit:
+            return by_limit[limit]
+        try:
+            redis = await get_redis_client()
+            payload = await redis.hget(self.redis_key(user_id, model_version), str(limit))
+        except RedisError as exc:
+            logger.warning("recommendation_cache.get_failed", error=str(exc))
+            return None
+        if payload is None:
+            return None
+        items = _items_adapter.validate_json(payload)
+        self._store_local(user_id, model_version, limit, items)
+        return items
+
+    async def set(self, user_id: uuid.UUID, model_version: str, limit: int, items: list[RecommendedItem]) -> None:
+        self._store_local(user_id, model_version, limit, items)
+        key = self.redis_key(user_id, model_version)
+        try:
+            redis = await get_redis_client()
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, str(limit), _items_adapter.dump_json(items).decode("utf-8"))
+                pipe.expire(key, settings.recommendation_cache_ttl_seconds)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("recommendation_cache.set_failed", error=str(exc))
+
+    async def invalidate(self, user_id: uuid.UUID, model_version: str) -> None:
+        self.evict_local(self.redis_key(user_id, model_version))
+        try:
+            redis = await get_redis_client()
+            await redis.delete(self.redis_key(user_id, model_version))
+        except RedisError as exc:
+            logger.warning("recommendation_cache.invalidate_failed", error=str(exc))
+        await publish_invalidation(NAMESPACE, self.redis_key(user_id, model_version))
+
+    def invalidate_after_commit(self, session: AsyncSession, user_id: uuid.UUID, model_version: str) -> None:
+        """Evict a user's lists once ``session`` commits.
+
+        Evicting before the commit would let a concurrent reader re-cache the rows being
+        replaced for the full TTL.
+        """
+
+        sync_session = session.sync_session
+        pending = sync_session.info.setdefault(_PENDING_INVALIDATIONS, set())
+        if not pending:
+            event.listen(sync_session, "after_commit", self._invalidate_pending, once=True)
+        pending.add((user_id, model_version))
+
+    def _invalidate_pending(self, sync_session: Session) -> None:
+        pending: set[tuple[uuid.UUID, str]] = sync_session.info.pop(_PENDING_INVALIDATIONS, set())
+        loop = asyncio.get_running_loop()
+        for user_id, model_version in pending:
+            task = loop.create_task(self.invalidate(user_id, model_version))
+            _invalidation_tasks.add(task)
+            task.add_done_callback(_invalidation_tasks.discard)
+
+    def evict_local(self, redis_key: str) -> None:
+        prefix, user_id = redis_key.rsplit(":", 1)
+        model_version = prefix.split(":", 1)[1]
+        self.local.pop((uuid.UUID(user_id), model_version))
+
+    def _store_local(self, user_id: uuid.UUID, model_version: str, limit: int, items: list[RecommendedItem]) -> None:
+        by_limit = self.local.get((user_id, model_version)) or {}
+        by_limit[limit] = items
+        self.local.set((user_id, model_version), by_limit)
+
+
+_cache: RecommendationCache | None = None
+
+
+def get_recommendation_cache() -> RecommendationCache:
+    """Return the process-wide cache, subscribing it to cross-worker evictions on first use."""
+
+    global _cache
+    if _cache is None:
+        _cache = RecommendationCache()
+        register_invalidation_handler(NAMESPACE, _cache.evict_local)
+    return _cache
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Item
+from app.services.ann_index import top_k
+from app.services.feature_store import FeatureStoreService, RecommendationCandidate
+from app.services.model_versions import ModelVersionService
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(slots=True)
+class ItemMatrix:
+    """Item factors of one model version plus the eligibility mask applied at scoring time."""
+
+    model_version: str
+    item_ids: list[uuid.UUID]
+    vectors: np.ndarray
+    eligible: np.ndarray
+    loaded_at: float = field(default_factory=time.monotonic)
+    _rows: dict[uuid.UUID, int] | None = None
+    _gram: np.ndarray | None = None
+
+    @property
+    def ineligible_rows(self) -> np.ndarray:
+        return np.flatnonzero(~self.eligible)
+
+    def gram(self) -> np.ndarray:
+        """``YᵀY`` over all item factors; computed once per loaded matrix for fold-in solves."""
+
+        if self._gram is None:
+            self._gram = np.asarray(self.vectors.T @ self.vectors, dtype=np.float64)
+        return self._gram
+
+    def row_index(self) -> dict[uuid.UUID, int]:
+        if self._rows is None:
+            self._rows = {item_id: row for row, item_id in enumerate(self.item_ids)}
+        return self._rows
+
+    def rows_for(self, item_ids: Iterable[uuid.UUID]) -> np.ndarray:
+        rows = self.row_index()
+        return np.fromiter((rows[item_id] for item_id in item_ids if item_id in rows), dtype=np.int64)
+
+
+_matrices: dict[str, ItemMatrix] = {}
+_matrix_lock = asyncio.Lock()
+
+
+def score_top_k(
+    user_vectors: np.ndarray,
+    matrix: ItemMatrix,
+    k: int,
+    *,
+    excluded_rows: Sequence[np.ndarray] | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Score a batch of users against every item and return ``(rows, scores)`` of the top ``k``.
+
+    Users are processed in blocks so the dense ``users x items`` score matrix never exceeds
+    ``recommender_max_score_cells``; each block is a single BLAS matmul.
+    """
+
+    user_vectors = np.atleast_2d(np.asarray(user_vectors, dtype=np.float32))
+    n_users, n_items = len(user_vectors), len(matrix.item_ids)
+    k = min(k, n_items)
+    rows = np.empty((n_users, k), dtype=np.int64)
+    scores = np.empty((n_users, k), dtype=np.float32)
+    if not n_users or not k:
+        return rows, scores
+
+    ineligible = matrix.ineligible_rows
+    block_size = max(1, settings.recommender_max_score_cells // max(n_items, 1))
+    for start in range(0, n_users, block_size):
+        stop = min(start + block_size, n_users)
+        block_scores = user_vectors[start:stop] @ matrix.vectors.T
+        if len(ineligible):
+            block_scores[:, ineligible] = -np.inf
+        if excluded_rows is not None:
+            for offset, excluded in enumerate(excluded_rows[start:stop]):
+                if len(excluded):
+                    block_scores[offset, excluded] = -np.inf
+        best = top_k(block_scores, k)
+        rows[start:stop] = best
+        scores[start:stop] = np.take_along_axis(block_scores, best, axis=1)
+    return rows, scores
+
+
+class RecommenderService:
+    """Online scoring of user embeddings against the full item matrix."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.feature_store = FeatureStoreService(session)
+
+    async def load_item_matrix(self, model_version: str, *, refresh: bool = False) -> ItemMatrix:
+        matrix = _matrices.get(model_version)
+        if not refresh and matrix is not None and not self._is_stale(matrix):
+            return matrix
+        async with _matrix_lock:
+            matrix = _matrices.get(model_version)
+            if refresh or matrix is None or self._is_stale(matrix):
+                matrix = await self._build_item_matrix(model_version)
+                _matrices[model_version] = matrix
+        return matrix
+
+    @staticmethod
+    def _is_stale(matrix: ItemMatrix) -> bool:
+        return time.monotonic() - matrix.loaded_at > settings.recommender_matrix_ttl_seconds
+
+    async def _build_item_matrix(self, model_version: str) -> ItemMatrix:
+        item_ids, vectors = await self.feature_store.fetch_item_embedding_matrix(model_version)
+        eligible_ids = set(
+            (
+                await self.session.scalars(
+                    select(Item.id).where(Item.is_active.is_(True), Item.inventory_count > 0)
+                )
+            ).all()
+        )
+        eligible = np.fromiter((item_id in eligible_ids for item_id in item_ids), dtype=bool, count=len(item_ids))
+        logger.info(
+            "recommender.item_matrix.loaded",
+            model_version=model_version,
+            items=len(item_ids),
+            eligible=int(eligible.sum()),
+        )
+        return ItemMatrix(model_version=model_version, item_ids=item_ids, vectors=vectors, eligible=eligible)
+
+    async def recommend(
+        self,
+        user_id: uuid.UUID,
+        *,
+        model_version: str | None = None,
+        limit: int = 20,
+        exclude_item_ids: Iterable[uuid.UUID] | None = None,
+    ) -> list[RecommendationCandidate]:
+        excludes = {user_id: exclude_item_ids} if exclude_item_ids is not None else None
+        results = await self.recommend_batch([user_id], model_version=model_version, limit=limit, exclude=excludes)
+        return results.get(user_id, [])
+
+    async def recommend_batch(
+        self,
+        user_ids: Sequence[uuid.UUID],
+        *,
+        model_version: str | None = None,
+        limit: int = 20,
+        exclude: Mapping[uuid.UUID, Iterable[uuid.UUID]] | None = None,
+    ) -> dict[uuid.UUID, list[RecommendationCandidate]]:
+        """Score every user of the batch in one pass; users without an embedding are omitted."""
+
+        model_version = await ModelVersionService(self.session).resolve(model_version)
+        embeddings = await self.feature_store.fetch_user_embeddings(user_ids, model_version=model_version)
+        scored_users = [user_id for user_id in user_ids if user_id in embeddings]
+        if not scored_users:
+            return {}
+        matrix = await self.load_item_matrix(model_version)
+        if not matrix.item_ids:
+            return {user_id: [] for user_id in scored_users}
+
+        user_vectors = np.asarray([embeddings[user_id].embedding for user_id in scored_users], dtype=np.float32)
+        excluded_rows = None
+        if exclude:
+            excluded_rows = [matrix.rows_for(exclude.get(user_id, ())) for user_id in scored_users]
+        rows, scores = score_top_k(user_vectors, matrix, limit, excluded_rows=excluded_rows)
+
+        items = await self.feature_store.fetch_items({matrix.item_ids[row] for row in np.unique(rows)})
+        recommendations: dict[uuid.UUID, list[RecommendationCandidate]] = {}
+        for user_id, user_rows, user_scores in zip(scored_users, rows, scores):
+            candidates: list[RecommendationCandidate] = []
+            for row, score in zip(user_rows.tolist(), user_scores.tolist()):
+                item = items.get(matrix.item_ids[row])
+                if item is None or not np.isfinite(score):
+                    continue
+                candidates.append(
+                    RecommendationCandidate(
+                        item=item,
+                        score=score,
+                        rank=len(candidates) + 1,
+                        explanation={"collaborative": score},
+                    )
+                )
+            recommendations[user_id] = candidates
+        return recommendations
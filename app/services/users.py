@@ -8,8 +8,9 @@ from pydantic import EmailStr
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import hash_password
-from app.models import User, UserRole
+from app.auth.principal import invalidate_principal
+from app.core.security import hash_password_async
+from app.models import LoaderProfile, User, UserRole, loader_options
 
 
 class UserService:
@@ -25,8 +26,8 @@ class UserService:
         total = await self.session.scalar(select(func.count()).select_from(User))
         return users, total or 0
 
-    async def get_user(self, user_id: uuid.UUID) -> User:
-        user = await self.session.get(User, user_id)
+    async def get_user(self, user_id: uuid.UUID, *, profile: LoaderProfile = LoaderProfile.DEFAULT) -> User:
+        user = await self.session.get(User, user_id, options=loader_options(profile))
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return user
@@ -49,7 +50,7 @@ class UserService:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
         user = User(
             email=str(email).lower(),
-            hashed_password=hash_password(password),
+            hashed_password=await hash_password_async(password),
             full_name=full_name,
             role=role,
             is_active=is_active,
@@ -67,10 +68,18 @@ class UserService:
             if value is not None:
                 setattr(user, key, value)
         if password:
-            user.hashed_password = hash_password(str(password))
+            user.hashed_password = await hash_password_async(str(password))
         await self.session.flush()
+        await invalidate_principal(self.session, user.id)
         return user
 
     async def change_password(self, user: User, *, new_password: str) -> None:
-        user.hashed_password = hash_password(new_password)
+        user.hashed_password = await hash_password_async(new_password)
         await self.session.flush()
+        await invalidate_principal(self.session, user.id)
+
+    async def deactivate_user(self, user: User) -> User:
+        user.is_active = False
+        await self.session.flush()
+        await invalidate_principal(self.session, user.id)
+        return user
@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+"""Celery application and scheduled maintenance tasks."""
+
+from .celery_app import celery_app
+
+__all__ = ["celery_app"]
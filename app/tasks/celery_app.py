@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from celery import Celery
+from celery.schedules import crontab
+
+from app.core.config import settings
+
+celery_app = Celery(
+    "ai_recs",
+    broker=settings.celery_broker_url,
+    backend=settings.celery_result_backend,
+    include=["app.tasks.maintenance"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    timezone="UTC",
+    enable_utc=True,
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+)
+
+celery_app.conf.beat_schedule = {
+    "maintain-partitions": {
+        "task": "app.tasks.maintenance.maintain_partitions",
+        "schedule": crontab(hour=3, minute=15),
+    },
+    "collect-model-versions": {
+        "task": "app.tasks.maintenance.collect_model_versions",
+        "schedule": crontab(minute=40),
+    },
+    "rebuild-covisitation": {
+        "task": "app.tasks.maintenance.rebuild_covisitation",
+        "schedule": crontab(hour=2, minute=30),
+    },
+}
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.services.covisitation import CovisitationService
+from app.services.model_versions import ModelVersionService
+from app.services.partitions import PartitionManager
+from app.tasks.celery_app import celery_app
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@asynccontextmanager
+async def task_session() -> AsyncIterator[AsyncSession]:
+    """A session on a throwaway engine; pooled connections cannot outlive ``asyncio.run``."""
+
+    engine = create_async_engine(str(settings.database_url), poolclass=NullPool)
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            yield session
+    finally:
+        await engine.dispose()
+
+
+def run_with_session(fn: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    async def runner() -> T:
+        async with task_session() as session:
+            return await fn(session)
+
+    return asyncio.run(runner())
+
+
+@celery_app.task(name="app.tasks.maintenance.maintain_partitions")
+def maintain_partitions() -> dict[str, dict[str, list[str]]]:
+    """Create upcoming monthly partitions and drop the ones past retention."""
+
+    report = run_with_session(lambda session: PartitionManager(session).maintain())
+    logger.info("partitions.maintained", report=report)
+    return report
+
+
+@celery_app.task(name="app.tasks.maintenance.collect_model_versions")
+def collect_model_versions() -> list[str]:
+    """Drop score partitions of retired model versions beyond the rollback window."""
+
+    dropped = run_with_session(lambda session: ModelVersionService(session).collect_garbage())
+    logger.info("model_versions.collected", dropped=dropped)
+    return dropped
+
+
+@celery_app.task(name="app.tasks.maintenance.rebuild_covisitation")
+def rebuild_covisitation() -> int:
+    """Recompute co-visitation pairs over the lookback window and republish every list."""
+
+    async def rebuild(session: AsyncSession) -> int:
+        lists = await CovisitationService(session).rebuild()
+        await session.commit()
+        return lists
+
+    lists = run_with_session(rebuild)
+    logger.info("covisitation.compacted", lists=lists)
+    return lists
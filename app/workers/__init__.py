@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+"""Long-running background consumers."""
+
+from .interaction_stream import InteractionStreamWorker
+
+__all__ = ["InteractionStreamWorker"]
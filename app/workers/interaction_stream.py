@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+"""Consumer-group worker flushing the buffered interaction stream into Postgres."""
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+import uuid
+from typing import Any
+
+import structlog
+from pydantic import ValidationError
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.cache import close_redis_client, get_redis_client
+from app.core.config import settings
+from app.core.database import async_session_factory, dispose_engine
+from app.core.logging import configure_logging
+from app.core.metrics import (
+    INTERACTION_STREAM_DELAY,
+    INTERACTION_STREAM_EVENTS,
+    INTERACTION_STREAM_FLUSH_DURATION,
+    INTERACTION_STREAM_LAG,
+    INTERACTION_STREAM_PENDING,
+)
+from app.schemas.interaction import InteractionCreate
+from app.services.covisitation import CovisitationService
+from app.services.fold_in import FoldInService
+from app.services.interaction_buffer import PAYLOAD_FIELD
+from app.services.interactions import InteractionIngestionService
+
+logger = structlog.get_logger(__name__)
+
+StreamEntry = tuple[str, dict[str, str]]
+
+LAG_REFRESH_SECONDS = 5.0
+ERROR_BACKOFF_SECONDS = 1.0
+
+
+def entry_age_seconds(entry_id: str) -> float:
+    """Seconds since ``entry_id`` was added; stream ids start with the XADD time in ms."""
+
+    return max(0.0, time.time() - int(entry_id.split("-", 1)[0]) / 1000.0)
+
+
+class InteractionStreamWorker:
+    """Drain the interaction stream in size- or time-bounded batches.
+
+    Entries are acknowledged only after their batch commits, so a crash leaves them pending
+    and another consumer re-claims them with ``XAUTOCLAIM`` (at-least-once delivery). Every
+    event carries an idempotency key and is merged with ``ON CONFLICT DO NOTHING``, which
+    makes redelivery harmless.
+    """
+
+    def __init__(
+        self,
+        *,
+        consumer: str | None = None,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_factory,
+        batch_size: int | None = None,
+        flush_interval_ms: int | None = None,
+    ):
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.interaction_flush_batch_size
+        self.flush_interval = (flush_interval_ms or settings.interaction_flush_interval_ms) / 1000.0
+        self.stream = settings.interaction_stream_key
+        self.group = settings.interaction_stream_group
+        self._buffer: list[StreamEntry] = []
+        self._buffer_started = 0.0
+        self._claim_cursor = "0-0"
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run(), name=f"interaction-stream-{self.consumer}")
+
+    def request_stop(self) -> None:
+        self._stopping.set()
+
+    async def stop(self) -> None:
+        """Stop reading, flush what is buffered and drain the backlog for a bounded time."""
+
+        self.request_stop()
+        if self._task is None:
+            return
+        timeout = settings.interaction_stream_drain_timeout_seconds + self.flush_interval + 5.0
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("interaction_stream.drain_timeout", consumer=self.consumer, buffered=len(self._buffer))
+        except Exception:
+            # A crashed worker must not abort the rest of the caller's shutdown sequence.
+            logger.exception("interaction_stream.crashed", consumer=self.consumer)
+        finally:
+            self._task = None
+
+    async def ensure_group(self, redis: Redis) -> None:
+        try:
+            await redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    async def run(self) -> None:
+        redis = await get_redis_client()
+        claim_every = settings.interaction_claim_idle_ms / 2000.0
+        last_claim = last_lag = 0.0
+        group_ready = False
+        while not self._stopping.is_set():
+            try:
+                # Inside the retry loop: Redis being down at startup delays the worker, not kills it.
+                if not group_ready:
+                    await self.ensure_group(redis)
+                    group_ready = True
+                    logger.info("interaction_stream.started", consumer=self.consumer, group=self.group)
+                now = time.monotonic()
+                if now - last_claim >= claim_every:
+                    await self._reclaim(redis)
+                    last_claim = now
+                await self._read(redis, block_ms=self._block_ms())
+                if self._flush_due():
+                    await self.flush(redis)
+                if now - last_lag >= LAG_REFRESH_SECONDS:
+                    await self.record_lag(redis)
+                    last_lag = now
+            except (RedisError, SQLAlchemyError, OSError) as exc:
+                # Unacknowledged entries stay pending and are re-claimed after the idle timeout.
+                logger.warning("interaction_stream.batch_failed", error=str(exc), dropped_from_buffer=len(self._buffer))
+                self._buffer.clear()
+                await asyncio.sleep(ERROR_BACKOFF_SECONDS)
+        if group_ready:
+            await self._drain(redis)
+        logger.info("interaction_stream.stopped", consumer=self.consumer)
+
+    async def _drain(self, redis: Redis) -> None:
+        deadline = time.monotonic() + settings.interaction_stream_drain_timeout_seconds
+        try:
+            if self._buffer:
+                await self.flush(redis)
+            while time.monotonic() < deadline:
+                if not await self._read(redis, block_ms=None):
+                    break
+                await self.flush(redis)
+        except (RedisError, SQLAlchemyError, OSError) as exc:
+            logger.warning("interaction_stream.drain_failed", error=str(exc))
+
+    def _block_ms(self) -> int:
+        if not self._buffer:
+            return int(self.flush_interval * 1000)
+        remaining = self.flush_interval - (time.monotonic() - self._buffer_started)
+        return max(1, int(remaining * 1000))
+
+    def _flush_due(self) -> bool:
+        if not self._buffer:
+            return False
+        return len(self._buffer) >= self.batch_size or time.monotonic() - self._buffer_started >= self.flush_interval
+
+    def _extend(self, entries: list[Any]) -> int:
+        added = 0
+        for entry_id, fields in entries:
+            if fields is None:
+                continue
+            if not self._buffer:
+                self._buffer_started = time.monotonic()
+            self._buffer.append((entry_id, fields))
+            added += 1
+        return added
+
+    async def _read(self, redis: Redis, *, block_ms: int | None) -> int:
+        response = await redis.xreadgroup(
+            self.group,
+            self.consumer,
+            {self.stream: ">"},
+            count=max(1, self.batch_size - len(self._buffer)),
+            block=block_ms,
+        )
+        return sum(self._extend(entries) for _, entries in response or ())
+
+    async def _reclaim(self, redis: Redis) -> None:
+        response = await redis.xautoclaim(
+            self.stream,
+            self.group,
+            self.consumer,
+            min_idle_time=settings.interaction_claim_idle_ms,
+            start_id=self._claim_cursor,
+            count=self.batch_size,
+        )
+        self._claim_cursor = response[0]
+        claimed = self._extend(response[1])
+        if claimed:
+            logger.info("interaction_stream.reclaimed", consumer=self.consumer, entries=claimed)
+        # Entries trimmed from the stream while pending come back without fields (Redis 6.2) or
+        # as deleted ids (Redis 7+). Their payload is gone, so acknowledge them rather than
+        # leave them in the pending list forever.
+        trimmed = [entry_id for entry_id, fields in response[1] if fields is None]
+        if len(response) > 2:
+            trimmed.extend(response[2] or ())
+        if trimmed:
+            await redis.xack(self.stream, self.group, *trimmed)
+            INTERACTION_STREAM_EVENTS.labels(outcome="trimmed").inc(len(trimmed))
+            logger.warning("interaction_stream.trimmed_pending", consumer=self.consumer, entries=len(trimmed))
+
+    async def flush(self, redis: Redis) -> int:
+        """Write the buffered batch, then ``XACK`` it; returns rows inserted."""
+
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return 0
+        events: list[InteractionCreate] = []
+        dead: list[tuple[str, dict[str, str], str]] = []
+        for entry_id, fields in batch:
+            try:
+                events.append(InteractionCreate.model_validate_json(fields[PAYLOAD_FIELD]))
+            except (KeyError, ValidationError) as exc:
+                dead.append((entry_id, fields, str(exc)))
+
+        started = time.perf_counter()
+        written: list[InteractionCreate] = []
+        if events:
+            async with self.session_factory() as session:
+                written = await InteractionIngestionService(session).insert_events(
+                    events, validate=False, deduplicate=True
+                )
+                await session.commit()
+        inserted = len(written)
+        async with redis.pipeline(transaction=False) as pipe:
+            for entry_id, fields, error in dead:
+                pipe.xadd(
+                    settings.interaction_stream_dead_letter_key,
+                    {**fields, "source_id": entry_id, "error": error[:1_000]},
+                    maxlen=settings.interaction_stream_maxlen,
+                    approximate=True,
+                )
+            pipe.xack(self.stream, self.group, *(entry_id for entry_id, _ in batch))
+            await pipe.execute()
+
+        INTERACTION_STREAM_FLUSH_DURATION.observe(time.perf_counter() - started)
+        INTERACTION_STREAM_DELAY.observe(entry_age_seconds(min(entry_id for entry_id, _ in batch)))
+        INTERACTION_STREAM_EVENTS.labels(outcome="inserted").inc(inserted)
+        INTERACTION_STREAM_EVENTS.labels(outcome="skipped").inc(len(events) - inserted)
+        INTERACTION_STREAM_EVENTS.labels(outcome="dead_letter").inc(len(dead))
+        logger.debug("interaction_stream.flushed", entries=len(batch), inserted=inserted, dead_letter=len(dead))
+        # Only rows this flush inserted: a redelivered entry would otherwise count its pairs twice.
+        if written and settings.fold_in_stream_enabled:
+            await self.fold_in(list(dict.fromkeys(event.user_id for event in written)))
+        if written and settings.covisit_stream_enabled:
+            await self.covisit(written)
+        return inserted
+
+    async def fold_in(self, user_ids: list[uuid.UUID]) -> None:
+        """Refresh the embeddings of users whose events were just written, after the batch is acked.
+
+        Failures are logged and dropped: the next flush or request for the user folds them in again.
+        """
+
+        try:
+            async with self.session_factory() as session:
+                refreshed = await FoldInService(session).refresh(user_ids, trigger="stream")
+                await session.commit()
+        except (SQLAlchemyError, LookupError, ValueError) as exc:
+            logger.warning("interaction_stream.fold_in_failed", users=len(user_ids), error=str(exc))
+            return
+        logger.debug("interaction_stream.folded_in", users=len(user_ids), refreshed=len(refreshed))
+
+    async def covisit(self, events: list[InteractionCreate]) -> None:
+        """Add the co-visitation pairs completed by a flushed batch; failures wait for the nightly rebuild."""
+
+        try:
+            async with self.session_factory() as session:
+                pairs = await CovisitationService(session).apply_events(events)
+                await session.commit()
+        except SQLAlchemyError as exc:
+            logger.warning("interaction_stream.covisit_failed", events=len(events), error=str(exc))
+            return
+        logger.debug("interaction_stream.covisited", events=len(events), pairs=pairs)
+
+    async def record_lag(self, redis: Redis) -> None:
+        for group in await redis.xinfo_groups(self.stream):
+            if group.get("name") != self.group:
+                continue
+            INTERACTION_STREAM_PENDING.set(group.get("pending") or 0)
+            # ``lag`` is reported by Redis 7+ and is nil while it cannot be computed.
+            if group.get("lag") is not None:
+                INTERACTION_STREAM_LAG.set(group["lag"])
+
+
+async def run_worker() -> None:
+    worker = InteractionStreamWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.request_stop)
+    try:
+        await worker.run()
+    finally:
+        await close_redis_client()
+        await dispose_engine()
+
+
+def main() -> None:
+    configure_logging(level=logging.DEBUG if settings.debug else logging.INFO)
+    asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""Offline training and evaluation pipelines.
+
+The package imports nothing itself; import what you need from its modules, e.g.
+``ml.matrix.build_interaction_matrix``.
+"""
@@ -0,0 +1,403 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from functools import partial
+from pathlib import Path
+from typing import Iterator, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+import structlog
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, CountVectorizer
+from sqlalchemy import any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.models import Item, NeighborKind
+from app.services.ann_index import top_k
+from app.services.embedding_snapshot import array_to_uuids, uuids_to_array
+from app.services.item_neighbors import ItemNeighborService, Neighbors
+
+logger = structlog.get_logger(__name__)
+
+# (title, description, categories, tags, brand)
+ItemDocument = tuple[str, str, Sequence[str], Sequence[str], str | None]
+
+_WORD = re.compile(r"(?u)\b\w\w+\b")
+
+
+def analyze(document: ItemDocument, *, title_weight: int = 2) -> list[str]:
+    """Terms of one item: title and description words, plus one prefixed term per category, tag and brand.
+
+    Prefixing keeps ``brand:apple`` apart from the word "apple"; title words are repeated
+    ``title_weight`` times so a matching title outweighs a matching sentence in a description.
+    """
+
+    title, description, categories, tags, brand = document
+    words = [word for word in _WORD.findall(title.lower()) if word not in ENGLISH_STOP_WORDS]
+    terms = words * title_weight
+    terms.extend(word for word in _WORD.findall(description.lower()) if word not in ENGLISH_STOP_WORDS)
+    terms.extend(f"category:{category.strip().lower()}" for category in categories if category.strip())
+    terms.extend(f"tag:{tag.strip().lower()}" for tag in tags if tag.strip())
+    if brand and brand.strip():
+        terms.append(f"brand:{brand.strip().lower()}")
+    return terms
+
+
+@dataclass(slots=True)
+class ContentParams:
+    title_weight: int = 2
+    min_df: int = 2
+    max_df: float = 0.5
+    max_features: int | None = 200_000
+    sublinear_tf: bool = True
+
+
+def _tfidf(counts: sp.csr_matrix, idf: np.ndarray, *, sublinear_tf: bool) -> sp.csr_matrix:
+    """Weight raw term counts by ``idf`` and L2-normalize each row, so dot products are cosines."""
+
+    weights = counts.astype(np.float32, copy=True).tocsr()
+    if sublinear_tf:
+        np.log(weights.data, out=weights.data)
+        weights.data += 1.0
+    weights.data *= idf[weights.indices]
+    norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+    norms[norms == 0.0] = 1.0
+    weights.data /= np.repeat(norms, np.diff(weights.indptr)).astype(np.float32)
+    return weights
+
+
+@dataclass(slots=True)
+class ContentModel:
+    """TF-IDF vocabulary and item vectors (rows of ``vectors``, L2-normalized, aligned with ``item_ids``).
+
+    The vocabulary and IDF are frozen at :meth:`fit`; :meth:`transform` vectorizes new or
+    edited items against them, so catalog changes never force a refit. Terms that first appear
+    after the fit are ignored until the next full build.
+    """
+
+    item_ids: list[uuid.UUID]
+    vectors: sp.csr_matrix
+    terms: np.ndarray
+    idf: np.ndarray
+    params: ContentParams = field(default_factory=ContentParams)
+    fitted_at: datetime = field(default_factory=lambda: datetime.now(tz=UTC))
+
+    @classmethod
+    def fit(cls, item_ids: list[uuid.UUID], documents: Sequence[ItemDocument], params: ContentParams) -> ContentModel:
+        # A catalog too small for both bounds would make scikit-learn reject every term.
+        max_df = params.max_df if params.max_df * len(documents) >= params.min_df else 1.0
+        vectorizer = CountVectorizer(
+            analyzer=partial(analyze, title_weight=params.title_weight),
+            min_df=min(params.min_df, max(len(documents), 1)),
+            max_df=max_df,
+            max_features=params.max_features,
+            dtype=np.float32,
+        )
+        counts = vectorizer.fit_transform(documents).tocsr()
+        terms = vectorizer.get_feature_names_out()
+        document_frequency = np.bincount(counts.indices, minlength=len(terms))
+        # Smoothed IDF, as scikit-learn's TfidfTransformer computes it.
+        idf = (np.log((1.0 + len(documents)) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+        vectors = _tfidf(counts, idf, sublinear_tf=params.sublinear_tf)
+        return cls(item_ids=list(item_ids), vectors=vectors, terms=terms, idf=idf, params=params)
+
+    def transform(self, documents: Sequence[ItemDocument]) -> sp.csr_matrix:
+        vectorizer = CountVectorizer(
+            analyzer=partial(analyze, title_weight=self.params.title_weight),
+            vocabulary=self.terms,
+            dtype=np.float32,
+        )
+        return _tfidf(vectorizer.transform(documents), self.idf, sublinear_tf=self.params.sublinear_tf)
+
+    def row_index(self) -> dict[uuid.UUID, int]:
+        return {item_id: row for row, item_id in enumerate(self.item_ids)}
+
+    def update(self, item_ids: list[uuid.UUID], vectors: sp.csr_matrix, *, removed: set[uuid.UUID]) -> None:
+        """Replace or append the rows of ``item_ids`` and drop ``removed``; other rows keep their order."""
+
+        replaced = set(item_ids) | removed
+        keep = np.fromiter((item_id not in replaced for item_id in self.item_ids), bool, len(self.item_ids))
+        self.vectors = sp.vstack([self.vectors[keep], vectors], format="csr", dtype=np.float32)
+        self.item_ids = [item_id for item_id, kept in zip(self.item_ids, keep) if kept] + list(item_ids)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        scratch = path.with_name(f".{path.name}.tmp.npz")
+        np.savez_compressed(
+            scratch,
+            data=self.vectors.data,
+            indices=self.vectors.indices,
+            indptr=self.vectors.indptr,
+            shape=np.asarray(self.vectors.shape, dtype=np.int64),
+            item_ids=uuids_to_array(self.item_ids),
+            terms=self.terms.astype(str),
+            idf=self.idf,
+            meta=np.asarray(json.dumps({"fitted_at": self.fitted_at.isoformat(), "params": asdict(self.params)})),
+        )
+        scratch.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> ContentModel:
+        with np.load(path, allow_pickle=False) as archive:
+            meta = json.loads(str(archive["meta"]))
+            return cls(
+                item_ids=array_to_uuids(archive["item_ids"]),
+                vectors=sp.csr_matrix(
+                    (archive["data"], archive["indices"], archive["indptr"]),
+                    shape=tuple(int(size) for size in archive["shape"]),
+                ),
+                terms=archive["terms"].astype(object),
+                idf=archive["idf"],
+                params=ContentParams(**meta["params"]),
+                fitted_at=datetime.fromisoformat(meta["fitted_at"]),
+            )
+
+
+def similarity_blocks(
+    model: ContentModel,
+    rows: np.ndarray,
+    *,
+    max_cells: int = 8_000_000,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Cosine similarity of ``rows`` against every item, as dense ``(query rows, scores)`` blocks.
+
+    Each block is one sparse matmul of at most ``max_cells`` scores, so memory stays flat
+    however large the catalog. An item's similarity to itself is ``-inf``.
+    """
+
+    transposed = model.vectors.T.tocsr()
+    block = max(1, max_cells // max(len(model.item_ids), 1))
+    for start in range(0, len(rows), block):
+        query = rows[start : start + block]
+        scores = (model.vectors[query] @ transposed).toarray()
+        scores[np.arange(len(query)), query] = -np.inf
+        yield query, scores
+
+
+def top_neighbors(
+    model: ContentModel,
+    query: np.ndarray,
+    scores: np.ndarray,
+    *,
+    k: int,
+    min_score: float,
+) -> Iterator[tuple[uuid.UUID, Neighbors]]:
+    best = top_k(scores, k)
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    for row, columns, values in zip(query, best, best_scores):
+        keep = values >= min_score
+        yield model.item_ids[row], [
+            (model.item_ids[column], float(value)) for column, value in zip(columns[keep], values[keep])
+        ]
+
+
+async def fetch_documents(
+    session: AsyncSession,
+    item_ids: Sequence[uuid.UUID] | None = None,
+    *,
+    chunk_size: int = 10_000,
+) -> tuple[list[uuid.UUID], list[ItemDocument]]:
+    """Text fields of active items (all of them, or just ``item_ids``), ordered by id."""
+
+    stmt = select(Item.id, Item.title, Item.description, Item.categories, Item.tags, Item.brand).where(
+        Item.is_active.is_(True)
+    )
+    if item_ids is not None:
+        stmt = stmt.where(Item.id == any_(bindparam("item_ids", list(item_ids), type_=ARRAY(PG_UUID(as_uuid=True)))))
+    stmt = stmt.order_by(Item.id).execution_options(yield_per=chunk_size)
+    ids: list[uuid.UUID] = []
+    documents: list[ItemDocument] = []
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        for item_id, title, description, categories, tags, brand in partition:
+            ids.append(item_id)
+            documents.append((title, description, categories, tags, brand))
+    return ids, documents
+
+
+def read_changes(path: Path) -> tuple[list[uuid.UUID], set[uuid.UUID]]:
+    """``(inserted or updated, deleted)`` item ids from a ``scripts/load_catalog.py --changes`` file."""
+
+    changed: dict[uuid.UUID, None] = {}
+    deleted: set[uuid.UUID] = set()
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            item_id = uuid.UUID(record["item_id"])
+            if record["op"] == "delete":
+                deleted.add(item_id)
+                changed.pop(item_id, None)
+            else:
+                changed[item_id] = None
+                deleted.discard(item_id)
+    return list(changed), deleted
+
+
+async def build_content_neighbors(
+    session: AsyncSession,
+    path: Path,
+    *,
+    params: ContentParams,
+    k: int = 50,
+    min_score: float = 0.1,
+    max_cells: int = 8_000_000,
+) -> ContentModel:
+    """Fit the vocabulary on the active catalog, save the model and replace every content list."""
+
+    started = time.perf_counter()
+    item_ids, documents = await fetch_documents(session)
+    if not item_ids:
+        raise SystemExit("No active items to vectorize; load a catalog first.")
+    model = ContentModel.fit(item_ids, documents, params)
+    model.save(path)
+    fitted = time.perf_counter() - started
+
+    def lists() -> Iterator[tuple[uuid.UUID, Neighbors]]:
+        for query, scores in similarity_blocks(model, np.arange(len(item_ids)), max_cells=max_cells):
+            yield from top_neighbors(model, query, scores, k=k, min_score=min_score)
+
+    written = await ItemNeighborService(session).replace_all(NeighborKind.CONTENT, lists())
+    await session.commit()
+    logger.info(
+        "content.built",
+        items=len(item_ids),
+        terms=len(model.terms),
+        lists=written,
+        fit_seconds=round(fitted, 2),
+        seconds=round(time.perf_counter() - started, 2),
+    )
+    return model
+
+
+async def update_content_neighbors(
+    session: AsyncSession,
+    path: Path,
+    changes_path: Path,
+    *,
+    k: int = 50,
+    min_score: float = 0.1,
+    max_cells: int = 8_000_000,
+) -> ContentModel:
+    """Vectorize the items in a catalog change set against the saved vocabulary and patch the lists.
+
+    Changed items, and items whose list held a changed or deleted item, are recomputed in full.
+    Every other list can only gain changed items, so it is merged with their scores instead:
+    the result is what a full pass over the updated model would store.
+    """
+
+    started = time.perf_counter()
+    model = ContentModel.load(path)
+    changed, deleted = read_changes(changes_path)
+    item_ids, documents = await fetch_documents(session, changed)
+    # Items deactivated since the change set was written are treated as deleted.
+    removed = deleted | (set(changed) - set(item_ids))
+    model.update(item_ids, model.transform(documents), removed=removed)
+    model.save(path)
+
+    service = ItemNeighborService(session)
+    index = model.row_index()
+    touched = set(item_ids) | removed
+    stale = [item_id for item_id in await service.referencing(list(touched), NeighborKind.CONTENT) if item_id in index]
+    first_changed = len(model.item_ids) - len(item_ids)
+    rows = np.concatenate(
+        [
+            np.arange(first_changed, len(model.item_ids)),
+            np.fromiter((index[item_id] for item_id in stale if item_id not in touched), np.int64),
+        ]
+    )
+    patched: dict[uuid.UUID, Neighbors] = {item_id: [] for item_id in removed}
+    candidates: dict[uuid.UUID, Neighbors] = defaultdict(list)
+    for query, scores in similarity_blocks(model, rows, max_cells=max_cells):
+        patched.update(top_neighbors(model, query, scores, k=k, min_score=min_score))
+        changed_rows = query >= first_changed
+        sources, source_scores = query[changed_rows], scores[changed_rows]
+        for position, column in zip(*np.nonzero(source_scores >= min_score)):
+            candidates[model.item_ids[column]].append(
+                (model.item_ids[sources[position]], float(source_scores[position, column]))
+            )
+
+    gaining = [item_id for item_id in candidates if item_id not in patched]
+    existing = await service.fetch(gaining, NeighborKind.CONTENT)
+    for item_id in gaining:
+        pairs = existing.get(item_id, []) + candidates[item_id]
+        pairs.sort(key=lambda pair: pair[1], reverse=True)
+        patched[item_id] = pairs[:k]
+    await service.upsert(NeighborKind.CONTENT, patched)
+    await session.commit()
+    logger.info(
+        "content.updated",
+        changed=len(item_ids),
+        removed=len(removed),
+        lists=len(patched),
+        seconds=round(time.perf_counter() - started, 2),
+    )
+    return model
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = ContentParams()
+    parser = argparse.ArgumentParser(description="Build TF-IDF item vectors and precompute content neighbours.")
+    parser.add_argument("--model-path", type=Path, default=get_settings().content_model_path)
+    parser.add_argument(
+        "--changes",
+        type=Path,
+        default=None,
+        help="Catalog change set (load_catalog.py --changes); update incrementally instead of refitting.",
+    )
+    parser.add_argument("--k", type=int, default=50, help="Neighbours kept per item.")
+    parser.add_argument("--min-score", type=float, default=0.1, help="Drop neighbours below this cosine similarity.")
+    parser.add_argument("--max-cells", type=int, default=8_000_000, help="Similarity scores held per matmul block.")
+    parser.add_argument("--title-weight", type=int, default=defaults.title_weight)
+    parser.add_argument("--min-df", type=int, default=defaults.min_df, help="Drop terms in fewer items.")
+    parser.add_argument("--max-df", type=float, default=defaults.max_df, help="Drop terms in more than this fraction.")
+    parser.add_argument("--max-features", type=int, default=defaults.max_features)
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(str(get_settings().database_url), future=True)
+    try:
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+            if args.changes is not None:
+                model = await update_content_neighbors(
+                    session, args.model_path, args.changes, k=args.k, min_score=args.min_score, max_cells=args.max_cells
+                )
+            else:
+                params = ContentParams(
+                    title_weight=args.title_weight,
+                    min_df=args.min_df,
+                    max_df=args.max_df,
+                    max_features=args.max_features,
+                )
+                model = await build_content_neighbors(
+                    session,
+                    args.model_path,
+                    params=params,
+                    k=args.k,
+                    min_score=args.min_score,
+                    max_cells=args.max_cells,
+                )
+    finally:
+        await engine.dispose()
+    print(f"items={len(model.item_ids)} terms={len(model.terms)} -> {args.model_path}")
+
+
+def main() -> None:
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import scipy.sparse as sp
+import structlog
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from threadpoolctl import threadpool_limits
+
+from app.core.config import get_settings
+from app.models import Interaction, Item, RecommendationScore, UserEmbedding
+from app.services.ann_index import top_k
+from app.services.feature_store import FeatureStoreService
+from app.services.model_versions import ModelVersionService
+from ml.matrix import InteractionMatrix, build_interaction_matrix
+
+logger = structlog.get_logger(__name__)
+
+
+class ListSource(str, Enum):
+    """Where the evaluated top-K lists come from."""
+
+    SCORES = "scores"
+    LIVE = "live"
+
+
+def ranking_metrics(lists: np.ndarray, relevant: sp.csr_matrix) -> dict[str, np.ndarray]:
+    """Per-user AP@K, NDCG@K and recall@K of ``lists`` against binary ``relevant`` sets.
+
+    ``lists`` is ``users x K`` column indices of ``relevant``, best first, padded with ``-1``.
+    Hits are found for all users at once by searching ``row * n_items + column`` keys in the
+    sorted keys of ``relevant``. AP and NDCG are normalized by ``min(|relevant|, K)``; recall
+    by ``|relevant|``.
+    """
+
+    users, k = lists.shape
+    relevant = relevant.tocsr()
+    relevant.sort_indices()
+    counts = np.diff(relevant.indptr)
+    n_items = max(relevant.shape[1], 1)
+    keys = np.repeat(np.arange(users, dtype=np.int64), counts) * n_items + relevant.indices
+    candidates = np.arange(users, dtype=np.int64)[:, None] * n_items + lists
+    if len(keys):
+        found = keys[np.minimum(np.searchsorted(keys, candidates), len(keys) - 1)] == candidates
+    else:
+        found = np.zeros(lists.shape, dtype=bool)
+    hits = (found & (lists >= 0)).astype(np.float64)
+
+    ranks = np.arange(1, k + 1, dtype=np.float64)
+    ideal = np.minimum(counts, k)
+    average_precision = (hits * np.cumsum(hits, axis=1) / ranks).sum(axis=1) / np.maximum(ideal, 1)
+    discounts = 1.0 / np.log2(ranks + 1.0)
+    ideal_dcg = np.concatenate(([0.0], np.cumsum(discounts)))[ideal]
+    ndcg = np.divide(hits @ discounts, ideal_dcg, out=np.zeros(users), where=ideal_dcg > 0)
+    recall = hits.sum(axis=1) / np.maximum(counts, 1)
+    return {"map": average_precision, "ndcg": ndcg, "recall": recall}
+
+
+@dataclass(slots=True)
+class Shard:
+    """A contiguous slice of evaluated users: either ready lists or user vectors to score."""
+
+    relevant: sp.csr_matrix
+    lists: np.ndarray | None = None
+    vectors: np.ndarray | None = None
+    seen: sp.csr_matrix | None = None
+
+
+@dataclass(slots=True)
+class ShardResult:
+    users: int
+    users_with_lists: int
+    sums: dict[str, float]
+    recommended: np.ndarray
+
+
+_item_vectors: np.ndarray | None = None
+
+
+def _init_worker(item_vectors: np.ndarray | None, blas_threads: int) -> None:
+    global _item_vectors
+    _item_vectors = item_vectors
+    threadpool_limits(limits=blas_threads, user_api="blas")
+
+
+def _score_lists(vectors: np.ndarray, seen: sp.csr_matrix, k: int) -> np.ndarray:
+    """Top-``k`` unseen items per user; users without an embedding (NaN rows) get no list."""
+
+    assert _item_vectors is not None
+    lists = np.full((len(vectors), k), -1, dtype=np.int64)
+    scored = np.flatnonzero(~np.isnan(vectors[:, 0]))
+    if not len(scored) or not len(_item_vectors):
+        return lists
+    scores = vectors[scored] @ _item_vectors.T
+    # Columns past the model's items are holdout-only items, which the model cannot score.
+    seen = seen[scored][:, : scores.shape[1]]
+    rows, columns = seen.nonzero()
+    scores[rows, columns] = -np.inf
+    best = top_k(scores, k)
+    best[~np.isfinite(np.take_along_axis(scores, best, axis=1))] = -1
+    lists[scored, : best.shape[1]] = best
+    return lists
+
+
+def _evaluate_shard(shard: Shard, k: int) -> ShardResult:
+    if shard.lists is None:
+        assert shard.vectors is not None and shard.seen is not None
+        lists = _score_lists(shard.vectors, shard.seen, k)
+    else:
+        lists = shard.lists
+    metrics = ranking_metrics(lists, shard.relevant)
+    return ShardResult(
+        users=len(lists),
+        users_with_lists=int((lists[:, 0] >= 0).sum()),
+        sums={name: float(values.sum()) for name, values in metrics.items()},
+        recommended=np.unique(lists[lists >= 0]),
+    )
+
+
+@dataclass(slots=True)
+class EvaluationReport:
+    model_version: str
+    source: str
+    k: int
+    split_at: str
+    users: int
+    users_with_lists: int
+    catalog_items: int
+    metrics: dict[str, float] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+def align_rows(
+    source: InteractionMatrix,
+    user_ids: list[uuid.UUID],
+    item_index: dict[uuid.UUID, int],
+    *,
+    positive_only: bool = False,
+) -> sp.csr_matrix:
+    """Binary ``len(user_ids) x len(item_index)`` view of ``source`` in another id space.
+
+    Users missing from ``source`` get empty rows; items missing from ``item_index`` are dropped.
+    """
+
+    user_rows = source.user_index()
+    positions = np.fromiter((user_rows.get(user_id, -1) for user_id in user_ids), np.int64, len(user_ids))
+    present = np.flatnonzero(positions >= 0)
+    column_map = np.fromiter((item_index.get(item_id, -1) for item_id in source.item_ids), np.int64)
+    block = source.matrix[positions[present]].tocoo()
+    keep = column_map[block.col] >= 0
+    if positive_only:
+        keep &= block.data > 0
+    return sp.csr_matrix(
+        (np.ones(int(keep.sum()), dtype=np.float32), (present[block.row[keep]], column_map[block.col[keep]])),
+        shape=(len(user_ids), len(item_index)),
+    )
+
+
+async def _stored_lists(
+    session: AsyncSession,
+    model_version: str,
+    user_ids: list[uuid.UUID],
+    item_index: dict[uuid.UUID, int],
+    k: int,
+    chunk_size: int,
+) -> np.ndarray:
+    """Materialized top-``k`` per evaluated user from the version's score partition."""
+
+    user_rows = {user_id: row for row, user_id in enumerate(user_ids)}
+    stmt = (
+        select(RecommendationScore.user_id, RecommendationScore.item_id)
+        .where(RecommendationScore.model_version == model_version, RecommendationScore.rank <= k)
+        .order_by(RecommendationScore.user_id, RecommendationScore.rank)
+        .execution_options(yield_per=chunk_size)
+    )
+    users: list[np.ndarray] = []
+    items: list[np.ndarray] = []
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        users.append(np.fromiter((user_rows.get(row[0], -1) for row in partition), np.int64, len(partition)))
+        items.append(
+            np.fromiter(
+                (item_index.setdefault(row[1], len(item_index)) for row in partition), np.int64, len(partition)
+            )
+        )
+    lists = np.full((len(user_ids), k), -1, dtype=np.int64)
+    if not users:
+        return lists
+    user_column, item_column = np.concatenate(users), np.concatenate(items)
+    keep = user_column >= 0
+    user_column, item_column = user_column[keep], item_column[keep]
+    if not len(user_column):
+        return lists
+    # Rows arrive grouped by user in rank order, so a row's slot is its offset within the group.
+    starts = np.flatnonzero(np.r_[True, user_column[1:] != user_column[:-1]])
+    slot = np.arange(len(user_column)) - np.repeat(starts, np.diff(np.r_[starts, len(user_column)]))
+    fits = slot < k
+    lists[user_column[fits], slot[fits]] = item_column[fits]
+    return lists
+
+
+async def _user_vectors(
+    session: AsyncSession,
+    model_version: str,
+    user_ids: list[uuid.UUID],
+    dim: int,
+    chunk_size: int,
+) -> np.ndarray:
+    """Embeddings of the evaluated users in row order; users without one get NaN rows."""
+
+    user_rows = {user_id: row for row, user_id in enumerate(user_ids)}
+    vectors = np.full((len(user_ids), dim), np.nan, dtype=np.float32)
+    stmt = (
+        select(UserEmbedding.user_id, UserEmbedding.embedding)
+        .where(UserEmbedding.model_version == model_version)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        for user_id, embedding in partition:
+            row = user_rows.get(user_id)
+            if row is not None:
+                vectors[row] = embedding
+    return vectors
+
+
+def _shards(
+    relevant: sp.csr_matrix,
+    shard_users: int,
+    *,
+    lists: np.ndarray | None = None,
+    vectors: np.ndarray | None = None,
+    seen: sp.csr_matrix | None = None,
+) -> Iterator[Shard]:
+    for start in range(0, relevant.shape[0], shard_users):
+        stop = min(start + shard_users, relevant.shape[0])
+        yield Shard(
+            relevant=relevant[start:stop],
+            lists=None if lists is None else lists[start:stop],
+            vectors=None if vectors is None else vectors[start:stop],
+            seen=None if seen is None else seen[start:stop],
+        )
+
+
+async def evaluate(
+    session: AsyncSession,
+    *,
+    k: int = 20,
+    split_at: datetime | None = None,
+    holdout_days: float = 7.0,
+    source: ListSource = ListSource.SCORES,
+    model_version: str | None = None,
+    workers: int | None = None,
+    chunk_size: int = 100_000,
+) -> EvaluationReport:
+    """Score a model's top-``k`` lists against the interactions after ``split_at``.
+
+    Relevant items are a user's positively weighted holdout items they had not interacted with
+    before the split, matching what the recommender is allowed to return. Users are sharded
+    across a process pool; each shard scores (for live lists) and computes its metrics with
+    whole-array operations, and only per-shard sums come back.
+    """
+
+    timings: dict[str, float] = {}
+    tick = time.perf_counter()
+    model_version = await ModelVersionService(session).resolve(model_version)
+    if split_at is None:
+        newest = await session.scalar(select(func.max(Interaction.event_at)))
+        if newest is None:
+            raise LookupError("No interactions to evaluate against")
+        split_at = newest - timedelta(days=holdout_days)
+    holdout = await build_interaction_matrix(session, since=split_at, chunk_size=chunk_size)
+    history = await build_interaction_matrix(session, until=split_at, chunk_size=chunk_size)
+    catalog_items = int(
+        await session.scalar(select(func.count()).select_from(Item).where(Item.is_active.is_(True))) or 0
+    )
+    timings["load_interactions"] = time.perf_counter() - tick
+
+    tick = time.perf_counter()
+    item_vectors: np.ndarray | None = None
+    if source is ListSource.LIVE:
+        model_item_ids, item_vectors = await FeatureStoreService(session).fetch_item_embedding_matrix(model_version)
+        if not model_item_ids:
+            raise LookupError(f"No item embeddings stored for model version {model_version!r}")
+        item_vectors = np.ascontiguousarray(item_vectors, dtype=np.float32)
+        item_index = {item_id: row for row, item_id in enumerate(model_item_ids)}
+        # Holdout items the model has never seen can be relevant but can never be recommended.
+        for item_id in holdout.item_ids:
+            item_index.setdefault(item_id, len(item_index))
+    else:
+        item_index = {item_id: row for row, item_id in enumerate(holdout.item_ids)}
+
+    user_ids = holdout.user_ids
+    seen = align_rows(history, user_ids, item_index)
+    relevant = align_rows(holdout, user_ids, item_index, positive_only=True)
+    relevant = (relevant - relevant.multiply(seen)).tocsr()
+    relevant.eliminate_zeros()
+    evaluated = np.flatnonzero(np.diff(relevant.indptr) > 0)
+    user_ids = [user_ids[row] for row in evaluated]
+    relevant, seen = relevant[evaluated], seen[evaluated]
+
+    workers = workers or os.cpu_count() or 1
+    if source is ListSource.LIVE:
+        assert item_vectors is not None
+        vectors = await _user_vectors(session, model_version, user_ids, item_vectors.shape[1], chunk_size)
+        shard_users = max(1, get_settings().recommender_max_score_cells // max(len(item_index), 1))
+        shards = _shards(relevant, shard_users, vectors=vectors, seen=seen)
+    else:
+        lists = await _stored_lists(session, model_version, user_ids, item_index, k, chunk_size)
+        # Scored items outside the holdout can still count towards coverage; widen the matrix.
+        relevant.resize((relevant.shape[0], len(item_index)))
+        shards = _shards(relevant, max(1, len(user_ids) // (workers * 4)), lists=lists)
+    timings["load_lists"] = time.perf_counter() - tick
+
+    tick = time.perf_counter()
+    totals = {"map": 0.0, "ndcg": 0.0, "recall": 0.0}
+    users = users_with_lists = 0
+    recommended = np.zeros(len(item_index), dtype=bool)
+    blas_threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(item_vectors, blas_threads)
+    ) as pool:
+        for result in pool.map(partial(_evaluate_shard, k=k), shards):
+            users += result.users
+            users_with_lists += result.users_with_lists
+            for name, value in result.sums.items():
+                totals[name] += value
+            recommended[result.recommended] = True
+    timings["evaluate"] = time.perf_counter() - tick
+
+    metrics = {f"{name}@{k}": value / max(users, 1) for name, value in totals.items()}
+    metrics[f"coverage@{k}"] = int(recommended.sum()) / max(catalog_items, 1)
+    report = EvaluationReport(
+        model_version=model_version,
+        source=source.value,
+        k=k,
+        split_at=split_at.isoformat(),
+        users=users,
+        users_with_lists=users_with_lists,
+        catalog_items=catalog_items,
+        metrics=metrics,
+        timings={name: round(seconds, 2) for name, seconds in timings.items()},
+    )
+    logger.info("evaluate.finished", **asdict(report))
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline MAP@K / NDCG@K / recall@K / coverage on a time split.")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--source", type=ListSource, choices=list(ListSource), default=ListSource.SCORES)
+    parser.add_argument("--model-version", default=None, help="Defaults to the live version.")
+    parser.add_argument("--split-at", type=datetime.fromisoformat, default=None, help="Holdout starts here (ISO).")
+    parser.add_argument("--holdout-days", type=float, default=7.0, help="Without --split-at: last N days held out.")
+    parser.add_argument("--workers", type=int, default=None, help="Evaluation processes; defaults to CPU count.")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows fetched per cursor round trip.")
+    parser.add_argument("--output", type=Path, default=None, help="Also write the report as JSON.")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    engine = create_async_engine(str(get_settings().database_url), future=True)
+    try:
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+            report = await evaluate(
+                session,
+                k=args.k,
+                split_at=args.split_at,
+                holdout_days=args.holdout_days,
+                source=args.source,
+                model_version=args.model_version,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+            )
+    finally:
+        await engine.dispose()
+    return asdict(report)
+
+
+def main() -> None:
+    args = parse_args()
+    report = asyncio.run(run(args))
+    payload = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(payload, encoding="utf-8")
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Mapping
+
+import numpy as np
+import scipy.sparse as sp
+import structlog
+from sqlalchemy import DateTime, Float, case, cast, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.models import Interaction, InteractionType
+from app.services.embedding_snapshot import array_to_uuids, uuids_to_array
+from app.services.partitions import time_window
+
+logger = structlog.get_logger(__name__)
+
+# Postgres raises on ``exp()`` underflow; clamp like the affinity rollup does.
+_MIN_EXPONENT = -700.0
+
+
+@dataclass(slots=True)
+class InteractionMatrix:
+    """Users x items CSR matrix of interaction strength, with the ids behind each row and column.
+
+    Rows and columns are ordered by UUID, so the same interactions always produce the same
+    matrix regardless of the order they were read in.
+    """
+
+    matrix: sp.csr_matrix
+    user_ids: list[uuid.UUID]
+    item_ids: list[uuid.UUID]
+    as_of: datetime
+    params: dict[str, object] = field(default_factory=dict)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.matrix.shape
+
+    def user_index(self) -> dict[uuid.UUID, int]:
+        return {user_id: row for row, user_id in enumerate(self.user_ids)}
+
+    def item_index(self) -> dict[uuid.UUID, int]:
+        return {item_id: column for column, item_id in enumerate(self.item_ids)}
+
+    def save(self, path: Path) -> None:
+        """Write the matrix and its id maps to one compressed ``.npz`` archive."""
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        matrix = self.matrix.tocsr()
+        np.savez_compressed(
+            path,
+            data=matrix.data,
+            indices=matrix.indices,
+            indptr=matrix.indptr,
+            shape=np.asarray(matrix.shape, dtype=np.int64),
+            user_ids=uuids_to_array(self.user_ids),
+            item_ids=uuids_to_array(self.item_ids),
+            meta=np.asarray(json.dumps({"as_of": self.as_of.isoformat(), "params": self.params})),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> InteractionMatrix:
+        with np.load(path, allow_pickle=False) as archive:
+            matrix = sp.csr_matrix(
+                (archive["data"], archive["indices"], archive["indptr"]),
+                shape=tuple(int(size) for size in archive["shape"]),
+            )
+            meta = json.loads(str(archive["meta"]))
+            return cls(
+                matrix=matrix,
+                user_ids=array_to_uuids(archive["user_ids"]),
+                item_ids=array_to_uuids(archive["item_ids"]),
+                as_of=datetime.fromisoformat(meta["as_of"]),
+                params=meta["params"],
+            )
+
+
+async def build_interaction_matrix(
+    session: AsyncSession,
+    *,
+    event_weights: Mapping[InteractionType, float] | None = None,
+    half_life_days: float | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    chunk_size: int = 100_000,
+) -> InteractionMatrix:
+    """Stream ``interactions`` through a server-side cursor into a CSR matrix.
+
+    Each cell is the sum over a user's events on an item of the event weight (the stored
+    ``weight``, or ``event_weights[event_type]`` where given) times ``exp(-ln 2 * age /
+    half_life)``, with age measured back from ``until`` (default: now). Events are summed per
+    pair in Postgres and arrive as plain rows ``chunk_size`` at a time; no ORM objects are built.
+    """
+
+    as_of = until or datetime.now(tz=UTC)
+    weight = Interaction.weight
+    if event_weights:
+        weight = case(
+            *[(Interaction.event_type == event_type, value) for event_type, value in event_weights.items()],
+            else_=Interaction.weight,
+        )
+    value = weight
+    if half_life_days:
+        rate = math.log(2.0) / (half_life_days * 86_400.0)
+        age = func.extract("epoch", literal(as_of, DateTime(timezone=True)) - Interaction.event_at)
+        value = weight * func.exp(func.greatest(cast(-rate, Float) * age, _MIN_EXPONENT))
+
+    stmt = select(Interaction.user_id, Interaction.item_id, func.sum(value).label("value"))
+    if since is not None:
+        stmt = stmt.where(time_window(Interaction.event_at, since, until))
+    elif until is not None:
+        stmt = stmt.where(Interaction.event_at < until)
+    stmt = (
+        stmt.group_by(Interaction.user_id, Interaction.item_id)
+        .order_by(Interaction.user_id, Interaction.item_id)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    started = time.perf_counter()
+    user_index: dict[uuid.UUID, int] = {}
+    item_index: dict[uuid.UUID, int] = {}
+    rows: list[np.ndarray] = []
+    columns: list[np.ndarray] = []
+    values: list[np.ndarray] = []
+    pairs = 0
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        rows.append(np.fromiter((user_index.setdefault(row[0], len(user_index)) for row in partition), np.int32))
+        columns.append(np.fromiter((item_index.setdefault(row[1], len(item_index)) for row in partition), np.int32))
+        values.append(np.fromiter((row[2] for row in partition), np.float32))
+        pairs += len(partition)
+        logger.debug("matrix.chunk", pairs=pairs)
+
+    # Users already arrive in UUID order; items are numbered by first sight, so renumber them.
+    user_ids = list(user_index)
+    item_ids = sorted(item_index)
+    remap = np.empty(len(item_ids), dtype=np.int32)
+    remap[np.fromiter((item_index[item_id] for item_id in item_ids), np.int32, len(item_ids))] = np.arange(
+        len(item_ids), dtype=np.int32
+    )
+    row = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+    column = remap[np.concatenate(columns)] if columns else np.empty(0, dtype=np.int32)
+    data = np.concatenate(values) if values else np.empty(0, dtype=np.float32)
+    matrix = sp.csr_matrix((data, (row, column)), shape=(len(user_ids), len(item_ids)), dtype=np.float32)
+    matrix.sort_indices()
+
+    params: dict[str, object] = {
+        "event_weights": {event_type.value: value for event_type, value in (event_weights or {}).items()},
+        "half_life_days": half_life_days,
+        "since": since.isoformat() if since else None,
+        "until": until.isoformat() if until else None,
+    }
+    logger.info(
+        "matrix.built",
+        users=matrix.shape[0],
+        items=matrix.shape[1],
+        nnz=matrix.nnz,
+        seconds=round(time.perf_counter() - started, 2),
+    )
+    return InteractionMatrix(matrix=matrix, user_ids=user_ids, item_ids=item_ids, as_of=as_of, params=params)
+
+
+def parse_event_weight(value: str) -> tuple[InteractionType, float]:
+    name, _, weight = value.partition("=")
+    try:
+        return InteractionType(name), float(weight)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"expected <event_type>=<weight>, got {value!r}") from exc
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the user-item training matrix and save it as .npz.")
+    parser.add_argument("--output", type=Path, default=Path("artifacts/matrix/interactions.npz"))
+    parser.add_argument(
+        "--event-weight",
+        type=parse_event_weight,
+        action="append",
+        default=[],
+        help="Override the stored weight of an event type, e.g. purchase=5. Repeatable.",
+    )
+    parser.add_argument("--half-life-days", type=float, default=None, help="Exponential time decay; off by default.")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Only events at or after (ISO).")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="Only events before (ISO).")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows fetched per cursor round trip.")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(str(get_settings().database_url), future=True)
+    try:
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+            matrix = await build_interaction_matrix(
+                session,
+                event_weights=dict(args.event_weight),
+                half_life_days=args.half_life_days,
+                since=args.since,
+                until=args.until,
+                chunk_size=args.chunk_size,
+            )
+    finally:
+        await engine.dispose()
+    matrix.save(args.output)
+    print(f"users={matrix.shape[0]} items={matrix.shape[1]} nnz={matrix.matrix.nnz} -> {args.output}")
+
+
+def main() -> None:
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, time as day_start, timedelta
+from pathlib import Path
+from typing import Any, Mapping
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import scipy.sparse as sp
+import structlog
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.models import Interaction, InteractionType, Item, User
+from app.services.embedding_snapshot import UUID_DTYPE, array_to_uuids, uuids_to_array
+from app.services.partitions import time_window
+from ml.matrix import InteractionMatrix
+
+logger = structlog.get_logger(__name__)
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+USERS_FILE = "users.arrow"
+ITEMS_FILE = "items.arrow"
+INTERACTIONS_DIR = "interactions"
+
+# Fixed for the life of a snapshot, so event-type codes mean the same thing in every partition.
+EVENT_TYPES = pa.array([event_type.value for event_type in InteractionType], pa.string())
+INTERACTION_SCHEMA = pa.schema(
+    [
+        ("user", pa.int32()),
+        ("item", pa.int32()),
+        ("event_type", pa.dictionary(pa.int8(), pa.string())),
+        ("event_at", pa.timestamp("us", tz="UTC")),
+        ("weight", pa.float32()),
+    ]
+)
+
+
+def _ids_array(ids: list[uuid.UUID]) -> pa.FixedSizeBinaryArray:
+    return pa.FixedSizeBinaryArray.from_buffers(pa.binary(16), len(ids), [None, pa.py_buffer(uuids_to_array(ids))])
+
+
+def _ids_view(column: pa.ChunkedArray) -> np.ndarray:
+    """Zero-copy ``V16`` view of a single-chunk fixed-size binary id column."""
+
+    chunk = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+    buffer = chunk.buffers()[1]
+    return np.frombuffer(buffer, dtype=UUID_DTYPE, count=len(chunk), offset=chunk.offset * 16)
+
+
+def _uuid_order(ids: np.ndarray) -> np.ndarray:
+    """Argsort of ``V16`` UUIDs in :class:`uuid.UUID` order (big-endian 128-bit integers)."""
+
+    words = ids.view(">u8").reshape(-1, 2)
+    return np.lexsort((words[:, 1], words[:, 0]))
+
+
+def _dictionary_list(values: list[list[str]]) -> pa.ListArray:
+    """``list<dictionary<int32, string>>``: category and tag vocabularies are tiny next to the rows."""
+
+    offsets = np.zeros(len(values) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(entry) for entry in values])
+    flat = pa.array([value for entry in values for value in entry], pa.string()).dictionary_encode()
+    return pa.ListArray.from_arrays(pa.array(offsets), flat)
+
+
+def _write_table(path: Path, table: pa.Table, compression: str | None) -> None:
+    """Write an Arrow IPC file next to ``path`` and swap it in, so readers never see a partial file."""
+
+    scratch = path.with_name(f".{path.name}.tmp")
+    with pa.OSFile(str(scratch), "wb") as sink:
+        with ipc.new_file(sink, table.schema, options=ipc.IpcWriteOptions(compression=compression)) as writer:
+            writer.write_table(table)
+    os.replace(scratch, path)
+
+
+def _read_table(path: Path) -> pa.Table:
+    """Memory-map an Arrow IPC file; uncompressed buffers are then used in place, never copied."""
+
+    return ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+@dataclass(slots=True)
+class SnapshotManifest:
+    compression: str | None
+    exported_at: str = ""
+    users: int = 0
+    items: int = 0
+    partitions: dict[str, int] = field(default_factory=dict)
+    format: int = SNAPSHOT_FORMAT
+
+    @classmethod
+    def read(cls, directory: Path) -> SnapshotManifest | None:
+        path = directory / MANIFEST_NAME
+        if not path.exists():
+            return None
+        return cls(**json.loads(path.read_text(encoding="utf-8")))
+
+    def write(self, directory: Path) -> None:
+        scratch = directory / f".{MANIFEST_NAME}.tmp"
+        payload = {
+            "format": self.format,
+            "compression": self.compression,
+            "exported_at": self.exported_at,
+            "users": self.users,
+            "items": self.items,
+            "partitions": dict(sorted(self.partitions.items())),
+        }
+        scratch.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        os.replace(scratch, directory / MANIFEST_NAME)
+
+
+class _Codes:
+    """Append-only UUID -> int32 code book; codes already written to partitions never change."""
+
+    def __init__(self, ids: list[uuid.UUID] | None = None):
+        self.ids: list[uuid.UUID] = list(ids or [])
+        self.index = {entity_id: code for code, entity_id in enumerate(self.ids)}
+
+    def code(self, entity_id: uuid.UUID) -> int:
+        code = self.index.get(entity_id)
+        if code is None:
+            code = self.index[entity_id] = len(self.ids)
+            self.ids.append(entity_id)
+        return code
+
+
+async def _export_users(session: AsyncSession, codes: _Codes, chunk_size: int) -> pa.Table:
+    preferences: dict[int, str] = {}
+    stmt = select(User.id, User.preferences).execution_options(yield_per=chunk_size)
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        for user_id, user_preferences in partition:
+            preferences[codes.code(user_id)] = json.dumps(user_preferences or {}, sort_keys=True)
+    # Users deleted since an earlier export keep their code (old partitions reference it) with null columns.
+    return pa.table(
+        {
+            "id": _ids_array(codes.ids),
+            "preferences": pa.array([preferences.get(code) for code in range(len(codes.ids))], pa.string()),
+        }
+    )
+
+
+async def _export_items(session: AsyncSession, codes: _Codes, chunk_size: int) -> pa.Table:
+    rows: dict[int, tuple[Any, ...]] = {}
+    stmt = select(
+        Item.id, Item.sku, Item.brand, Item.price, Item.categories, Item.tags, Item.is_active
+    ).execution_options(yield_per=chunk_size)
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        for row in partition:
+            rows[codes.code(row.id)] = row
+    catalog = [rows.get(code) for code in range(len(codes.ids))]
+    return pa.table(
+        {
+            "id": _ids_array(codes.ids),
+            "sku": pa.array([row.sku if row else None for row in catalog], pa.string()),
+            "brand": pa.array([row.brand if row else None for row in catalog], pa.string()).dictionary_encode(),
+            "price": pa.array([float(row.price) if row else None for row in catalog], pa.float64()),
+            "categories": _dictionary_list([list(row.categories) if row else [] for row in catalog]),
+            "tags": _dictionary_list([list(row.tags) if row else [] for row in catalog]),
+            "is_active": pa.array([bool(row.is_active) if row else False for row in catalog], pa.bool_()),
+        }
+    )
+
+
+async def _export_day(
+    session: AsyncSession,
+    day: date,
+    path: Path,
+    users: _Codes,
+    items: _Codes,
+    compression: str | None,
+    chunk_size: int,
+) -> int:
+    """Stream one day of interactions into an IPC file, one record batch per cursor chunk."""
+
+    since = datetime.combine(day, day_start.min, tzinfo=UTC)
+    stmt = (
+        select(
+            Interaction.user_id, Interaction.item_id, Interaction.event_type, Interaction.event_at, Interaction.weight
+        )
+        .where(time_window(Interaction.event_at, since, since + timedelta(days=1)))
+        .order_by(Interaction.event_at)
+        .execution_options(yield_per=chunk_size)
+    )
+    event_codes = {event_type: code for code, event_type in enumerate(InteractionType)}
+    rows = 0
+    scratch = path.with_name(f".{path.name}.tmp")
+    result = await session.stream(stmt)
+    with pa.OSFile(str(scratch), "wb") as sink:
+        options = ipc.IpcWriteOptions(compression=compression)
+        with ipc.new_file(sink, INTERACTION_SCHEMA, options=options) as writer:
+            async for partition in result.partitions():
+                count = len(partition)
+                batch = pa.record_batch(
+                    [
+                        pa.array(np.fromiter((users.code(row[0]) for row in partition), np.int32, count)),
+                        pa.array(np.fromiter((items.code(row[1]) for row in partition), np.int32, count)),
+                        pa.DictionaryArray.from_arrays(
+                            pa.array(np.fromiter((event_codes[row[2]] for row in partition), np.int8, count)),
+                            EVENT_TYPES,
+                        ),
+                        pa.array([row[3] for row in partition], pa.timestamp("us", tz="UTC")),
+                        pa.array(np.fromiter((row[4] for row in partition), np.float32, count)),
+                    ],
+                    schema=INTERACTION_SCHEMA,
+                )
+                writer.write_batch(batch)
+                rows += count
+    if rows:
+        os.replace(scratch, path)
+    else:
+        scratch.unlink()
+    return rows
+
+
+async def export_snapshot(
+    session: AsyncSession,
+    directory: Path,
+    *,
+    until: date | None = None,
+    compression: str | None = "zstd",
+    full: bool = False,
+    chunk_size: int = 100_000,
+) -> SnapshotManifest:
+    """Export interactions, the catalog and user preferences as Arrow IPC files under ``directory``.
+
+    Interactions are written one file per UTC day, ``interactions/date=YYYY-MM-DD.arrow``, with
+    users and items integer-coded against ``users.arrow`` / ``items.arrow``. Only whole days
+    before ``until`` (default: today) are exported, and days already in the manifest are never
+    rewritten, so a nightly run appends just the new partitions. The id dictionaries only ever
+    grow and are rewritten with current attributes on every run; the manifest is written last.
+    Events arriving late for an exported day are not picked up; ``full`` re-exports everything.
+    """
+
+    started = time.perf_counter()
+    until = until or datetime.now(tz=UTC).date()
+    (directory / INTERACTIONS_DIR).mkdir(parents=True, exist_ok=True)
+    manifest = None if full else SnapshotManifest.read(directory)
+    if manifest is None:
+        manifest = SnapshotManifest(compression=compression)
+        users, items = _Codes(), _Codes()
+        for stale in (directory / INTERACTIONS_DIR).glob("date=*.arrow"):
+            stale.unlink()
+    else:
+        users = _Codes(array_to_uuids(_ids_view(_read_table(directory / USERS_FILE).column("id"))))
+        items = _Codes(array_to_uuids(_ids_view(_read_table(directory / ITEMS_FILE).column("id"))))
+
+    if manifest.partitions:
+        start = date.fromisoformat(max(manifest.partitions)) + timedelta(days=1)
+    else:
+        oldest = await session.scalar(select(func.min(Interaction.event_at)))
+        start = oldest.astimezone(UTC).date() if oldest is not None else until
+
+    day = start
+    while day < until:
+        name = day.isoformat()
+        rows = await _export_day(
+            session,
+            day,
+            directory / INTERACTIONS_DIR / f"date={name}.arrow",
+            users,
+            items,
+            manifest.compression,
+            chunk_size,
+        )
+        manifest.partitions[name] = rows
+        logger.debug("training_snapshot.day", day=name, rows=rows)
+        day += timedelta(days=1)
+
+    # Written after the partitions so every code they use is present.
+    _write_table(directory / USERS_FILE, await _export_users(session, users, chunk_size), manifest.compression)
+    _write_table(directory / ITEMS_FILE, await _export_items(session, items, chunk_size), manifest.compression)
+    manifest.users, manifest.items = len(users.ids), len(items.ids)
+    manifest.exported_at = datetime.now(tz=UTC).isoformat()
+    manifest.write(directory)
+    logger.info(
+        "training_snapshot.exported",
+        directory=str(directory),
+        days=(until - start).days if until > start else 0,
+        partitions=len(manifest.partitions),
+        seconds=round(time.perf_counter() - started, 2),
+    )
+    return manifest
+
+
+@dataclass(slots=True)
+class TrainingSnapshot:
+    """A loaded snapshot: memory-mapped Arrow tables plus zero-copy NumPy views of the codes.
+
+    ``users`` and ``items`` are indexed by code; ``user_ids[code]`` / ``item_ids[code]`` are
+    ``V16`` views over the mapped files. With ``compression=None`` every buffer is used straight
+    from the page cache; compressed files are decompressed once on load.
+    """
+
+    directory: Path
+    manifest: SnapshotManifest
+    users: pa.Table
+    items: pa.Table
+    interactions: pa.Table
+    user_ids: np.ndarray
+    item_ids: np.ndarray
+
+    @classmethod
+    def open(cls, directory: Path, *, since: date | None = None, until: date | None = None) -> TrainingSnapshot:
+        """Load the day partitions in ``[since, until)`` (all by default)."""
+
+        manifest = SnapshotManifest.read(directory)
+        if manifest is None:
+            raise FileNotFoundError(f"No training snapshot in {directory}")
+        tables = [
+            _read_table(directory / INTERACTIONS_DIR / f"date={name}.arrow")
+            for name, rows in sorted(manifest.partitions.items())
+            if rows
+            and (since is None or date.fromisoformat(name) >= since)
+            and (until is None or date.fromisoformat(name) < until)
+        ]
+        interactions = pa.concat_tables(tables) if tables else INTERACTION_SCHEMA.empty_table()
+        users = _read_table(directory / USERS_FILE)
+        items = _read_table(directory / ITEMS_FILE)
+        return cls(
+            directory=directory,
+            manifest=manifest,
+            users=users,
+            items=items,
+            interactions=interactions,
+            user_ids=_ids_view(users.column("id")),
+            item_ids=_ids_view(items.column("id")),
+        )
+
+    def column(self, name: str) -> list[np.ndarray]:
+        """An interaction column as one NumPy view per record batch (no copies for fixed-width types)."""
+
+        chunks = self.interactions.column(name).chunks
+        if name == "event_type":
+            return [chunk.indices.to_numpy(zero_copy_only=True) for chunk in chunks]
+        if name == "event_at":
+            return [chunk.cast(pa.int64()).to_numpy(zero_copy_only=True) for chunk in chunks]
+        return [chunk.to_numpy(zero_copy_only=True) for chunk in chunks]
+
+    def to_pandas(self) -> Any:
+        """Interactions as a DataFrame; numeric columns without nulls share memory with Arrow."""
+
+        return self.interactions.to_pandas(split_blocks=True)
+
+    def newest_event_at(self) -> datetime | None:
+        latest = max((int(chunk.max()) for chunk in self.column("event_at") if len(chunk)), default=None)
+        return None if latest is None else datetime.fromtimestamp(latest / 1_000_000, tz=UTC)
+
+    def interaction_matrix(
+        self,
+        *,
+        event_weights: Mapping[InteractionType, float] | None = None,
+        half_life_days: float | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> InteractionMatrix:
+        """Same result as :func:`ml.matrix.build_interaction_matrix`, computed from the snapshot."""
+
+        as_of = until or datetime.now(tz=UTC)
+        overrides = np.full(len(EVENT_TYPES), np.nan)
+        for event_type, value in (event_weights or {}).items():
+            overrides[list(InteractionType).index(event_type)] = value
+        rate = math.log(2.0) / (half_life_days * 86_400.0) if half_life_days else 0.0
+        as_of_us = int(as_of.timestamp() * 1_000_000)
+
+        rows: list[np.ndarray] = []
+        columns: list[np.ndarray] = []
+        values: list[np.ndarray] = []
+        batches = zip(*(self.column(name) for name in INTERACTION_SCHEMA.names))
+        for user, item, event_type, event_at, weight in batches:
+            keep = np.ones(len(user), dtype=bool)
+            if since is not None:
+                keep &= event_at >= int(since.timestamp() * 1_000_000)
+            if until is not None:
+                keep &= event_at < as_of_us
+            override = overrides[event_type[keep]]
+            value = np.where(np.isnan(override), weight[keep], override)
+            if rate:
+                age = (as_of_us - event_at[keep]) / 1_000_000
+                value = value * np.exp(np.maximum(-rate * age, -700.0))
+            rows.append(user[keep])
+            columns.append(item[keep])
+            values.append(value)
+
+        shape = (len(self.user_ids), len(self.item_ids))
+        full = sp.csr_matrix(
+            (
+                np.concatenate(values) if values else np.empty(0),
+                (
+                    np.concatenate(rows) if rows else np.empty(0, np.int32),
+                    np.concatenate(columns) if columns else np.empty(0, np.int32),
+                ),
+            ),
+            shape=shape,
+            dtype=np.float64,
+        )
+        # Keep users and items that occur, ordered by UUID like the database builder.
+        user_codes = np.flatnonzero(np.diff(full.indptr))
+        user_codes = user_codes[_uuid_order(self.user_ids[user_codes])]
+        item_codes = np.unique(full.indices)
+        item_codes = item_codes[_uuid_order(self.item_ids[item_codes])]
+        matrix = full[user_codes][:, item_codes].astype(np.float32).tocsr()
+        matrix.sort_indices()
+        params: dict[str, object] = {
+            "event_weights": {event_type.value: value for event_type, value in (event_weights or {}).items()},
+            "half_life_days": half_life_days,
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat() if until else None,
+            "snapshot": str(self.directory),
+        }
+        return InteractionMatrix(
+            matrix=matrix,
+            user_ids=array_to_uuids(self.user_ids[user_codes]),
+            item_ids=array_to_uuids(self.item_ids[item_codes]),
+            as_of=as_of,
+            params=params,
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export interactions and catalog to a columnar training snapshot.")
+    parser.add_argument("--directory", type=Path, default=get_settings().training_snapshot_dir)
+    parser.add_argument(
+        "--until", type=date.fromisoformat, default=None, help="Export whole days before this date (default today)."
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["zstd", "lz4", "none"],
+        default="zstd",
+        help="Buffer compression; 'none' makes loading fully zero-copy from the page cache.",
+    )
+    parser.add_argument("--full", action="store_true", help="Discard the existing snapshot and export everything.")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per cursor round trip and record batch.")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(str(get_settings().database_url), future=True)
+    try:
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+            manifest = await export_snapshot(
+                session,
+                args.directory,
+                until=args.until,
+                compression=None if args.compression == "none" else args.compression,
+                full=args.full,
+                chunk_size=args.chunk_size,
+            )
+    finally:
+        await engine.dispose()
+    rows = sum(manifest.partitions.values())
+    days = len(manifest.partitions)
+    print(f"users={manifest.users} items={manifest.items} days={days} rows={rows} -> {args.directory}")
+
+
+def main() -> None:
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import scipy.sparse as sp
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from threadpoolctl import threadpool_limits
+
+from app.core.config import get_settings
+from app.core.ids import uuid7
+from app.models import Item, ModelVersionStatus
+from app.services.embedding_snapshot import SnapshotKind
+from app.services.feature_store import FeatureStoreService
+from app.services.model_versions import ModelVersionService
+from app.services.recommender import ItemMatrix, score_top_k
+from ml.matrix import InteractionMatrix, build_interaction_matrix
+from ml.snapshot import TrainingSnapshot
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(slots=True)
+class AlsParams:
+    """Hyper-parameters of implicit ALS (Hu, Koren & Volinsky) solved with conjugate gradient."""
+
+    factors: int = 64
+    regularization: float = 0.05
+    alpha: float = 40.0
+    iterations: int = 15
+    cg_steps: int = 3
+    tolerance: float = 1e-4
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    blas_threads: int | None = None
+    block_nnz: int = 262_144
+    seed: int = 42
+
+
+@dataclass(slots=True)
+class IterationStats:
+    iteration: int
+    user_seconds: float
+    item_seconds: float
+    loss_seconds: float
+    loss: float
+
+    @property
+    def seconds(self) -> float:
+        return self.user_seconds + self.item_seconds + self.loss_seconds
+
+
+@dataclass(slots=True)
+class AlsModel:
+    user_factors: np.ndarray
+    item_factors: np.ndarray
+    params: AlsParams
+    history: list[IterationStats] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def _blocks(indptr: np.ndarray, nnz_per_block: int, max_rows: int = 16_384) -> list[tuple[int, int]]:
+    """Split rows into contiguous ranges of roughly ``nnz_per_block`` stored entries each."""
+
+    blocks: list[tuple[int, int]] = []
+    rows = len(indptr) - 1
+    start = 0
+    while start < rows:
+        stop = int(np.searchsorted(indptr, indptr[start] + nnz_per_block, side="right")) - 1
+        stop = min(max(stop, start + 1), start + max_rows, rows)
+        blocks.append((start, stop))
+        start = stop
+    return blocks
+
+
+class _Block:
+    """Rows ``start:stop`` of a weight matrix with the opposite side's factors gathered once."""
+
+    def __init__(self, weights: sp.csr_matrix, factors: np.ndarray, start: int, stop: int):
+        lo, hi = weights.indptr[start], weights.indptr[stop]
+        indptr = weights.indptr[start : stop + 1] - lo
+        signed = weights.data[lo:hi]
+        # Positive entries are preferences; the magnitude of any entry is its extra confidence (c - 1).
+        self.confidence = np.abs(signed)
+        self.preference = (signed > 0).astype(np.float32)
+        self.factors = factors[weights.indices[lo:hi]]
+        self.owner = np.repeat(np.arange(stop - start), np.diff(indptr))
+        self._indices = np.arange(hi - lo, dtype=indptr.dtype)
+        self._indptr = indptr
+        self._shape = (stop - start, hi - lo)
+
+    def gather(self, values: np.ndarray) -> np.ndarray:
+        """Per row, the sum of ``values[j] * factors[j]`` over that row's entries."""
+
+        return np.asarray(sp.csr_matrix((values, self._indices, self._indptr), shape=self._shape) @ self.factors)
+
+    def dots(self, vectors: np.ndarray) -> np.ndarray:
+        return np.einsum("ij,ij->i", self.factors, vectors[self.owner])
+
+
+def _solve_block(
+    target: np.ndarray,
+    factors: np.ndarray,
+    gram: np.ndarray,
+    weights: sp.csr_matrix,
+    start: int,
+    stop: int,
+    cg_steps: int,
+) -> None:
+    """A few conjugate-gradient steps on ``(YᵀC_uY + λI) x_u = YᵀC_u p_u`` for every row in the block.
+
+    ``gram`` is ``YᵀY + λI``; the ``Yᵀ(C_u - I)Y`` part only touches each row's observed entries,
+    so the dense ``factors x factors`` system is never formed. Solves warm-start from the
+    current factors, which is why a handful of steps per sweep is enough.
+    """
+
+    block = _Block(weights, factors, start, stop)
+
+    def product(vectors: np.ndarray) -> np.ndarray:
+        return vectors @ gram + block.gather(block.confidence * block.dots(vectors))
+
+    x = target[start:stop].copy()
+    residual = block.gather(block.preference * (1.0 + block.confidence)) - product(x)
+    direction = residual.copy()
+    residual_norm = np.einsum("ij,ij->i", residual, residual)
+    for _ in range(cg_steps):
+        if not residual_norm.any():
+            break
+        projected = product(direction)
+        curvature = np.einsum("ij,ij->i", direction, projected)
+        step = np.divide(residual_norm, curvature, out=np.zeros_like(residual_norm), where=curvature > 0)
+        x += step[:, None] * direction
+        residual -= step[:, None] * projected
+        updated_norm = np.einsum("ij,ij->i", residual, residual)
+        beta = np.divide(updated_norm, residual_norm, out=np.zeros_like(updated_norm), where=residual_norm > 0)
+        direction = residual + beta[:, None] * direction
+        residual_norm = updated_norm
+    target[start:stop] = x
+
+
+def _loss_block(target: np.ndarray, factors: np.ndarray, weights: sp.csr_matrix, start: int, stop: int) -> float:
+    block = _Block(weights, factors, start, stop)
+    dots = block.dots(target[start:stop]).astype(np.float64)
+    return float(np.sum((1.0 + block.confidence) * (block.preference - dots) ** 2 - dots**2))
+
+
+def _update(
+    pool: ThreadPoolExecutor,
+    target: np.ndarray,
+    factors: np.ndarray,
+    weights: sp.csr_matrix,
+    blocks: list[tuple[int, int]],
+    params: AlsParams,
+) -> None:
+    gram = factors.T @ factors + params.regularization * np.eye(params.factors, dtype=np.float32)
+    futures = [
+        pool.submit(_solve_block, target, factors, gram, weights, start, stop, params.cg_steps)
+        for start, stop in blocks
+    ]
+    for future in futures:
+        future.result()
+
+
+def _loss(
+    pool: ThreadPoolExecutor,
+    users: np.ndarray,
+    items: np.ndarray,
+    weights: sp.csr_matrix,
+    blocks: list[tuple[int, int]],
+    params: AlsParams,
+) -> float:
+    """Weighted squared error plus L2 penalty, per unit of confidence.
+
+    Every cell contributes at least ``(x_u·y_i)²``, which sums in closed form to
+    ``trace(XᵀX YᵀY)``; only observed cells are visited to correct for their actual term.
+    """
+
+    futures = [pool.submit(_loss_block, users, items, weights, start, stop) for start, stop in blocks]
+    observed = sum(future.result() for future in futures)
+    unobserved = float(np.sum((users.T @ users).astype(np.float64) * (items.T @ items)))
+    norms = np.sum(users.astype(np.float64) ** 2) + np.sum(items.astype(np.float64) ** 2)
+    penalty = params.regularization * float(norms)
+    mass = users.shape[0] * items.shape[0] + float(np.abs(weights.data).sum())
+    return (observed + unobserved + penalty) / mass
+
+
+def train_als(matrix: sp.csr_matrix, params: AlsParams) -> AlsModel:
+    """Fit user and item factors to a users x items matrix of interaction strength.
+
+    Entries are scaled by ``alpha`` into confidences; negative entries count as confident
+    non-preferences. Rows are solved in blocks on a thread pool; the GIL is released inside the
+    NumPy, SciPy and BLAS kernels that do the work, and BLAS itself is pinned to
+    ``blas_threads`` (default: cores / workers) so the pool does not oversubscribe the CPU.
+    Training stops early once an iteration improves the loss by less than ``tolerance``.
+    """
+
+    started = time.perf_counter()
+    user_weights = sp.csr_matrix(matrix, dtype=np.float32, copy=True)
+    user_weights.sum_duplicates()
+    user_weights.data *= params.alpha
+    item_weights = user_weights.T.tocsr()
+    user_blocks = _blocks(user_weights.indptr, params.block_nnz)
+    item_blocks = _blocks(item_weights.indptr, params.block_nnz)
+
+    rng = np.random.default_rng(params.seed)
+    users = (rng.standard_normal((matrix.shape[0], params.factors)) * 0.01).astype(np.float32)
+    items = (rng.standard_normal((matrix.shape[1], params.factors)) * 0.01).astype(np.float32)
+    model = AlsModel(user_factors=users, item_factors=items, params=params)
+
+    workers = max(1, params.workers)
+    blas_threads = params.blas_threads or max(1, (os.cpu_count() or 1) // workers)
+    with threadpool_limits(limits=blas_threads, user_api="blas"), ThreadPoolExecutor(max_workers=workers) as pool:
+        previous = math.inf
+        for iteration in range(1, params.iterations + 1):
+            tick = time.perf_counter()
+            _update(pool, users, items, user_weights, user_blocks, params)
+            user_seconds, tick = time.perf_counter() - tick, time.perf_counter()
+            _update(pool, items, users, item_weights, item_blocks, params)
+            item_seconds, tick = time.perf_counter() - tick, time.perf_counter()
+            loss = _loss(pool, users, items, user_weights, user_blocks, params)
+            stats = IterationStats(iteration, user_seconds, item_seconds, time.perf_counter() - tick, loss)
+            model.history.append(stats)
+            logger.info(
+                "als.iteration",
+                iteration=iteration,
+                loss=round(loss, 6),
+                seconds=round(stats.seconds, 2),
+                user_seconds=round(user_seconds, 2),
+                item_seconds=round(item_seconds, 2),
+            )
+            if previous - loss < params.tolerance * previous:
+                logger.info("als.converged", iteration=iteration, loss=round(loss, 6))
+                break
+            previous = loss
+    model.seconds = time.perf_counter() - started
+    return model
+
+
+def format_report(model: AlsModel, shape: tuple[int, int], nnz: int) -> str:
+    params = model.params
+    lines = [
+        f"matrix={shape[0]:,}x{shape[1]:,} nnz={nnz:,} factors={params.factors} cg_steps={params.cg_steps} "
+        f"workers={params.workers}"
+    ]
+    for stats in model.history:
+        lines.append(
+            f"iteration={stats.iteration:>3} seconds={stats.seconds:8.2f} users={stats.user_seconds:8.2f} "
+            f"items={stats.item_seconds:8.2f} loss_eval={stats.loss_seconds:6.2f} loss={stats.loss:.6f}"
+        )
+    lines.append(f"wall_clock={model.seconds:.2f}s iterations={len(model.history)}")
+    return "\n".join(lines)
+
+
+def score_batches(
+    model: AlsModel,
+    matrix: InteractionMatrix,
+    item_matrix: ItemMatrix,
+    model_version: str,
+    k: int,
+    *,
+    block_size: int = 10_000,
+) -> Iterator[list[tuple[Any, ...]]]:
+    """Top-``k`` unseen items per user as ``COPY`` rows for :meth:`ModelVersionService.copy_scores`."""
+
+    weights = matrix.matrix
+    computed_at = datetime.now(tz=UTC)
+    for start in range(0, len(matrix.user_ids), block_size):
+        stop = min(start + block_size, len(matrix.user_ids))
+        seen = [weights.indices[weights.indptr[row] : weights.indptr[row + 1]] for row in range(start, stop)]
+        rows, scores = score_top_k(model.user_factors[start:stop], item_matrix, k, excluded_rows=seen)
+        records: list[tuple[Any, ...]] = []
+        for user_id, user_rows, user_scores in zip(matrix.user_ids[start:stop], rows, scores):
+            for rank, (row, score) in enumerate(zip(user_rows.tolist(), user_scores.tolist()), start=1):
+                if not math.isfinite(score):
+                    break
+                records.append(
+                    (
+                        uuid7(),
+                        user_id,
+                        item_matrix.item_ids[row],
+                        model_version,
+                        score,
+                        rank,
+                        json.dumps({"collaborative": round(score, 4)}),
+                        computed_at,
+                    )
+                )
+        yield records
+
+
+async def publish_model(
+    session: AsyncSession,
+    model: AlsModel,
+    matrix: InteractionMatrix,
+    model_version: str,
+    *,
+    top_k: int,
+    make_live: bool,
+) -> None:
+    """Write embeddings and top-``k`` scores as a new model version, then publish it.
+
+    Scores are bulk-loaded into the version's detached staging table, so they only become
+    readable once :meth:`ModelVersionService.publish` attaches it. Embeddings have no such
+    staging step: they are committed to the shared feature-store tables up front and are
+    visible to anything that pins this version before it is published. If any step fails
+    before the attach, the version is abandoned, embeddings included, instead of lingering
+    until the garbage collector's build timeout.
+    """
+
+    versions = ModelVersionService(session)
+    feature_store = FeatureStoreService(session)
+    await versions.begin_build(model_version)
+    await session.commit()
+    try:
+        metadata = {"generator": "als", **{key: str(value) for key, value in asdict(model.params).items()}}
+        await feature_store.copy_embeddings(
+            SnapshotKind.USERS, model_version, matrix.user_ids, model.user_factors, metadata=metadata
+        )
+        await feature_store.copy_embeddings(
+            SnapshotKind.ITEMS, model_version, matrix.item_ids, model.item_factors, metadata=metadata
+        )
+        await session.commit()
+
+        if top_k:
+            eligible_ids = set(
+                (await session.scalars(select(Item.id).where(Item.is_active.is_(True), Item.inventory_count > 0))).all()
+            )
+            eligible = np.fromiter((item_id in eligible_ids for item_id in matrix.item_ids), bool, len(matrix.item_ids))
+            item_matrix = ItemMatrix(
+                model_version=model_version, item_ids=matrix.item_ids, vectors=model.item_factors, eligible=eligible
+            )
+            for batch in score_batches(model, matrix, item_matrix, model_version, top_k):
+                await versions.copy_scores(model_version, batch)
+                await session.commit()
+        await versions.publish(model_version, make_live=make_live)
+    except Exception:
+        await session.rollback()
+        record = await versions.get(model_version)
+        if record is not None and record.status == ModelVersionStatus.BUILDING:
+            try:
+                await versions.abandon(model_version)
+            except Exception:
+                logger.exception("train.abandon_failed", model_version=model_version)
+            else:
+                logger.warning("train.publish_abandoned", model_version=model_version)
+        raise
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = AlsParams()
+    parser = argparse.ArgumentParser(description="Train implicit ALS and publish it as a new model version.")
+    parser.add_argument("--matrix", type=Path, default=None, help="Train on a saved .npz from ml.matrix instead.")
+    parser.add_argument("--snapshot", type=Path, default=None, help="Build the matrix from an ml.snapshot export.")
+    parser.add_argument("--half-life-days", type=float, default=None, help="Time decay when building the matrix.")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Only events at or after (ISO).")
+    parser.add_argument("--model-version", default=None, help="Defaults to als-<UTC timestamp>.")
+    parser.add_argument("--factors", type=int, default=defaults.factors)
+    parser.add_argument("--regularization", type=float, default=defaults.regularization)
+    parser.add_argument("--alpha", type=float, default=defaults.alpha, help="Confidence per unit of weight.")
+    parser.add_argument("--iterations", type=int, default=defaults.iterations, help="Upper bound on ALS sweeps.")
+    parser.add_argument("--cg-steps", type=int, default=defaults.cg_steps, help="CG steps per row and sweep.")
+    parser.add_argument("--tolerance", type=float, default=defaults.tolerance, help="Relative loss gain to go on.")
+    parser.add_argument("--workers", type=int, default=defaults.workers, help="Solver threads.")
+    parser.add_argument("--blas-threads", type=int, default=None, help="BLAS threads per solver thread.")
+    parser.add_argument("--block-nnz", type=int, default=defaults.block_nnz, help="Matrix entries per solve task.")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--top-k", type=int, default=50, help="Scores materialized per user; 0 for none.")
+    parser.add_argument("--no-live", action="store_true", help="Publish without switching readers over.")
+    parser.add_argument("--dry-run", action="store_true", help="Train and report, but write nothing.")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> None:
+    params = AlsParams(
+        factors=args.factors,
+        regularization=args.regularization,
+        alpha=args.alpha,
+        iterations=args.iterations,
+        cg_steps=args.cg_steps,
+        tolerance=args.tolerance,
+        workers=args.workers,
+        blas_threads=args.blas_threads,
+        block_nnz=args.block_nnz,
+        seed=args.seed,
+    )
+    engine = create_async_engine(str(get_settings().database_url), future=True)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    try:
+        if args.matrix is not None:
+            matrix = InteractionMatrix.load(args.matrix)
+        elif args.snapshot is not None:
+            snapshot = TrainingSnapshot.open(args.snapshot, since=args.since.date() if args.since else None)
+            matrix = snapshot.interaction_matrix(half_life_days=args.half_life_days, since=args.since)
+        else:
+            async with session_factory() as session:
+                matrix = await build_interaction_matrix(session, half_life_days=args.half_life_days, since=args.since)
+        if not matrix.matrix.nnz:
+            raise SystemExit("No interactions to train on; run `make seed` first.")
+
+        model = await asyncio.to_thread(train_als, matrix.matrix, params)
+        print(format_report(model, matrix.shape, matrix.matrix.nnz))
+        if args.dry_run:
+            return
+
+        model_version = args.model_version or f"als-{datetime.now(tz=UTC):%Y%m%d%H%M%S}"
+        started = time.perf_counter()
+        async with session_factory() as session:
+            await publish_model(session, model, matrix, model_version, top_k=args.top_k, make_live=not args.no_live)
+        print(f"published model_version={model_version} write_seconds={time.perf_counter() - started:.2f}")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from ml.train import AlsParams, format_report, train_als
+
+
+def synthetic_matrix(users: int, items: int, nnz: int, zipf_exponent: float, seed: int) -> sp.csr_matrix:
+    """Random implicit-feedback matrix with Zipf-distributed item popularity."""
+
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, items + 1, dtype=np.float64) ** zipf_exponent
+    cdf = np.cumsum(popularity / popularity.sum())
+    rows = rng.integers(0, users, size=nnz, dtype=np.int32)
+    columns = np.minimum(np.searchsorted(cdf, rng.random(nnz)), items - 1).astype(np.int32)
+    values = rng.choice(np.asarray([1.0, 2.0, 5.0], dtype=np.float32), size=nnz, p=[0.8, 0.15, 0.05])
+    matrix = sp.csr_matrix((values, (rows, columns)), shape=(users, items), dtype=np.float32)
+    matrix.sum_duplicates()
+    return matrix
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Time ALS training on a synthetic matrix, CPU only, no database.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--nnz", type=int, default=20_000_000, help="Interactions drawn before de-duplication.")
+    parser.add_argument("--zipf-exponent", type=float, default=0.8)
+    parser.add_argument("--factors", type=int, default=64)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--cg-steps", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[AlsParams().workers], help="Thread counts to try.")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    started = time.perf_counter()
+    matrix = synthetic_matrix(args.users, args.items, args.nnz, args.zipf_exponent, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"generated {matrix.shape[0]:,}x{matrix.shape[1]:,} nnz={matrix.nnz:,} in {elapsed:.1f}s")
+    for workers in args.workers:
+        params = AlsParams(
+            factors=args.factors,
+            iterations=args.iterations,
+            cg_steps=args.cg_steps,
+            tolerance=args.tolerance,
+            workers=workers,
+            seed=args.seed,
+        )
+        model = train_als(matrix, params)
+        print(format_report(model, matrix.shape, matrix.nnz))
+
+
+if __name__ == "__main__":
+    main()
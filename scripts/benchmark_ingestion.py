@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.models import Interaction, InteractionType, Item, User
+from app.schemas.interaction import InteractionCreate
+from app.services.interactions import InteractionIngestionService
+
+
+def make_events(count: int, user_ids: list, item_ids: list, rng: random.Random) -> list[InteractionCreate]:
+    now = datetime.now(tz=UTC)
+    event_types = list(InteractionType)
+    return [
+        InteractionCreate(
+            user_id=rng.choice(user_ids),
+            item_id=rng.choice(item_ids),
+            event_type=rng.choice(event_types),
+            event_at=now - timedelta(seconds=rng.randint(0, 86_400)),
+            weight=1.0,
+            source="benchmark",
+        )
+        for _ in range(count)
+    ]
+
+
+async def orm_insert(session: AsyncSession, events: list[InteractionCreate]) -> None:
+    session.add_all([Interaction(**event.model_dump()) for event in events])
+    await session.flush()
+
+
+async def copy_insert(session: AsyncSession, events: list[InteractionCreate]) -> None:
+    await InteractionIngestionService(session).ingest(events)
+
+
+async def measure(
+    label: str,
+    session_factory: async_sessionmaker[AsyncSession],
+    writer: Callable[[AsyncSession, list[InteractionCreate]], Awaitable[None]],
+    events: list[InteractionCreate],
+) -> None:
+    # Every run is rolled back so repeated benchmarks do not grow the interactions table.
+    async with session_factory() as session:
+        started = time.perf_counter()
+        await writer(session, events)
+        elapsed = time.perf_counter() - started
+        await session.rollback()
+    print(f"{label:<6} rows={len(events):>7} elapsed={elapsed:8.3f}s rows/sec={len(events) / elapsed:12,.0f}")
+
+
+async def run(sizes: list[int], skip_orm_above: int, seed: int) -> None:
+    settings = get_settings()
+    engine = create_async_engine(str(settings.database_url), future=True)
+    session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        user_ids = list((await session.scalars(select(User.id).limit(1_000))).all())
+        item_ids = list((await session.scalars(select(Item.id).limit(5_000))).all())
+    if not user_ids or not item_ids:
+        raise SystemExit("No users or items found; run `make seed` first.")
+
+    rng = random.Random(seed)
+    for size in sizes:
+        events = make_events(size, user_ids, item_ids, rng)
+        await measure("copy", session_factory, copy_insert, events)
+        if size <= skip_orm_above:
+            await measure("orm", session_factory, orm_insert, events)
+
+    await engine.dispose()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare COPY-based interaction ingestion with ORM inserts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000], help="Batch sizes to write.")
+    parser.add_argument(
+        "--skip-orm-above",
+        type=int,
+        default=100_000,
+        help="Only run the ORM baseline for batches up to this size.",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic events.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    asyncio.run(run(args.sizes, args.skip_orm_above, args.seed))
+
+
+if __name__ == "__main__":
+    main()
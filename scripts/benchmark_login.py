@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+
+async def probe_liveness(client: httpx.AsyncClient, stop_at: float, interval: float, samples: list[float]) -> None:
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        response = await client.get("/api/v1/health/live")
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def login_loop(
+    client: httpx.AsyncClient,
+    stop_at: float,
+    email: str,
+    password: str,
+    outcomes: dict[int, int],
+) -> None:
+    while time.perf_counter() < stop_at:
+        response = await client.post("/api/v1/auth/login", json={"email": email, "password": password})
+        outcomes[response.status_code] = outcomes.get(response.status_code, 0) + 1
+
+
+def summarize(label: str, samples: list[float]) -> None:
+    if not samples:
+        print(f"{label}: no samples")
+        return
+    values = np.asarray(samples) * 1000.0
+    print(
+        f"{label}: n={len(values)} p50={np.percentile(values, 50):.1f}ms "
+        f"p95={np.percentile(values, 95):.1f}ms p99={np.percentile(values, 99):.1f}ms max={values.max():.1f}ms"
+    )
+
+
+async def run(base_url: str, email: str, password: str, concurrency: int, duration: float, interval: float) -> None:
+    limits = httpx.Limits(max_connections=concurrency + 4)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        baseline: list[float] = []
+        await probe_liveness(client, time.perf_counter() + min(duration, 5.0), interval, baseline)
+        summarize("/health/live idle", baseline)
+
+        under_load: list[float] = []
+        outcomes: dict[int, int] = {}
+        stop_at = time.perf_counter() + duration
+        await asyncio.gather(
+            probe_liveness(client, stop_at, interval, under_load),
+            *(login_loop(client, stop_at, email, password, outcomes) for _ in range(concurrency)),
+        )
+        summarize(f"/health/live with {concurrency} concurrent logins", under_load)
+        total = sum(outcomes.values())
+        print(f"logins: {total} in {duration:.0f}s ({total / duration:.1f}/s) status={outcomes}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure /health/live latency while password logins saturate the server."
+    )
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="admin@example.com")
+    parser.add_argument("--password", default="AdminPass123!")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of login traffic.")
+    parser.add_argument("--interval", type=float, default=0.01, help="Delay between liveness probes.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    asyncio.run(run(args.base_url, args.email, args.password, args.concurrency, args.duration, args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import DateTime, Float, column, func, select, table, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.services.partitions import time_window
+
+FLAT_TABLE = "interactions_flat_benchmark"
+
+
+def window_query(table_name: str, since: datetime, until: datetime) -> str:
+    events = table(table_name, column("event_at", DateTime(timezone=True)), column("weight", Float))
+    stmt = select(func.count(), func.sum(events.c.weight)).where(time_window(events.c.event_at, since, until))
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def summarize(plan: dict[str, Any]) -> tuple[float, int, int]:
+    """Return execution ms, shared buffers touched and relations scanned from an EXPLAIN plan."""
+
+    scanned = 0
+    buffers = 0
+
+    def walk(node: dict[str, Any]) -> None:
+        nonlocal scanned, buffers
+        if "Relation Name" in node:
+            scanned += 1
+            buffers += node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0)
+        for child in node.get("Plans", ()):
+            walk(child)
+
+    walk(plan["Plan"])
+    return float(plan["Execution Time"]), buffers, scanned
+
+
+async def explain(session: AsyncSession, sql: str) -> tuple[float, int, int]:
+    raw = await session.scalar(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"))
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+    return summarize(plan)
+
+
+async def run(windows: list[int], repeats: int) -> None:
+    settings = get_settings()
+    engine = create_async_engine(str(settings.database_url), future=True)
+    session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        total = int(await session.scalar(text("SELECT count(*) FROM interactions")) or 0)
+        if not total:
+            raise SystemExit("No interactions found; run `make seed` first.")
+        newest = await session.scalar(text("SELECT max(event_at) FROM interactions")) or datetime.now(tz=UTC)
+        # Unpartitioned baseline: same rows, one heap, B-tree on the range column.
+        await session.execute(text(f"DROP TABLE IF EXISTS {FLAT_TABLE}"))
+        await session.execute(text(f"CREATE UNLOGGED TABLE {FLAT_TABLE} AS SELECT * FROM interactions"))
+        await session.execute(text(f"CREATE INDEX ON {FLAT_TABLE} (event_at)"))
+        await session.execute(text(f"ANALYZE {FLAT_TABLE}"))
+        await session.execute(text("ANALYZE interactions"))
+        await session.commit()
+
+        print(f"rows={total}")
+        try:
+            for days in windows:
+                since, until = newest - timedelta(days=days), newest + timedelta(microseconds=1)
+                for label, table_name in (("flat", FLAT_TABLE), ("partitioned", "interactions")):
+                    samples = [await explain(session, window_query(table_name, since, until)) for _ in range(repeats)]
+                    best = min(samples)
+                    print(
+                        f"window={days:>4}d {label:<12} exec={best[0]:9.2f}ms "
+                        f"buffers={best[1]:>9} relations_scanned={best[2]:>3}"
+                    )
+        finally:
+            await session.rollback()
+            await session.execute(text(f"DROP TABLE IF EXISTS {FLAT_TABLE}"))
+            await session.commit()
+
+    await engine.dispose()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare time-window scans on partitioned vs. flat interactions.")
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 7, 30, 90], help="Window sizes in days.")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per query; the fastest is reported.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    asyncio.run(run(args.windows, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.core.config import get_settings
+from app.models import Item, RecommendationScore, User
+from app.services.feature_store import FeatureStoreService
+
+# Loader options reproducing the previous ``lazy="selectin"`` / ``lazy="joined"`` defaults.
+LEGACY_USER_OPTIONS = (
+    selectinload(User.interactions),
+    selectinload(User.assignments),
+    selectinload(User.event_logs),
+)
+LEGACY_ITEM_OPTIONS = (
+    selectinload(Item.interactions),
+    selectinload(Item.item_embeddings),
+    selectinload(Item.recommendation_scores),
+)
+
+
+@dataclass
+class StatementCounter:
+    statements: int = 0
+    samples: list[float] = field(default_factory=list)
+
+    def __call__(self, *_: Any) -> None:
+        self.statements += 1
+
+
+async def measure(
+    label: str,
+    engine: AsyncEngine,
+    session_factory: async_sessionmaker[AsyncSession],
+    runs: list[Callable[[AsyncSession], Awaitable[object]]],
+) -> None:
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        for run in runs:
+            # A fresh session per run keeps the identity map from hiding repeated loads.
+            async with session_factory() as session:
+                started = time.perf_counter()
+                await run(session)
+                counter.samples.append(time.perf_counter() - started)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+    per_run = counter.statements / max(len(runs), 1)
+    mean_ms = 1000.0 * sum(counter.samples) / max(len(counter.samples), 1)
+    print(f"{label:<45} queries/run={per_run:6.2f} mean={mean_ms:8.2f}ms")
+
+
+async def run(sample_users: int, limit: int) -> None:
+    settings = get_settings()
+    engine = create_async_engine(str(settings.database_url), future=True)
+    session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        user_ids = (await session.scalars(select(User.id).limit(sample_users))).all()
+    if not user_ids:
+        raise SystemExit("No users found; run `make seed` first.")
+
+    def legacy_user(user_id: Any) -> Callable[[AsyncSession], Awaitable[object]]:
+        return lambda session: session.get(User, user_id, options=LEGACY_USER_OPTIONS)
+
+    def current_user(user_id: Any) -> Callable[[AsyncSession], Awaitable[object]]:
+        return lambda session: session.get(User, user_id)
+
+    def legacy_scores(user_id: Any) -> Callable[[AsyncSession], Awaitable[object]]:
+        async def load(session: AsyncSession) -> object:
+            stmt = (
+                select(RecommendationScore, Item)
+                .join(Item, RecommendationScore.item_id == Item.id)
+                .where(RecommendationScore.user_id == user_id)
+                .order_by(RecommendationScore.score.desc())
+                .limit(limit)
+                .options(
+                    joinedload(RecommendationScore.user).options(*LEGACY_USER_OPTIONS),
+                    joinedload(RecommendationScore.item),
+                    *LEGACY_ITEM_OPTIONS,
+                )
+            )
+            return (await session.execute(stmt)).unique().all()
+
+        return load
+
+    def current_scores(user_id: Any) -> Callable[[AsyncSession], Awaitable[object]]:
+        return lambda session: FeatureStoreService(session).fetch_recommendation_scores(user_id, limit=limit)
+
+    print(f"users={len(user_ids)} limit={limit}")
+    await measure("get_current_user lookup (eager, before)", engine, session_factory, [legacy_user(u) for u in user_ids])
+    await measure("get_current_user lookup (raise, after)", engine, session_factory, [current_user(u) for u in user_ids])
+    await measure("fetch_recommendation_scores (eager, before)", engine, session_factory, [legacy_scores(u) for u in user_ids])
+    await measure("fetch_recommendation_scores (raise, after)", engine, session_factory, [current_scores(u) for u in user_ids])
+
+    await engine.dispose()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare queries issued with eager vs. raise-by-default loaders.")
+    parser.add_argument("--users", type=int, default=50, help="Number of users to sample.")
+    parser.add_argument("--limit", type=int, default=20, help="Recommendations fetched per user.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    asyncio.run(run(args.users, args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.config import get_settings
+from app.core.ids import uuid7
+
+GENERATORS: dict[str, Callable[[], uuid.UUID]] = {"v4": uuid.uuid4, "v7": uuid7}
+
+
+async def load(engine: AsyncEngine, version: str, rows: int, chunk_size: int, report_every: int) -> None:
+    generate = GENERATORS[version]
+    table = f"benchmark_uuid_{version}"
+    async with engine.connect() as connection:
+        await connection.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        # Same shape as an interaction row: a UUID primary key plus a modest payload.
+        await connection.execute(
+            text(f"CREATE TABLE {table} (id uuid PRIMARY KEY, user_id uuid NOT NULL, weight double precision NOT NULL)")
+        )
+        await connection.commit()
+        raw = (await connection.get_raw_connection()).driver_connection
+
+        written = 0
+        window_rows = 0
+        window_started = started = time.perf_counter()
+        copy_seconds = 0.0
+        while written < rows:
+            size = min(chunk_size, rows - written)
+            records = [(generate(), uuid.uuid4(), 1.0) for _ in range(size)]
+            copy_started = time.perf_counter()
+            await raw.copy_records_to_table(table, records=records, columns=("id", "user_id", "weight"))
+            copy_seconds += time.perf_counter() - copy_started
+            written += size
+            window_rows += size
+            if written % report_every < chunk_size or written == rows:
+                elapsed = time.perf_counter() - window_started
+                print(f"{version} rows={written:>11,} window_rows/sec={window_rows / elapsed:12,.0f}")
+                window_rows, window_started = 0, time.perf_counter()
+
+        total = time.perf_counter() - started
+        index_bytes = await connection.scalar(text(f"SELECT pg_relation_size('{table}_pkey')"))
+        await connection.commit()
+    print(
+        f"{version} total={total:8.1f}s db_rows/sec={rows / copy_seconds:12,.0f} "
+        f"pkey_size={int(index_bytes or 0) / 1024 / 1024:8.1f}MiB"
+    )
+
+
+async def run(rows: int, chunk_size: int, report_every: int, keep: bool) -> None:
+    settings = get_settings()
+    engine = create_async_engine(str(settings.database_url), future=True)
+    try:
+        for version in GENERATORS:
+            await load(engine, version, rows, chunk_size, report_every)
+    finally:
+        if not keep:
+            async with engine.begin() as connection:
+                for version in GENERATORS:
+                    await connection.execute(text(f"DROP TABLE IF EXISTS benchmark_uuid_{version}"))
+        await engine.dispose()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare primary-key insert throughput for UUIDv4 vs UUIDv7.")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Rows inserted per key version.")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Rows per COPY.")
+    parser.add_argument("--report-every", type=int, default=1_000_000, help="Print throughput every N rows.")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark tables for inspection.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    asyncio.run(run(args.rows, args.chunk_size, args.report_every, args.keep))
+
+
+if __name__ == "__main__":
+    main()
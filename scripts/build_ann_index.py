@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.services.ann_index import build_item_index
+
+
+async def build(model_version: str, nlist: int | None) -> None:
+    settings = get_settings()
+    engine = create_async_engine(str(settings.database_url), future=True)
+    session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        index = await build_item_index(session, model_version, nlist=nlist)
+
+    await engine.dispose()
+    print(f"Built index for {model_version}: {len(index)} items, {index.nlist} lists")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build and persist the item ANN index for a model version.")
+    parser.add_argument("--model-version", required=True, help="Model version whose item embeddings are indexed.")
+    parser.add_argument("--nlist", type=int, default=None, help="Number of inverted lists (default: 4*sqrt(n)).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    asyncio.run(build(args.model_version, args.nlist))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.services.embedding_snapshot import export_embedding_snapshot
+
+
+async def export(model_version: str) -> None:
+    settings = get_settings()
+    engine = create_async_engine(str(settings.database_url), future=True)
+    session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        directory = await export_embedding_snapshot(session, model_version)
+
+    await engine.dispose()
+    print(f"Exported embedding snapshot for {model_version} to {directory}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export a model version's embeddings to a memory-mapped snapshot.")
+    parser.add_argument("--model-version", required=True, help="Model version to export.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    asyncio.run(export(args.model_version))
+
+
+if __name__ == "__main__":
+    main()
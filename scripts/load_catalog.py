@@ -3,14 +3,20 @@ from __future__ import annotations
 import argparse
 import asyncio
 import csv
+import hashlib
+import json
+import time
+import uuid
+from contextlib import nullcontext
 from dataclasses import dataclass
-from datetime import UTC, datetime
 from decimal import Decimal
+from itertools import islice
 from pathlib import Path
-from typing import Iterable
+from typing import IO, Any, Iterable, Iterator
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import String, and_, bindparam, func, literal, literal_column, or_, text
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
 from app.core.config import get_settings
 from app.models import Item
@@ -28,6 +34,22 @@ class CatalogRow:
     price: Decimal
     inventory_count: int
 
+    def fingerprint(self) -> str:
+        """SHA-256 over every field the loader writes, so unchanged rows can be skipped."""
+
+        canonical = [
+            self.title,
+            self.description,
+            self.categories,
+            self.tags,
+            self.brand,
+            self.color,
+            str(self.price.quantize(Decimal("0.01"))),
+            self.inventory_count,
+        ]
+        encoded = json.dumps(canonical, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
 
 def parse_list(value: str) -> list[str]:
     return [part.strip() for part in value.split("|") if part.strip()]
@@ -50,54 +72,197 @@ def read_catalog(csv_path: Path) -> Iterable[CatalogRow]:
             )
 
 
-async def upsert_item(session: AsyncSession, payload: CatalogRow) -> None:
-    existing: Item | None = await session.scalar(select(Item).where(Item.sku == payload.sku))
-    if existing:
-        existing.title = payload.title
-        existing.description = payload.description
-        existing.categories = payload.categories
-        existing.tags = payload.tags
-        existing.brand = payload.brand
-        existing.color = payload.color
-        existing.price = payload.price
-        existing.inventory_count = payload.inventory_count
-        metadata = dict(existing.metadata_json or {})
-        metadata["source"] = "catalog_csv"
-        existing.metadata_json = metadata
-        existing.updated_at = datetime.now(tz=UTC)
-    else:
-        session.add(
-            Item(
-                sku=payload.sku,
-                title=payload.title,
-                description=payload.description,
-                categories=payload.categories,
-                tags=payload.tags,
-                brand=payload.brand,
-                color=payload.color,
-                price=payload.price,
-                inventory_count=payload.inventory_count,
-                metadata_json={"source": "catalog_csv"},
-                is_active=True,
-            )
+# asyncpg caps a statement at 32767 bind parameters; each row binds one per column below.
+UPSERT_COLUMNS = 12
+MAX_CHUNK_SIZE = 32_767 // UPSERT_COLUMNS
+
+# SKUs seen in this run; temporary, so it lives exactly as long as the loader's connection.
+SEEN_TABLE = "catalog_sync_seen"
+
+# ``metadata_json`` key marking items this loader soft-deleted; only those are reactivated when
+# their SKU comes back, so items deactivated by hand stay inactive.
+DEACTIVATED_BY_KEY = "deactivated_by"
+DEACTIVATED_BY = "catalog_sync"
+
+
+def chunked(rows: Iterable[CatalogRow], size: int) -> Iterator[list[CatalogRow]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def to_values(payload: CatalogRow) -> dict[str, Any]:
+    return {
+        "id": uuid.uuid4(),
+        "sku": payload.sku,
+        "title": payload.title,
+        "description": payload.description,
+        "categories": payload.categories,
+        "tags": payload.tags,
+        "brand": payload.brand,
+        "color": payload.color,
+        "price": payload.price,
+        "inventory_count": payload.inventory_count,
+        "metadata_json": {"source": "catalog_csv"},
+        "content_hash": payload.fingerprint(),
+    }
+
+
+def write_changes(changes: IO[str] | None, op: str, rows: Iterable[Any]) -> None:
+    """Append ``{"op", "item_id", "sku", "content_hash"}`` lines to the change set."""
+
+    if changes is None:
+        return
+    for row in rows:
+        record = {"op": op, "item_id": str(row.id), "sku": row.sku, "content_hash": row.content_hash}
+        changes.write(json.dumps(record) + "\n")
+
+
+async def upsert_chunk(
+    session: AsyncSession,
+    rows: list[CatalogRow],
+    changes: IO[str] | None = None,
+) -> tuple[int, int]:
+    """Write the new and changed rows of ``rows`` in one statement; returns ``(inserted, updated)``.
+
+    Unchanged SKUs match the conflict target but fail the ``WHERE`` on the update, so they are
+    neither rewritten nor returned. A SKU that :func:`deactivate_missing` soft-deleted is
+    reactivated when it reappears; one deactivated any other way keeps ``is_active`` as is.
+    """
+
+    # ON CONFLICT cannot touch the same row twice in one statement, so the last occurrence
+    # of a repeated SKU wins, as it did when rows were applied one at a time.
+    values = list({row.sku: to_values(row) for row in rows}.values())
+    await session.execute(
+        text(f"INSERT INTO {SEEN_TABLE} (sku) SELECT unnest(:skus) ON CONFLICT DO NOTHING").bindparams(
+            bindparam("skus", [value["sku"] for value in values], type_=ARRAY(Item.sku.type))
+        )
+    )
+    stmt = insert(Item).values(values)
+    delisted_here = Item.metadata_json[DEACTIVATED_BY_KEY].astext == DEACTIVATED_BY
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Item.sku],
+        set_={
+            "title": stmt.excluded.title,
+            "description": stmt.excluded.description,
+            "categories": stmt.excluded.categories,
+            "tags": stmt.excluded.tags,
+            "brand": stmt.excluded.brand,
+            "color": stmt.excluded.color,
+            "price": stmt.excluded.price,
+            "inventory_count": stmt.excluded.inventory_count,
+            "metadata_json": Item.metadata_json.op("-")(literal(DEACTIVATED_BY_KEY, String)).op("||")(
+                stmt.excluded.metadata_json
+            ),
+            "content_hash": stmt.excluded.content_hash,
+            "is_active": or_(Item.is_active, delisted_here),
+            "updated_at": func.now(),
+        },
+        where=or_(
+            Item.content_hash.is_distinct_from(stmt.excluded.content_hash),
+            and_(Item.is_active.is_(False), delisted_here),
+        ),
+    ).returning(Item.id, Item.sku, Item.content_hash, literal_column("xmax = 0").label("is_insert"))
+    # xmax is zero only on freshly inserted tuples, which separates inserts from updates.
+    written = (await session.execute(stmt)).all()
+    inserted = [row for row in written if row.is_insert]
+    updated = [row for row in written if not row.is_insert]
+    write_changes(changes, "insert", inserted)
+    write_changes(changes, "update", updated)
+    return len(inserted), len(updated)
+
+
+async def deactivate_missing(
+    session: AsyncSession,
+    changes: IO[str] | None = None,
+    *,
+    max_fraction: float = 1.0,
+) -> int:
+    """Soft-delete active items whose SKU was absent from the feed; returns the count.
+
+    Each item is marked in ``metadata_json`` so :func:`upsert_chunk` can tell it from items
+    deactivated by hand.
+
+    Refuses to run when more than ``max_fraction`` of the active catalog would disappear,
+    which usually means a truncated feed rather than a real delisting.
+    """
+
+    missing = f"is_active AND NOT EXISTS (SELECT 1 FROM {SEEN_TABLE} AS seen WHERE seen.sku = items.sku)"
+    missing_count, active_count = (
+        await session.execute(
+            text(f"SELECT count(*) FILTER (WHERE {missing}), count(*) FILTER (WHERE is_active) FROM items")
+        )
+    ).one()
+    if missing_count and missing_count > max_fraction * active_count:
+        raise SystemExit(
+            f"Refusing to deactivate {missing_count:,} of {active_count:,} active items; "
+            "pass a higher --max-delete-fraction if the feed really dropped them."
         )
+    result = await session.stream(
+        text(
+            f"""
+            UPDATE items SET
+                is_active = false,
+                metadata_json = metadata_json || jsonb_build_object('{DEACTIVATED_BY_KEY}', :deactivated_by),
+                updated_at = now()
+            WHERE {missing}
+            RETURNING id, sku, content_hash
+            """
+        ).bindparams(deactivated_by=DEACTIVATED_BY)
+    )
+    deleted = 0
+    async for partition in result.partitions(5_000):
+        write_changes(changes, "delete", partition)
+        deleted += len(partition)
+    return deleted
 
 
-async def load_catalog(csv_path: Path) -> None:
+async def load_catalog(
+    csv_path: Path,
+    *,
+    chunk_size: int = 2_000,
+    changes_path: Path | None = None,
+    full_feed: bool = True,
+    max_delete_fraction: float = 0.2,
+) -> None:
     settings = get_settings()
     engine = create_async_engine(str(settings.database_url), future=True)
-    session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(bind=engine, expire_on_commit=False)
-
-    rows = list(read_catalog(csv_path))
-    if not rows:
-        raise SystemExit("Catalog CSV is empty; nothing to import.")
 
-    async with session_factory() as session:
-        for row in rows:
-            await upsert_item(session, row)
-        await session.commit()
+    processed = inserted = updated = deleted = 0
+    started = time.perf_counter()
+    try:
+        # One pinned connection keeps the temporary seen-SKU table alive across per-chunk commits.
+        async with engine.connect() as connection, AsyncSession(bind=connection, expire_on_commit=False) as session:
+            with changes_path.open("w", encoding="utf-8") if changes_path else nullcontext() as changes:
+                await session.execute(text(f"CREATE TEMPORARY TABLE {SEEN_TABLE} (sku varchar(64) PRIMARY KEY)"))
+                await session.commit()
+                # Rows are parsed lazily and committed per chunk, so memory and transaction size stay
+                # bounded by ``chunk_size`` whatever the size of the file.
+                for chunk in chunked(read_catalog(csv_path), chunk_size):
+                    chunk_inserted, chunk_updated = await upsert_chunk(session, chunk, changes)
+                    await session.commit()
+                    processed += len(chunk)
+                    inserted += chunk_inserted
+                    updated += chunk_updated
+                    elapsed = time.perf_counter() - started
+                    print(
+                        f"rows={processed:>10,} inserted={inserted:>10,} updated={updated:>10,} "
+                        f"rows/sec={processed / elapsed:10,.0f}",
+                        flush=True,
+                    )
+                if not processed:
+                    raise SystemExit("Catalog CSV is empty; nothing to import.")
+                if full_feed:
+                    deleted = await deactivate_missing(session, changes, max_fraction=max_delete_fraction)
+                    await session.commit()
+    finally:
+        # Also on SystemExit from an empty feed or the deactivation guard.
+        await engine.dispose()
 
-    await engine.dispose()
+    print(
+        f"loaded {processed:,} rows in {time.perf_counter() - started:.1f}s: "
+        f"inserted={inserted:,} updated={updated:,} unchanged={processed - inserted - updated:,} deleted={deleted:,}"
+    )
 
 
 def parse_args() -> argparse.Namespace:
@@ -108,6 +273,29 @@ def parse_args() -> argparse.Namespace:
         default=Path(__file__).resolve().parent.parent / "data" / "catalog.csv",
         help="Path to catalog CSV file.",
     )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=2_000,
+        help=f"Rows upserted per statement and transaction (max {MAX_CHUNK_SIZE}).",
+    )
+    parser.add_argument(
+        "--changes",
+        type=Path,
+        default=None,
+        help="Write inserted, updated and deleted SKUs to this JSON Lines file.",
+    )
+    parser.add_argument(
+        "--partial",
+        action="store_true",
+        help="The file is a partial feed; do not deactivate SKUs missing from it.",
+    )
+    parser.add_argument(
+        "--max-delete-fraction",
+        type=float,
+        default=0.2,
+        help="Abort instead of deactivating more than this fraction of active items.",
+    )
     return parser.parse_args()
 
 
@@ -115,7 +303,17 @@ def main() -> None:
     args = parse_args()
     if not args.path.exists():
         raise SystemExit(f"Catalog file not found: {args.path}")
-    asyncio.run(load_catalog(args.path))
+    if not 0 < args.chunk_size <= MAX_CHUNK_SIZE:
+        raise SystemExit(f"--chunk-size must be between 1 and {MAX_CHUNK_SIZE}.")
+    asyncio.run(
+        load_catalog(
+            args.path,
+            chunk_size=args.chunk_size,
+            changes_path=args.changes,
+            full_feed=not args.partial,
+            max_delete_fraction=args.max_delete_fraction,
+        )
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.services.affinity import AffinityService
+
+
+async def rebuild(chunk_size: int) -> None:
+    settings = get_settings()
+    engine = create_async_engine(str(settings.database_url), future=True)
+    session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    started = time.perf_counter()
+    async with session_factory() as session:
+        rows = await AffinityService(session).rebuild(chunk_size=chunk_size)
+
+    await engine.dispose()
+    print(f"Rebuilt {rows} user-item affinity rows in {time.perf_counter() - started:.1f}s")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Recompute the user_item_affinity rollup from interactions.")
+    parser.add_argument("--chunk-size", type=int, default=5_000, help="Users rewritten per transaction.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    asyncio.run(rebuild(args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
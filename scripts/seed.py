@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import argparse
 import asyncio
+import json
 import math
 import random
-from datetime import UTC, datetime, timedelta
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
 from decimal import Decimal
 import hashlib
-from typing import Sequence
+from typing import Any, Sequence
 
 import numpy as np
 from faker import Faker
@@ -31,6 +36,10 @@ from app.models import (
     UserEmbedding,
     UserRole,
 )
+from app.services.affinity import AffinityService
+from app.services.interactions import InteractionIngestionService
+from app.services.model_versions import ModelVersionService
+from app.services.partitions import PARTITIONED_TABLES, PartitionManager
 
 faker = Faker()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -58,11 +67,13 @@ async def truncate_tables(session: AsyncSession) -> None:
     tables = [
         "event_logs",
         "feature_store_recommendation_scores",
+        "feature_store_model_versions",
         "feature_store_item_embeddings",
         "feature_store_user_embeddings",
         "ab_test_assignments",
         "ab_tests",
         "feature_flags",
+        "user_item_affinity",
         "interactions",
         "items",
         "users",
@@ -78,10 +89,10 @@ def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def build_users() -> list[User]:
-    """Create deterministic user fixtures."""
+def build_staff_users() -> list[User]:
+    """Admin and analyst accounts with well-known demo credentials."""
 
-    users: list[User] = [
+    return [
         User(
             email="admin@example.com",
             full_name="Admin User",
@@ -97,6 +108,14 @@ def build_users() -> list[User]:
         ),
     ]
 
+
+def build_users() -> list[User]:
+    """Create deterministic user fixtures."""
+
+    users = build_staff_users()
+
+    # bcrypt is deliberately slow; every generated user shares the same password anyway.
+    user_password = hash_password("UserPass123!")
     for _ in range(NUM_USERS - len(users)):
         profile = faker.simple_profile()
         users.append(
@@ -104,7 +123,7 @@ def build_users() -> list[User]:
                 email=profile["mail"],
                 full_name=profile["name"],
                 role=UserRole.USER,
-                hashed_password=hash_password("UserPass123!"),
+                hashed_password=user_password,
                 preferences={
                     "preferred_categories": random.sample(
                         ["electronics", "home", "fitness", "music", "outdoors", "fashion"],
@@ -398,6 +417,13 @@ async def seed() -> None:
     async with SessionLocal() as session:
         await truncate_tables(session)
 
+    async with SessionLocal() as session:
+        # Seeded history reaches back ~4 months; give it real partitions instead of the default one.
+        manager = PartitionManager(session)
+        for table in PARTITIONED_TABLES:
+            await manager.ensure_partitions(table, start=datetime.now(tz=UTC) - timedelta(days=130))
+        await session.commit()
+
     async with SessionLocal() as session:
         users = build_users()
         session.add_all(users)
@@ -422,6 +448,7 @@ async def seed() -> None:
         session.add_all(assignments)
 
         user_embeddings, item_embeddings, rec_scores = build_embeddings(users, items)
+        await ModelVersionService(session).ensure_partition(MODEL_VERSION)
         session.add_all(user_embeddings)
         session.add_all(item_embeddings)
         session.add_all(rec_scores)
@@ -430,14 +457,387 @@ async def seed() -> None:
         session.add_all(event_logs)
 
         await session.commit()
+        await ModelVersionService(session).activate(MODEL_VERSION)
+
+    async with SessionLocal() as session:
+        # Seeded interactions bypass the ingestion service, so roll them up in one pass.
+        await AffinityService(session).rebuild()
 
     await engine.dispose()
 
 
+@dataclass(frozen=True)
+class Preset:
+    """Row counts for a synthetic load-test dataset."""
+
+    users: int
+    items: int
+    interactions: int
+
+
+PRESETS: dict[str, Preset] = {
+    "small": Preset(users=10_000, items=50_000, interactions=1_000_000),
+    "medium": Preset(users=50_000, items=250_000, interactions=10_000_000),
+    "large": Preset(users=100_000, items=1_000_000, interactions=100_000_000),
+}
+
+CATEGORIES = [
+    "electronics",
+    "fashion",
+    "home",
+    "fitness",
+    "music",
+    "outdoors",
+    "beauty",
+    "gaming",
+    "books",
+    "photography",
+]
+TAGS = ["wireless", "sustainable", "limited", "ergonomic", "smart", "portable", "premium", "budget", "eco", "modular"]
+BRANDS = ["Aurora Labs", "Nimbus Co.", "Vertex", "Pulse"]
+COLORS = ["black", "white", "red", "green", "blue", "purple", "silver", "gold"]
+ADJECTIVES = ["Compact", "Smart", "Classic", "Ultra", "Eco", "Pro", "Modular", "Wireless", "Premium", "Everyday"]
+NOUNS = ["Speaker", "Jacket", "Lamp", "Backpack", "Headphones", "Kettle", "Camera", "Tracker", "Chair", "Controller"]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Patel", "Kim", "Nguyen", "Müller", "Rossi", "Silva", "Okafor"]
+
+EVENT_TYPES = np.array([event_type.value for event_type in InteractionType], dtype=object)
+EVENT_TYPE_PROBABILITIES = np.array([0.55, 0.20, 0.15, 0.07, 0.03])
+EVENT_WEIGHTS = np.array([0.2, 0.4, 0.6, 1.0, 0.8])
+SOURCES = np.array(["web", "mobile", "email"], dtype=object)
+SOURCE_PROBABILITIES = np.array([0.55, 0.40, 0.05])
+
+MEAN_SESSION_EVENTS = 6.0
+MEAN_EVENT_GAP_SECONDS = 45.0
+# Share of events after the first that stay near the session's anchor item (same category block).
+SESSION_FOCUS = 0.6
+# Interactions are generated per block of users sized to about this many events. Blocks key
+# their random streams, so changing it (or ``--interactions``) regroups users and redraws
+# every session; keep it fixed for datasets that must be reproducible across runs.
+EVENTS_PER_BLOCK = 1_000_000
+
+USER_COLUMNS = ("id", "email", "hashed_password", "full_name", "role", "is_active", "preferences", "feature_flags")
+ITEM_COLUMNS = (
+    "id",
+    "sku",
+    "title",
+    "description",
+    "categories",
+    "tags",
+    "brand",
+    "color",
+    "price",
+    "inventory_count",
+    "is_active",
+    "metadata_json",
+    "release_date",
+    "rating_average",
+)
+
+
+def block_rng(stream: int, block: int = 0) -> np.random.Generator:
+    """Independent generator per (stream, block), so blocks can be generated in any order.
+
+    Output still depends on how users are split into blocks: the same user lands in another
+    block, and draws different sessions, if the block size changes.
+    """
+
+    return np.random.default_rng([RANDOM_SEED, stream, block])
+
+
+def _to_uuids(raw: np.ndarray) -> list[uuid.UUID]:
+    data = raw.tobytes()
+    return [uuid.UUID(bytes=data[offset : offset + 16]) for offset in range(0, len(data), 16)]
+
+
+def random_uuids(rng: np.random.Generator, count: int) -> list[uuid.UUID]:
+    """Version 4 UUIDs drawn from ``rng`` instead of the OS, for reproducible keys."""
+
+    raw = rng.integers(0, 256, size=(count, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    return _to_uuids(raw)
+
+
+def time_ordered_uuids(rng: np.random.Generator, epoch_ms: np.ndarray) -> list[uuid.UUID]:
+    """Version 7 UUIDs stamped with each event's own time, matching ``app.core.ids.uuid7``."""
+
+    raw = rng.integers(0, 256, size=(len(epoch_ms), 16), dtype=np.uint8)
+    shifts = np.arange(40, -1, -8, dtype=np.int64)
+    raw[:, :6] = (epoch_ms.astype(np.int64)[:, None] >> shifts) & 0xFF
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x70
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    return _to_uuids(raw)
+
+
+def zipf_cdf(count: int, exponent: float) -> np.ndarray:
+    """Cumulative popularity of ranks ``1..count`` under a truncated Zipf law."""
+
+    weights = np.arange(1, count + 1, dtype=np.float64) ** -exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def generate_users(count: int, password_hash: str) -> tuple[list[uuid.UUID], list[tuple[Any, ...]]]:
+    rng = block_rng(1)
+    ids = random_uuids(rng, count)
+    first = rng.integers(0, len(FIRST_NAMES), size=count)
+    last = rng.integers(0, len(LAST_NAMES), size=count)
+    # Three distinct preferred categories per user: the first columns of a random permutation.
+    preferred = np.argsort(rng.random((count, len(CATEGORIES))), axis=1)[:, :3]
+    sensitivity = rng.choice(np.array(["low", "medium", "high"], dtype=object), size=count)
+    records = [
+        (
+            ids[index],
+            f"user{index:08d}@example.com",
+            password_hash,
+            f"{FIRST_NAMES[first[index]]} {LAST_NAMES[last[index]]}",
+            UserRole.USER.value,
+            True,
+            json.dumps(
+                {
+                    "preferred_categories": [CATEGORIES[category] for category in preferred[index]],
+                    "price_sensitivity": sensitivity[index],
+                }
+            ),
+            "[]",
+        )
+        for index in range(count)
+    ]
+    return ids, records
+
+
+def item_categories(count: int) -> np.ndarray:
+    """Primary category per item; items form contiguous category blocks by index."""
+
+    return (np.arange(count) * len(CATEGORIES)) // count
+
+
+def generate_items(count: int, today: date) -> tuple[list[uuid.UUID], list[tuple[Any, ...]]]:
+    rng = block_rng(2)
+    ids = random_uuids(rng, count)
+    primary = item_categories(count)
+    secondary = (primary + rng.integers(1, len(CATEGORIES), size=count)) % len(CATEGORIES)
+    tags = np.argsort(rng.random((count, len(TAGS))), axis=1)[:, :5]
+    adjectives = rng.integers(0, len(ADJECTIVES), size=count)
+    nouns = rng.integers(0, len(NOUNS), size=count)
+    brands = rng.integers(0, len(BRANDS), size=count)
+    colors = rng.integers(0, len(COLORS), size=count)
+    # Log-normal prices cluster around ~$60 with a long premium tail.
+    prices = np.clip(np.round(rng.lognormal(mean=4.1, sigma=0.7, size=count), 2), 1.0, 9_999.99)
+    inventory = rng.integers(0, 500, size=count)
+    ratings = np.round(rng.uniform(3.0, 4.9, size=count), 2)
+    released = np.datetime64(today, "D") - rng.integers(0, 730, size=count).astype("timedelta64[D]")
+    records = [
+        (
+            ids[index],
+            f"SKU-{index + 1:09d}",
+            f"{ADJECTIVES[adjectives[index]]} {NOUNS[nouns[index]]} {index + 1}",
+            f"{ADJECTIVES[adjectives[index]]} {NOUNS[nouns[index]].lower()} for {CATEGORIES[primary[index]]} by "
+            f"{BRANDS[brands[index]]}.",
+            [CATEGORIES[primary[index]], CATEGORIES[secondary[index]]],
+            [TAGS[tag] for tag in tags[index]],
+            BRANDS[brands[index]],
+            COLORS[colors[index]],
+            Decimal(f"{prices[index]:.2f}"),
+            int(inventory[index]),
+            True,
+            '{"generator": "synthetic"}',
+            released[index].item(),
+            float(ratings[index]),
+        )
+        for index in range(count)
+    ]
+    return ids, records
+
+
+def generate_interactions(
+    block: int,
+    user_ids: Sequence[uuid.UUID],
+    user_rates: np.ndarray,
+    item_ids: np.ndarray,
+    popularity_cdf: np.ndarray,
+    popularity_order: np.ndarray,
+    window: tuple[datetime, datetime],
+) -> list[tuple[Any, ...]]:
+    """Sessions for one block of users, as rows matching the ingestion ``COPY`` columns.
+
+    Each user draws a Poisson number of sessions proportional to their activity rate. A
+    session opens on a Zipf-popular anchor item; later events mostly stay within the anchor's
+    category block, the rest jump to another popular item. Events are spaced by exponential
+    gaps, so a session spans minutes while sessions spread over the whole window.
+    """
+
+    rng = block_rng(3, block)
+    sessions_per_user = rng.poisson(user_rates)
+    session_users = np.repeat(np.arange(len(user_ids)), sessions_per_user)
+    session_count = len(session_users)
+    if not session_count:
+        return []
+    lengths = rng.geometric(1.0 / MEAN_SESSION_EVENTS, size=session_count)
+    total = int(lengths.sum())
+    event_session = np.repeat(np.arange(session_count), lengths)
+    session_start = np.cumsum(lengths) - lengths
+    position = np.arange(total) - session_start[event_session]
+
+    item_count = len(item_ids)
+    anchors = popularity_order[np.searchsorted(popularity_cdf, rng.random(session_count))]
+    jumps = popularity_order[np.searchsorted(popularity_cdf, rng.random(total))]
+    block_size = max(1, item_count // len(CATEGORIES))
+    anchor = anchors[event_session]
+    block_low = (anchor // block_size) * block_size
+    block_high = np.minimum(block_low + block_size, item_count) - 1
+    nearby = np.clip(anchor + rng.integers(-50, 51, size=total), block_low, block_high)
+    focused = rng.random(total) < SESSION_FOCUS
+    items = np.where(position == 0, anchor, np.where(focused, nearby, jumps))
+
+    start, end = window
+    span_us = int((end - start).total_seconds() * 1_000_000)
+    session_begin = rng.integers(0, span_us, size=session_count)
+    gaps = rng.exponential(MEAN_EVENT_GAP_SECONDS * 1_000_000, size=total).astype(np.int64)
+    gaps[session_start] = 0
+    elapsed = np.cumsum(gaps)
+    offsets = np.minimum(session_begin[event_session] + elapsed - elapsed[session_start][event_session], span_us - 1)
+    event_us = int(start.timestamp() * 1_000_000) + offsets
+    event_at = [value.replace(tzinfo=UTC) for value in event_us.astype("datetime64[us]").astype(object)]
+
+    types = rng.choice(len(EVENT_TYPES), size=total, p=EVENT_TYPE_PROBABILITIES)
+    ratings = np.round(rng.uniform(3.0, 5.0, size=total), 1)
+    rating_values = np.where(EVENT_TYPES[types] == InteractionType.RATING.value, ratings, np.nan)
+    session_ids = random_uuids(rng, session_count)
+    session_metadata = np.array(
+        [json.dumps({"session_id": str(session_id)}) for session_id in session_ids],
+        dtype=object,
+    )
+    session_sources = rng.choice(SOURCES, size=session_count, p=SOURCE_PROBABILITIES)
+
+    users = np.asarray(user_ids, dtype=object)[session_users][event_session]
+    return list(
+        zip(
+            time_ordered_uuids(rng, event_us // 1000),
+            users,
+            item_ids[items],
+            EVENT_TYPES[types],
+            event_at,
+            EVENT_WEIGHTS[types].tolist(),
+            [None if math.isnan(value) else value for value in rating_values.tolist()],
+            session_sources[event_session],
+            session_metadata[event_session],
+            [None] * total,
+        )
+    )
+
+
+async def copy_rows(
+    session: AsyncSession,
+    table: str,
+    columns: Sequence[str],
+    records: list[tuple[Any, ...]],
+) -> None:
+    connection = await (await session.connection()).get_raw_connection()
+    await connection.driver_connection.copy_records_to_table(table, records=records, columns=columns)
+
+
+async def generate(preset: Preset, *, history_days: int = 180, zipf_exponent: float = 1.0) -> None:
+    """Write a synthetic dataset of ``preset`` size straight through ``COPY``.
+
+    Users, items and interactions only: embeddings and scores come from the trainer. Every
+    value except ``created_at``/``updated_at`` is a function of ``RANDOM_SEED`` and the
+    preset, so two runs produce the same dataset.
+    """
+
+    deterministic_seed()
+    engine: AsyncEngine = create_async_engine(str(settings.database_url), future=True)
+    SessionLocal: async_sessionmaker[AsyncSession] = async_sessionmaker(bind=engine, expire_on_commit=False)
+    end = datetime.now(tz=UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=history_days)
+    started = time.perf_counter()
+
+    def progress(message: str) -> None:
+        print(f"[{time.perf_counter() - started:8.1f}s] {message}", flush=True)
+
+    async with SessionLocal() as session:
+        await truncate_tables(session)
+        manager = PartitionManager(session)
+        for table in PARTITIONED_TABLES:
+            await manager.ensure_partitions(table, start=start)
+        await session.commit()
+
+    async with SessionLocal() as session:
+        session.add_all(build_staff_users())
+        password_hash = hash_password("UserPass123!")
+        user_ids, user_records = generate_users(preset.users, password_hash)
+        await copy_rows(session, User.__tablename__, USER_COLUMNS, user_records)
+        del user_records
+        progress(f"users={preset.users:,}")
+
+        item_ids, item_records = generate_items(preset.items, end.date())
+        await copy_rows(session, Item.__tablename__, ITEM_COLUMNS, item_records)
+        del item_records
+        await session.commit()
+        progress(f"items={preset.items:,}")
+
+    # Heavy-tailed activity: a few users account for a large share of sessions.
+    activity = block_rng(4).lognormal(mean=0.0, sigma=1.0, size=preset.users)
+    user_rates = activity / activity.sum() * (preset.interactions / MEAN_SESSION_EVENTS)
+    popularity_cdf = zipf_cdf(preset.items, zipf_exponent)
+    popularity_order = block_rng(5).permutation(preset.items)
+    item_array = np.asarray(item_ids, dtype=object)
+    users_per_block = max(1, int(preset.users * EVENTS_PER_BLOCK / max(preset.interactions, 1)))
+
+    written = 0
+    for block, offset in enumerate(range(0, preset.users, users_per_block)):
+        records = generate_interactions(
+            block,
+            user_ids[offset : offset + users_per_block],
+            user_rates[offset : offset + users_per_block],
+            item_array,
+            popularity_cdf,
+            popularity_order,
+            (start, end),
+        )
+        async with SessionLocal() as session:
+            await InteractionIngestionService(session).copy_records(records)
+            await session.commit()
+        written += len(records)
+        progress(f"interactions={written:,} rows/sec={written / (time.perf_counter() - started):,.0f}")
+
+    async with SessionLocal() as session:
+        await AffinityService(session).rebuild()
+        progress("affinity rebuilt")
+    async with engine.connect() as connection:
+        await connection.execute(text("ANALYZE users, items, interactions, user_item_affinity"))
+        await connection.commit()
+
+    await engine.dispose()
+    progress("done")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Seed the database with fixtures or a synthetic load-test dataset.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), help="Generate a synthetic dataset of this size.")
+    parser.add_argument("--users", type=int, help="Override the preset's user count.")
+    parser.add_argument("--items", type=int, help="Override the preset's item count.")
+    parser.add_argument("--interactions", type=int, help="Override the preset's interaction count (approximate).")
+    parser.add_argument("--history-days", type=int, default=180, help="Spread interactions over this many days.")
+    parser.add_argument("--zipf-exponent", type=float, default=1.0, help="Skew of item popularity.")
+    return parser.parse_args()
+
+
 def main() -> None:
     """CLI entrypoint."""
 
-    asyncio.run(seed())
+    args = parse_args()
+    if args.preset is None:
+        asyncio.run(seed())
+        return
+    base = PRESETS[args.preset]
+    preset = Preset(
+        users=args.users or base.users,
+        items=args.items or base.items,
+        interactions=args.interactions or base.interactions,
+    )
+    asyncio.run(generate(preset, history_days=args.history_days, zipf_exponent=args.zipf_exponent))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+import pytest
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+
+
+@pytest.fixture
+async def db_session() -> AsyncIterator[AsyncSession]:
+    """A session on the migrated database at ``DATABASE_URL``, rolled back after the test.
+
+    Tests using it are skipped when PostgreSQL is not reachable (run ``make alembic-upgrade``
+    against a scratch database first).
+    """
+
+    engine = create_async_engine(str(settings.database_url))
+    try:
+        connection = await engine.connect()
+    except (OSError, DBAPIError, OperationalError) as exc:
+        await engine.dispose()
+        pytest.skip(f"PostgreSQL not reachable: {exc}")
+    transaction = await connection.begin()
+    session = AsyncSession(
+        bind=connection, expire_on_commit=False, join_transaction_mode="create_savepoint"
+    )
+    try:
+        yield session
+    finally:
+        await session.close()
+        await transaction.rollback()
+        await connection.close()
+        await engine.dispose()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from app.services.ann_index import IVFFlatIndex, top_k
+
+
+def _clustered(rng: np.random.Generator, size: int, dim: int, clusters: int) -> np.ndarray:
+    centres = rng.normal(size=(clusters, dim))
+    members = centres[rng.integers(clusters, size=size)]
+    return (members + rng.normal(scale=0.3, size=(size, dim))).astype(np.float32)
+
+
+def _exact(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    return top_k(queries @ vectors.T, k)
+
+
+def _index(vectors: np.ndarray, nlist: int) -> IVFFlatIndex:
+    ids = [uuid.uuid4() for _ in range(len(vectors))]
+    return IVFFlatIndex.build(ids, vectors, nlist=nlist, seed=3)
+
+
+def _original_rows(index: IVFFlatIndex, vectors: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Map rows of the cluster-ordered index back to positions in ``vectors``."""
+
+    positions = {vector.tobytes(): position for position, vector in enumerate(vectors)}
+    return np.array(
+        [[positions[index.vectors[row].tobytes()] for row in row_set] for row_set in rows]
+    )
+
+
+def test_top_k_orders_the_best_scores_descending() -> None:
+    scores = np.array([[0.1, 0.9, 0.5, 0.7], [3.0, 1.0, 2.0, 0.0]])
+
+    assert top_k(scores, 2).tolist() == [[1, 3], [0, 2]]
+    assert top_k(scores, 10).shape == (2, 4)
+    assert top_k(scores, 0).shape == (2, 0)
+
+
+def test_probing_a_few_lists_keeps_recall_high() -> None:
+    rng = np.random.default_rng(11)
+    vectors = _clustered(rng, 4000, 16, 40)
+    queries = _clustered(rng, 100, 16, 40)
+    index = _index(vectors, nlist=64)
+
+    rows, _ = index.search(queries, 10, nprobe=8)
+
+    expected = _exact(vectors, queries, 10)
+    found = _original_rows(index, vectors, rows)
+    recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(found, expected, strict=True)])
+    assert recall >= 0.9
+
+
+def test_probing_every_list_is_exact() -> None:
+    rng = np.random.default_rng(5)
+    vectors = _clustered(rng, 500, 8, 10)
+    queries = rng.normal(size=(20, 8)).astype(np.float32)
+    index = _index(vectors, nlist=16)
+
+    rows, scores = index.search(queries, 5, nprobe=index.nlist)
+
+    np.testing.assert_array_equal(_original_rows(index, vectors, rows), _exact(vectors, queries, 5))
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+def test_saved_indexes_load_with_the_same_results(tmp_path: Path) -> None:
+    rng = np.random.default_rng(2)
+    vectors = _clustered(rng, 300, 8, 6)
+    index = _index(vectors, nlist=8)
+    index.model_version = "v1"
+
+    index.save(tmp_path)
+    loaded = IVFFlatIndex.load(tmp_path)
+
+    assert loaded.model_version == "v1"
+    assert len(loaded) == len(index)
+    assert loaded.search_ids(vectors[0], 5, nprobe=2) == index.search_ids(vectors[0], 5, nprobe=2)
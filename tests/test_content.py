@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import uuid
+
+import numpy as np
+
+from ml.content import ContentModel, ContentParams, ItemDocument
+
+DOCUMENTS: list[ItemDocument] = [
+    ("Trail shoes", "Light shoes for muddy trail runs", ["Footwear"], ["running", "trail"], "Acme"),
+    ("Road shoes", "Cushioned shoes for long road runs", ["Footwear"], ["running"], "Acme"),
+    ("Rain jacket", "Waterproof jacket for trail hiking", ["Outerwear"], ["hiking"], "Peak"),
+    (
+        "Hiking boots",
+        "Waterproof boots for rocky trails",
+        ["Footwear"],
+        ["hiking", "trail"],
+        "Peak",
+    ),
+]
+
+
+def _fit() -> ContentModel:
+    params = ContentParams(min_df=1, max_df=1.0)
+    return ContentModel.fit([uuid.uuid4() for _ in DOCUMENTS], DOCUMENTS, params)
+
+
+def test_transform_reproduces_the_fitted_vectors() -> None:
+    model = _fit()
+
+    vectors = model.transform(DOCUMENTS)
+
+    np.testing.assert_allclose(vectors.toarray(), model.vectors.toarray(), rtol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(vectors.toarray(), axis=1), 1.0, rtol=1e-6)
+
+
+def test_transform_ignores_terms_unseen_at_fit() -> None:
+    model = _fit()
+    edited = (*DOCUMENTS[0][:1], DOCUMENTS[0][1] + " with carbonplate", *DOCUMENTS[0][2:])
+
+    vectors = model.transform([edited, ("Zeppelin", "Quixotic", [], [], None)])
+
+    np.testing.assert_allclose(vectors[0].toarray(), model.vectors[0].toarray(), rtol=1e-6)
+    assert vectors[1].nnz == 0
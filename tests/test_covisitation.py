@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import uuid
+from collections import Counter
+from collections.abc import Sequence
+
+import pytest
+
+from app.core.config import settings
+from app.services.covisitation import new_pairs
+
+Pair = tuple[uuid.UUID, uuid.UUID]
+
+
+def _rebuild_scores(groups: Sequence[tuple[Sequence[uuid.UUID], float]]) -> Counter[Pair]:
+    """What the rebuild SQL scores: every ordered pair of distinct items per small enough group."""
+
+    scores: Counter[Pair] = Counter()
+    for items, weight in groups:
+        distinct = set(items)
+        if len(distinct) > settings.covisit_max_group_items:
+            continue
+        for item_id in distinct:
+            for other in distinct - {item_id}:
+                scores[item_id, other] += weight
+    return scores
+
+
+def _incremental_scores(
+    groups: Sequence[tuple[Sequence[Sequence[uuid.UUID]], float]],
+) -> Counter[Pair]:
+    """Feed each group's events batch by batch, as the stream worker does."""
+
+    scores: Counter[Pair] = Counter()
+    for batches, weight in groups:
+        members: Counter[uuid.UUID] = Counter()
+        for batch in batches:
+            counts = Counter(batch)
+            members.update(counts)
+            for item_id, other, pair_weight in new_pairs(dict(members), counts, weight):
+                scores[item_id, other] += pair_weight
+    return scores
+
+
+def test_new_pairs_accumulate_to_the_rebuild_scores() -> None:
+    a, b, c, d, e = (uuid.uuid4() for _ in range(5))
+    groups = [
+        ([[a, b], [a], [c, a, d], [b, e]], 1.0),
+        ([[c, c], [d], [c]], 0.5),
+        ([[a]], 1.0),
+    ]
+
+    incremental = _incremental_scores(groups)
+    flattened = [
+        ([item for batch in batches for item in batch], weight) for batches, weight in groups
+    ]
+    rebuilt = _rebuild_scores(flattened)
+
+    assert incremental == rebuilt
+
+
+def test_new_pairs_ignore_repeats_of_known_items() -> None:
+    a, b = uuid.uuid4(), uuid.uuid4()
+
+    assert list(new_pairs({a: 2, b: 1}, Counter({a: 1}), 1.0)) == []
+
+
+def test_new_pairs_skip_oversized_groups(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "covisit_max_group_items", 2)
+    items = [uuid.uuid4() for _ in range(3)]
+
+    assert list(new_pairs({item_id: 1 for item_id in items}, Counter(items), 1.0)) == []
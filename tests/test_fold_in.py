@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import uuid
+
+import numpy as np
+
+from app.services.fold_in import fold_in_vectors
+from app.services.recommender import ItemMatrix
+
+
+def _als_user_step(
+    vectors: np.ndarray,
+    rows: list[int],
+    weights: list[float],
+    *,
+    alpha: float,
+    regularization: float,
+) -> np.ndarray:
+    """Dense implicit-ALS user solve ``(YᵀCY + λI) x = YᵀCp``, ``c = 1 + a|w|``, ``p = [w > 0]``."""
+
+    confidence = np.ones(len(vectors))
+    preference = np.zeros(len(vectors))
+    for row, weight in zip(rows, weights, strict=True):
+        confidence[row] += alpha * abs(weight)
+        preference[row] = float(weight > 0)
+    factors = vectors.astype(np.float64)
+    system = factors.T @ (confidence[:, None] * factors) + regularization * np.eye(factors.shape[1])
+    return np.linalg.solve(system, factors.T @ (confidence * preference))
+
+
+def test_fold_in_vectors_match_the_als_user_step() -> None:
+    rng = np.random.default_rng(7)
+    item_ids = [uuid.uuid4() for _ in range(30)]
+    matrix = ItemMatrix(
+        model_version="test",
+        item_ids=item_ids,
+        vectors=rng.normal(scale=0.3, size=(30, 8)).astype(np.float32),
+        eligible=np.ones(30, dtype=bool),
+    )
+    users = [
+        {item_ids[0]: 1.0, item_ids[4]: 3.5, item_ids[9]: 0.25},
+        {item_ids[2]: 2.0, item_ids[3]: -1.0, uuid.uuid4(): 5.0},
+        {uuid.uuid4(): 1.0},
+    ]
+
+    vectors, observed = fold_in_vectors(matrix, users, alpha=40.0, regularization=0.1)
+
+    assert observed.tolist() == [3, 2, 0]
+    rows = matrix.row_index()
+    for vector, weights in zip(vectors[:2], users[:2], strict=True):
+        known = [(rows[item_id], weight) for item_id, weight in weights.items() if item_id in rows]
+        expected = _als_user_step(
+            matrix.vectors,
+            [row for row, _ in known],
+            [weight for _, weight in known],
+            alpha=40.0,
+            regularization=0.1,
+        )
+        np.testing.assert_allclose(vector, expected, rtol=1e-4, atol=1e-5)
+    np.testing.assert_array_equal(vectors[2], np.zeros(8, dtype=np.float32))
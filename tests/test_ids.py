@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, datetime, timedelta
+from itertools import pairwise
+
+import pytest
+
+from app.core.ids import uuid7, uuid7_timestamp
+
+
+def test_uuid7_sets_version_and_variant() -> None:
+    value = uuid7()
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+
+def test_uuid7_is_strictly_increasing_within_a_process() -> None:
+    values = [uuid7() for _ in range(20_000)]
+
+    assert all(earlier < later for earlier, later in pairwise(values))
+
+
+def test_uuid7_timestamp_round_trips_the_creation_time() -> None:
+    before = datetime.now(tz=UTC)
+    value = uuid7()
+    after = datetime.now(tz=UTC)
+
+    created = uuid7_timestamp(value)
+
+    # Millisecond resolution; a counter overflow may borrow the next millisecond.
+    assert before - timedelta(milliseconds=1) <= created <= after + timedelta(milliseconds=2)
+
+
+def test_uuid7_timestamp_rejects_other_versions() -> None:
+    with pytest.raises(ValueError):
+        uuid7_timestamp(uuid.uuid4())
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import re
+import uuid
+from collections.abc import Iterator
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Item, ModelVersionStatus, RecommendationScore, User
+from app.services import model_versions
+from app.services.model_versions import ModelVersionService, _literal, partition_name
+
+
+@pytest.fixture(autouse=True)
+def _clear_live_version() -> Iterator[None]:
+    model_versions._live_version.clear()
+    yield
+    model_versions._live_version.clear()
+
+
+def test_partition_names_are_stable_identifiers_within_the_length_limit() -> None:
+    long_version = "als-" + "x" * 200
+
+    assert partition_name("ALS 2024.05") == partition_name("ALS 2024.05")
+    assert partition_name("als-2024.05").startswith("fs_scores_als_2024_05_")
+    assert len(partition_name(long_version)) <= 63
+    for version in ("v1", "als-2024.05", "Robert'); DROP TABLE users;--", long_version):
+        assert re.fullmatch(r"[a-z0-9_]+", partition_name(version))
+
+
+def test_versions_with_the_same_slug_get_distinct_partitions() -> None:
+    assert partition_name("v1.0") != partition_name("v1_0")
+
+
+def test_literals_escape_single_quotes() -> None:
+    assert _literal("v1") == "'v1'"
+    assert _literal("it's") == "'it''s'"
+
+
+async def _user_and_item(session: AsyncSession) -> tuple[uuid.UUID, uuid.UUID]:
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password=uuid.uuid4().hex)
+    item = Item(sku=f"SKU-{uuid.uuid4().hex[:12]}", title="Item", description="")
+    session.add_all([user, item])
+    await session.flush()
+    return user.id, item.id
+
+
+def _rows(version: str, user_id: uuid.UUID, item_id: uuid.UUID) -> list[tuple[object, ...]]:
+    now = datetime.now(tz=UTC)
+    return [(uuid.uuid4(), user_id, item_id, version, 0.5, 1, json.dumps({}), now)]
+
+
+async def test_published_versions_are_attached_and_live(db_session: AsyncSession) -> None:
+    user_id, item_id = await _user_and_item(db_session)
+    service = ModelVersionService(db_session)
+    first, second = f"test-{uuid.uuid4().hex[:8]}", f"test-{uuid.uuid4().hex[:8]}"
+
+    assert await service.publish_scores(first, [_rows(first, user_id, item_id)]) == 1
+    await service.publish_scores(second, [_rows(second, user_id, item_id)])
+
+    assert await service.live_version(refresh=True) == second
+    assert (await service.get(first)).status == ModelVersionStatus.RETIRED
+    scores = await db_session.scalars(
+        select(RecommendationScore.model_version).where(RecommendationScore.user_id == user_id)
+    )
+    assert sorted(scores) == sorted([first, second])
+
+
+async def test_abandoned_builds_leave_nothing_behind(db_session: AsyncSession) -> None:
+    user_id, item_id = await _user_and_item(db_session)
+    service = ModelVersionService(db_session)
+    version = f"test-{uuid.uuid4().hex[:8]}"
+    table = await service.begin_build(version)
+    await service.copy_scores(version, _rows(version, user_id, item_id))
+
+    await service.abandon(version)
+
+    assert await service.get(version) is None
+    assert await db_session.scalar(text("SELECT to_regclass(:name)").bindparams(name=table)) is None
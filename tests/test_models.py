@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.models import EventLog, Interaction, Item, User
+
+
+@pytest.mark.parametrize(
+    ("instance", "attribute"),
+    [
+        (User(id=uuid.uuid4()), "interactions"),
+        (User(id=uuid.uuid4()), "assignments"),
+        (User(id=uuid.uuid4()), "event_logs"),
+        (Item(id=uuid.uuid4()), "item_embeddings"),
+        (Interaction(id=uuid.uuid4(), event_at=datetime.now(tz=UTC)), "item"),
+    ],
+)
+def test_unloaded_relationships_raise_instead_of_lazy_loading(
+    instance: object, attribute: str
+) -> None:
+    make_transient_to_detached(instance)
+
+    with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+        getattr(instance, attribute)
+
+
+async def test_deleting_a_user_deletes_their_event_logs(db_session: AsyncSession) -> None:
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password=uuid.uuid4().hex)
+    db_session.add(user)
+    await db_session.flush()
+    log = EventLog(event_type="login", user_id=user.id, occurred_at=datetime.now(tz=UTC))
+    db_session.add(log)
+    await db_session.flush()
+    db_session.expunge_all()
+
+    await db_session.delete(await db_session.get(User, user.id))
+    await db_session.flush()
+
+    remaining = select(func.count()).select_from(EventLog).where(EventLog.id == log.id)
+    assert await db_session.scalar(remaining) == 0
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from ml.evaluate import ranking_metrics
+
+
+def _relevant(rows: list[list[int]], n_items: int) -> sp.csr_matrix:
+    indptr = np.cumsum([0] + [len(row) for row in rows])
+    indices = np.asarray([item for row in rows for item in row], dtype=np.int32)
+    return sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(rows), n_items))
+
+
+def test_ranking_metrics_match_hand_computed_values() -> None:
+    lists = np.asarray(
+        [
+            [1, 2, 3],  # hits at ranks 1 and 3 of 2 relevant
+            [2, 0, -1],  # hit at rank 2; the -1 pad would collide with user 0's item 3
+            [0, 1, 2],  # nothing relevant
+            [3, -1, -1],  # 1 hit of 4 relevant, normalized by K=3
+        ]
+    )
+    relevant = _relevant([[3, 1], [0], [], [0, 1, 2, 3]], n_items=4)
+
+    metrics = ranking_metrics(lists, relevant)
+
+    log2_3 = math.log2(3)
+    assert metrics["map"] == pytest.approx([(1 + 2 / 3) / 2, 1 / 2, 0.0, 1 / 3])
+    assert metrics["ndcg"] == pytest.approx(
+        [(1 + 1 / 2) / (1 + 1 / log2_3), (1 / log2_3) / 1, 0.0, 1 / (1 + 1 / log2_3 + 1 / 2)]
+    )
+    assert metrics["recall"] == pytest.approx([1.0, 1.0, 0.0, 1 / 4])
+
+
+def test_ranking_metrics_without_any_relevant_items() -> None:
+    lists = np.asarray([[0, 1], [-1, -1]])
+
+    metrics = ranking_metrics(lists, sp.csr_matrix((2, 3)))
+
+    for values in metrics.values():
+        assert values.tolist() == [0.0, 0.0]
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import fakeredis.aioredis
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import cache as cache_module
+from app.core.cache import (
+    INSTANCE_ID,
+    TTLCache,
+    _dispatch_invalidation,
+    register_invalidation_handler,
+)
+from app.schemas.item import ItemRead
+from app.schemas.recommendation import RecommendedItem
+from app.services import recommendation_cache
+from app.services.recommendation_cache import NAMESPACE, RecommendationCache
+
+
+@pytest.fixture
+def redis(monkeypatch: pytest.MonkeyPatch) -> fakeredis.aioredis.FakeRedis:
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    async def get_client() -> fakeredis.aioredis.FakeRedis:
+        return client
+
+    monkeypatch.setattr(cache_module, "get_redis_client", get_client)
+    monkeypatch.setattr(recommendation_cache, "get_redis_client", get_client)
+    return client
+
+
+def _items(count: int = 2) -> list[RecommendedItem]:
+    now = datetime.now(tz=UTC)
+    return [
+        RecommendedItem(
+            item=ItemRead(
+                id=uuid.uuid4(),
+                sku=f"SKU-{rank}",
+                title=f"Item {rank}",
+                description="",
+                categories=[],
+                tags=[],
+                price=Decimal("9.99"),
+                inventory_count=1,
+                is_active=True,
+                metadata_json={},
+                created_at=now,
+                updated_at=now,
+            ),
+            score=1.0 / rank,
+            rank=rank,
+        )
+        for rank in range(1, count + 1)
+    ]
+
+
+def test_ttl_cache_expires_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: clock[0])
+    cache: TTLCache[str, int] = TTLCache(max_entries=4, ttl_seconds=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_seconds=30)
+
+    clock[0] += 11
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+def test_ttl_cache_evicts_the_least_recently_used_entry() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+async def test_lists_are_served_from_redis_after_a_local_miss(
+    redis: fakeredis.aioredis.FakeRedis,
+) -> None:
+    cache = RecommendationCache()
+    user_id, items = uuid.uuid4(), _items()
+    await cache.set(user_id, "v1", 10, items)
+    cache.local.clear()
+
+    assert await cache.get(user_id, "v1", 10) == items
+    assert await cache.get(user_id, "v1", 20) is None
+    assert await cache.get(user_id, "v2", 10) is None
+
+
+async def test_invalidate_evicts_every_limit_of_one_version(
+    redis: fakeredis.aioredis.FakeRedis,
+) -> None:
+    cache = RecommendationCache()
+    user_id, items = uuid.uuid4(), _items()
+    for limit in (10, 20):
+        await cache.set(user_id, "v1", limit, items)
+    await cache.set(user_id, "v2", 10, items)
+
+    await cache.invalidate(user_id, "v1")
+
+    assert await cache.get(user_id, "v1", 10) is None
+    assert await cache.get(user_id, "v1", 20) is None
+    assert await cache.get(user_id, "v2", 10) == items
+
+
+async def test_invalidation_waits_for_the_commit(redis: fakeredis.aioredis.FakeRedis) -> None:
+    cache = RecommendationCache()
+    user_id, items = uuid.uuid4(), _items()
+    await cache.set(user_id, "v1", 10, items)
+    session = AsyncSession()
+
+    cache.invalidate_after_commit(session, user_id, "v1")
+    assert await cache.get(user_id, "v1", 10) == items
+
+    await session.commit()
+    await asyncio.gather(*recommendation_cache._invalidation_tasks)
+    assert await cache.get(user_id, "v1", 10) is None
+
+
+async def test_evictions_from_other_processes_clear_the_local_tier() -> None:
+    cache = RecommendationCache()
+    user_id, items = uuid.uuid4(), _items()
+    cache._store_local(user_id, "v1", 10, items)
+    register_invalidation_handler(NAMESPACE, cache.evict_local)
+    key = RecommendationCache.redis_key(user_id, "v1")
+
+    await _dispatch_invalidation(
+        json.dumps({"namespace": NAMESPACE, "key": key, "origin": INSTANCE_ID})
+    )
+    assert cache.local.get((user_id, "v1")) == {10: items}
+
+    await _dispatch_invalidation(
+        json.dumps({"namespace": NAMESPACE, "key": key, "origin": "other"})
+    )
+    assert cache.local.get((user_id, "v1")) is None
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.security import (
+    PasswordHasherBusyError,
+    hash_password_async,
+    shutdown_password_executor,
+    verify_password_async,
+)
+
+
+async def _round_trip(password: str) -> bool:
+    return await verify_password_async(password, await hash_password_async(password))
+
+
+def test_password_pool_survives_shutdown_and_a_new_event_loop() -> None:
+    # Two lifespans in one process, as under a test client or a reload.
+    assert asyncio.run(_round_trip("first-lifespan"))
+    shutdown_password_executor()
+
+    assert asyncio.run(_round_trip("second-lifespan"))
+    shutdown_password_executor()
+
+
+async def test_password_operations_are_rejected_when_the_queue_is_full(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "password_hash_max_queue", 0)
+
+    with pytest.raises(PasswordHasherBusyError):
+        await hash_password_async("rejected")
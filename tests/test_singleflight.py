@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+
+from app.core import singleflight
+from app.core.singleflight import RedisSingleFlight, SingleFlight
+
+
+class _Computation:
+    def __init__(self, result: str = "value", error: Exception | None = None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.cancelled = False
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+async def test_concurrent_callers_share_one_computation() -> None:
+    flight: SingleFlight[str, str] = SingleFlight("test")
+    compute = _Computation()
+    callers = [asyncio.create_task(flight.do("key", compute)) for _ in range(5)]
+    await asyncio.sleep(0)
+
+    compute.release.set()
+
+    assert await asyncio.gather(*callers) == ["value"] * 5
+    assert compute.calls == 1
+    assert len(flight) == 0
+
+
+async def test_cancelling_the_leader_leaves_waiters_the_result() -> None:
+    flight: SingleFlight[str, str] = SingleFlight("test")
+    compute = _Computation()
+    leader = asyncio.create_task(flight.do("key", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", compute))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    compute.release.set()
+
+    assert await follower == "value"
+    assert leader.cancelled()
+    assert compute.calls == 1
+    assert not compute.cancelled
+
+
+async def test_cancelling_the_last_waiter_cancels_the_computation() -> None:
+    flight: SingleFlight[str, str] = SingleFlight("test")
+    compute = _Computation()
+    callers = [asyncio.create_task(flight.do("key", compute)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert compute.cancelled
+    assert len(flight) == 0
+
+    retry = _Computation("fresh")
+    retry.release.set()
+    assert await flight.do("key", retry) == "fresh"
+
+
+async def test_errors_reach_every_caller() -> None:
+    flight: SingleFlight[str, str] = SingleFlight("test")
+    compute = _Computation(error=ValueError("boom"))
+    callers = [asyncio.create_task(flight.do("key", compute)) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    compute.release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert compute.calls == 1
+    assert len(flight) == 0
+
+
+async def test_redis_followers_read_the_leaders_result(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    async def get_client() -> fakeredis.aioredis.FakeRedis:
+        return client
+
+    monkeypatch.setattr(singleflight, "get_redis_client", get_client)
+    flight: RedisSingleFlight[str] = RedisSingleFlight("test", wait_timeout=1.0, poll_interval=0)
+    await client.set(flight.lock_key("key"), "leader-token")
+    shared: list[str] = []
+
+    async def compute() -> str:
+        raise AssertionError("a follower must not compute while the lock is held")
+
+    async def read_shared() -> str | None:
+        return shared[0] if shared else None
+
+    follower = asyncio.create_task(flight.do("key", compute, read_shared))
+    await asyncio.sleep(0.01)
+    shared.append("value")
+
+    assert await follower == "value"
+
+
+async def test_redis_followers_compute_once_the_lock_is_released(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    async def get_client() -> fakeredis.aioredis.FakeRedis:
+        return client
+
+    monkeypatch.setattr(singleflight, "get_redis_client", get_client)
+    flight: RedisSingleFlight[str] = RedisSingleFlight("test", wait_timeout=1.0, poll_interval=0)
+    await client.set(flight.lock_key("key"), "leader-token")
+
+    async def compute() -> str:
+        return "computed"
+
+    async def read_shared() -> str | None:
+        return None
+
+    follower = asyncio.create_task(flight.do("key", compute, read_shared))
+    await asyncio.sleep(0.01)
+    await client.delete(flight.lock_key("key"))
+
+    assert await asyncio.wait_for(follower, timeout=1.0) == "computed"
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import pairwise
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from ml.train import AlsParams, _blocks, _loss, _solve_block, train_als
+
+
+def _weights(seed: int = 3, shape: tuple[int, int] = (40, 25)) -> sp.csr_matrix:
+    rng = np.random.default_rng(seed)
+    matrix = sp.random(*shape, density=0.15, random_state=seed, format="csr", dtype=np.float32)
+    matrix.data = (matrix.data * 5.0).astype(np.float32)
+    # A few confident non-preferences.
+    matrix.data[rng.random(matrix.nnz) < 0.1] *= -1.0
+    return matrix
+
+
+def _dense_confidence(weights: sp.csr_matrix) -> tuple[np.ndarray, np.ndarray]:
+    dense = weights.toarray().astype(np.float64)
+    return 1.0 + np.abs(dense), (dense > 0).astype(np.float64)
+
+
+def test_solve_block_converges_to_the_normal_equations() -> None:
+    weights = _weights()
+    rng = np.random.default_rng(0)
+    factors = rng.normal(scale=0.1, size=(weights.shape[1], 6)).astype(np.float32)
+    target = np.zeros((weights.shape[0], 6), dtype=np.float32)
+    regularization = 0.1
+    gram = factors.T @ factors + regularization * np.eye(6, dtype=np.float32)
+
+    # With as many CG steps as unknowns the solve is exact up to rounding.
+    _solve_block(target, factors, gram, weights, 0, weights.shape[0], cg_steps=12)
+
+    confidence, preference = _dense_confidence(weights)
+    y = factors.astype(np.float64)
+    for row in range(weights.shape[0]):
+        system = y.T @ (confidence[row][:, None] * y) + regularization * np.eye(6)
+        expected = np.linalg.solve(system, y.T @ (confidence[row] * preference[row]))
+        np.testing.assert_allclose(target[row], expected, rtol=1e-3, atol=1e-4)
+
+
+def test_loss_matches_the_dense_objective() -> None:
+    weights = _weights()
+    params = AlsParams(factors=5, regularization=0.2, workers=2)
+    rng = np.random.default_rng(1)
+    users = rng.normal(scale=0.3, size=(weights.shape[0], 5)).astype(np.float32)
+    items = rng.normal(scale=0.3, size=(weights.shape[1], 5)).astype(np.float32)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        loss = _loss(pool, users, items, weights, _blocks(weights.indptr, 16), params)
+
+    confidence, preference = _dense_confidence(weights)
+    dots = users.astype(np.float64) @ items.astype(np.float64).T
+    penalty = 0.2 * (np.sum(users.astype(np.float64) ** 2) + np.sum(items.astype(np.float64) ** 2))
+    expected = (np.sum(confidence * (preference - dots) ** 2) + penalty) / confidence.sum()
+    assert loss == pytest.approx(expected, rel=1e-4)
+
+
+def test_train_als_decreases_the_loss_and_ignores_the_worker_count() -> None:
+    weights = _weights(shape=(120, 60))
+    params = {"factors": 8, "alpha": 2.0, "iterations": 6, "tolerance": 0.0, "block_nnz": 64}
+
+    single = train_als(weights, AlsParams(workers=1, blas_threads=1, **params))
+    threaded = train_als(weights, AlsParams(workers=4, blas_threads=1, **params))
+
+    losses = [stats.loss for stats in single.history]
+    assert losses[-1] < losses[0]
+    assert all(later <= earlier * (1 + 1e-6) for earlier, later in pairwise(losses))
+    # Blocks are disjoint rows solved independently, so threading only changes the schedule.
+    np.testing.assert_array_equal(single.user_factors, threaded.user_factors)
+    np.testing.assert_array_equal(single.item_factors, threaded.item_factors)